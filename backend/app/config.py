@@ -6,6 +6,89 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # --- Engine / pool de conexiones ---
+    DB_ECHO: bool = False  # `True` para ver las queries SQL (solo desarrollo)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # segundos esperando una conexión libre
+    DB_POOL_RECYCLE: int = 1800  # segundos antes de reciclar una conexión
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 = sin límite (solo PostgreSQL)
+    DB_POOL_WAIT_WARN_MS: float = 100.0  # avisar si obtener una conexión tarda más
+
+    # --- Modo asíncrono (AsyncSession con asyncpg / aiosqlite) ---
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: str | None = None  # por defecto se deriva de DATABASE_URL
+
+    # --- Réplicas de lectura ---
+    DATABASE_REPLICA_URLS: str = ""  # URLs separadas por coma; vacío = todo va al primario
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0  # tras escribir, el cliente lee del primario
+
+    # --- Migraciones (python -m app.migrations upgrade) ---
+    DB_MIGRATE_ON_STARTUP: bool = False  # si no, al arrancar solo se comprueba la versión
+    DB_MIGRATION_LOCK_TIMEOUT: float = 300.0
+
+    # --- Instrumentación de consultas por petición ---
+    DB_QUERY_STATS_ENABLED: bool = True
+    DB_QUERY_COUNT_WARN: int = 50  # avisar si una petición ejecuta más consultas
+    DB_NPLUSONE_THRESHOLD: int = 10  # misma consulta repetida N veces = posible N+1
+    DB_NPLUSONE_RAISE: bool = False  # en dev/test: lanzar excepción al detectar un N+1
+
+    # --- Log de consultas lentas ---
+    DB_SLOW_QUERY_MS: float = 200.0  # 0 = desactivado
+    DB_SLOW_QUERY_EXPLAIN: bool = True  # capturar el plan (EXPLAIN ANALYZE en PostgreSQL)
+    DB_SLOW_QUERY_EXPLAIN_INTERVAL: float = 300.0  # segundos entre planes de la misma consulta
+
+    # --- Índice de catálogo en memoria (filtros y facetas de productos) ---
+    CATALOG_INDEX_ENABLED: bool = True
+    CATALOG_INDEX_MAX_AGE: float = 60.0  # reconstrucción completa periódica (cambios hechos por otros procesos)
+
+    # --- Autocompletado de nombres (GET /products/suggest, índice en memoria) ---
+    SUGGEST_INDEX_MAX_AGE: float = 300.0  # reconstrucción completa (nombres y ranking de ventas)
+
+    # --- Productos relacionados (python -m app.modules.productos.product_related_service update) ---
+    RELATED_PRODUCTS_TOP_N: int = 20  # relacionados guardados por producto
+    RELATED_PRODUCTS_BATCH_SIZE: int = 10_000  # ventas por lote (una transacción con su punto de control)
+    RELATED_PRODUCTS_SETTLE_SECONDS: float = 300.0  # las ventas más recientes esperan a la próxima ejecución
+
+    # --- Caché de entidades de catálogo (productos, variantes, categorías) ---
+    CACHE_ENABLED: bool = True
+    CACHE_TTL_SECONDS: float = 300.0
+    CACHE_MAX_ENTRIES: int = 10_000
+
+    # --- Caché HTTP (ETag + Cache-Control en lecturas de catálogo) ---
+    CATALOG_VERSION_POLL_SECONDS: float = 1.0  # cada cuánto se relee la versión (cambios de otros procesos)
+    HTTP_CACHE_CONTROL: dict[str, str] = {
+        "products": "public, no-cache",  # siempre revalidar: con ETag cuesta un 304
+        "categorias": "public, max-age=60",
+        "proveedores": "private, no-cache",
+    }
+
+    # --- Serialización rápida de listados grandes (orjson, ver app/core/fast_json.py) ---
+    FAST_JSON_ENABLED: bool = False
+
+    # --- Importación masiva de productos (POST /products/import) ---
+    IMPORT_BATCH_SIZE: int = 500  # filas por lote (una transacción con su punto de control)
+    IMPORT_MAX_ERRORS: int = 1000  # errores por fila que se guardan en el trabajo
+    IMPORT_RESUME_ON_STARTUP: bool = True  # reanudar al arrancar las importaciones interrumpidas
+    IMPORT_STALE_SECONDS: float = 300.0  # sin latido en este tiempo, un trabajo en curso se da por interrumpido
+
+    # --- Subida de imágenes de producto ---
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024  # mayor = 413
+
+    # --- Derivados de imágenes (WebP/AVIF redimensionados, ver app/modules/productos/product_images.py) ---
+    IMAGE_VARIANTS_ENABLED: bool = True
+    IMAGE_VARIANT_WIDTHS: list[int] = [320, 640, 1280]
+    IMAGE_VARIANT_FORMATS: list[str] = ["webp"]  # "avif" si Pillow lo soporta (pesa menos, codifica más lento)
+    IMAGE_VARIANT_QUALITY: int = 80
+    IMAGE_PROCESS_WORKERS: int = 2
+
+    # --- Archivos de /static (ver app/core/media.py) ---
+    MEDIA_IMMUTABLE_CACHE_CONTROL: str = "public, max-age=31536000, immutable"  # nombres con hash de contenido
+    MEDIA_CACHE_CONTROL: str = "public, no-cache"  # el resto: revalidar con ETag (304)
+    MEDIA_SENDFILE: str = ""  # "" = lo envía Python; "x-accel" (nginx) o "x-sendfile" (Apache/lighttpd)
+    MEDIA_ACCEL_PREFIX: str = "/_static/"  # location `internal` de nginx que apunta a app/static
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
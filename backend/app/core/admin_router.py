@@ -0,0 +1,43 @@
+# app/core/admin_router.py
+from fastapi import APIRouter, Depends, Query
+from app.core.dependencies import get_current_admin_user
+from app.database import get_pool_stats
+from app.core.query_stats import endpoint_stats
+from app.core.slow_queries import slow_query_log
+from app.core.cache import get_cache_stats
+
+# Endpoints de diagnóstico. Todos requieren rol de administrador.
+router = APIRouter(
+    prefix="/_admin",
+    tags=["Admin"],
+    dependencies=[Depends(get_current_admin_user)]
+)
+
+@router.get("/pool-stats")
+def pool_stats_endpoint():
+    """
+    Estadísticas del pool de conexiones: checkouts, timeouts y tiempos de espera.
+    """
+    return get_pool_stats()
+
+@router.get("/query-stats")
+def query_stats_endpoint():
+    """
+    Consultas SQL por endpoint desde el arranque (media, máximo, tiempo y peticiones con N+1).
+    """
+    return endpoint_stats.snapshot()
+
+@router.get("/slow-queries")
+def slow_queries_endpoint(limit: int = Query(20, ge=1, le=200)):
+    """
+    Las N formas de consulta más lentas desde el arranque, con parámetros, ruta,
+    método de servicio y el último plan capturado.
+    """
+    return slow_query_log.top(limit)
+
+@router.get("/cache-stats")
+def cache_stats_endpoint():
+    """
+    Aciertos, fallos, expulsiones e invalidaciones de cada caché de entidades.
+    """
+    return get_cache_stats()
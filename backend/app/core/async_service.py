@@ -0,0 +1,51 @@
+# app/core/async_service.py
+from functools import lru_cache
+from typing import Any, Callable
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+
+@lru_cache(maxsize=None)
+def _type_adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+class AsyncServiceAdapter:
+    """
+    Expone un servicio síncrono (ProductService, CategoriaService, ...) a endpoints `async`.
+
+    - Con AsyncSession, el código del servicio se ejecuta con `run_sync` (greenlet),
+      sin bloquear el event loop y sin ocupar el threadpool.
+    - Con Session normal (DB_ASYNC=false), se ejecuta en el threadpool.
+
+    Los métodos del servicio se llaman igual que siempre, pero con `await`:
+        producto = await product_service.get_product_by_id(1)
+    """
+
+    def __init__(self, service_cls: Callable[[Session], Any], db: AsyncSession | Session):
+        self.service_cls = service_cls
+        self.db = db
+
+    async def run(self, fn: Callable[[Any], Any]) -> Any:
+        """Ejecuta `fn(servicio)` fuera del event loop y devuelve su resultado."""
+        if isinstance(self.db, AsyncSession):
+            return await self.db.run_sync(lambda session: fn(self.service_cls(session)))
+        return await run_in_threadpool(fn, self.service_cls(self.db))
+
+    async def fetch(self, response_model, method: str, *args, **kwargs) -> Any:
+        """
+        Llama a `method` y valida el resultado con `response_model` dentro del contexto síncrono.
+        Así las relaciones lazy se cargan ahí y no durante la serialización en el event loop.
+        """
+        adapter = _type_adapter(response_model)
+        return await self.run(
+            lambda service: adapter.validate_python(getattr(service, method)(*args, **kwargs), from_attributes=True)
+        )
+
+    def __getattr__(self, name: str):
+        async def call(*args, **kwargs):
+            return await self.run(lambda service: getattr(service, name)(*args, **kwargs))
+        return call
@@ -0,0 +1,156 @@
+# app/core/cache.py
+"""
+Caché en proceso LRU + TTL para datos de catálogo que cambian poco.
+
+Guarda datos planos (esquemas Pydantic, dataclasses), nunca objetos ORM: estos
+pertenecen a una sesión y no se pueden compartir entre peticiones. Los servicios
+invalidan explícitamente tras cada commit que modifica los datos; el TTL acota
+lo que puede tardar en verse un cambio hecho por otro proceso.
+
+Un lector que cargó el valor antes de una escritura no debe guardarlo después de
+la invalidación (quedaría el dato viejo durante todo el TTL). Cada invalidación
+sube una generación: quien va a cargar pide antes `token()` y lo pasa a `set()`,
+que descarta el valor si la clave se invalidó después (`get_or_load` ya lo hace).
+
+Con réplicas de lectura, además, una réplica con retraso podría volver a llenar
+la caché con el valor anterior justo después de invalidar. Por eso, durante
+DB_READ_YOUR_WRITES_SECONDS tras invalidar una clave no se aceptan valores nuevos.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from app.config import settings
+
+_MISSING = object()
+
+# Registro de cachés por nombre (ver GET /_admin/cache-stats)
+caches: dict[str, "LRUTTLCache"] = {}
+
+
+class LRUTTLCache:
+    def __init__(self, name: str, maxsize: Optional[int] = None, ttl: Optional[float] = None):
+        self.name = name
+        self.maxsize = maxsize or settings.CACHE_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else settings.CACHE_TTL_SECONDS
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._holdoff = settings.DB_READ_YOUR_WRITES_SECONDS if settings.DATABASE_REPLICA_URLS else 0.0
+        self._fences: dict[Hashable, float] = {}  # clave -> no cachear hasta
+        self._fence_all = 0.0
+        self._generation = 0
+        self._invalidated_at: dict[Hashable, int] = {}  # clave -> generación de su última invalidación
+        self._cleared_at = 0  # generación del último clear()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+        caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if not settings.CACHE_ENABLED:
+            return default
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def token(self) -> int:
+        """Generación actual: pedirla antes de leer el valor de la BD y pasarla a `set()`."""
+        with self._lock:
+            return self._generation
+
+    def set(self, key: Hashable, value: Any, token: Optional[int] = None) -> None:
+        """Guarda `value`; con `token`, solo si la clave no se invalidó desde que se pidió."""
+        if not settings.CACHE_ENABLED:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if token is not None and (self._cleared_at > token or self._invalidated_at.get(key, 0) > token):
+                return
+            if now < self._fence_all or now < self._fences.get(key, 0.0):
+                return
+            self._data[key] = (now + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Valor cacheado o `loader()`; los `None` (no encontrado) no se guardan."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            token = self.token()
+            value = loader()
+            if value is not None:
+                self.set(key, value, token)
+        return value
+
+    def _fence(self, key: Hashable) -> None:
+        self._generation += 1
+        if len(self._invalidated_at) > self.maxsize:
+            # Acotado: olvidar las claves equivale a un clear() para los lectores en curso
+            self._invalidated_at = {}
+            self._cleared_at = self._generation
+        self._invalidated_at[key] = self._generation
+        if not self._holdoff:
+            return
+        now = time.monotonic()
+        if len(self._fences) > self.maxsize:
+            self._fences = {k: until for k, until in self._fences.items() if until > now}
+        self._fences[key] = now + self._holdoff
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._fence(key)
+                if self._data.pop(key, _MISSING) is not _MISSING:
+                    self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        with self._lock:
+            stale = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+            # Las claves que alguien está cargando aún no están en `_data` y el predicado
+            # no las ve: se descartan todas las cargas en curso
+            self._generation += 1
+            self._cleared_at = self._generation
+            for key in stale:
+                self._fence(key)
+                del self._data[key]
+            self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+            self._generation += 1
+            self._cleared_at = self._generation
+            self._invalidated_at = {}
+            self._fence_all = time.monotonic() + self._holdoff
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def get_cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -0,0 +1,117 @@
+# app/core/catalog_events.py
+"""
+Notificación de cambios del catálogo tras cada commit.
+
+Los módulos registran qué modelos forman parte del catálogo (`track`) y qué hacer
+con los cambios (`subscribe`). Los cambios se recogen en `after_flush` de
+cualquier Session (incluidas las AsyncSession) y solo se notifican si la
+transacción se confirma; un rollback los descarta.
+
+Cada notificación es un `CatalogChange`: los ids de producto afectados y si cambió
+algo más que atributos "volátiles" (el stock), es decir, los metadatos que
+guardan las cachés.
+
+Las escrituras que no pasan por el ORM (UPDATE masivos, SQL directo) deben
+llamar a `mark_dirty(session, ids)` antes del commit.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_IDS_KEY = "catalog_dirty_ids"
+_METADATA_KEY = "catalog_metadata_changed"
+
+
+@dataclass(frozen=True)
+class CatalogChange:
+    ids: frozenset  # ids de producto afectados (vacío si solo cambiaron categorías/proveedores)
+    metadata: bool  # False si solo cambiaron atributos volátiles (stock)
+
+
+@dataclass(frozen=True)
+class _Tracker:
+    keys: Callable[[object], Iterable[int]]
+    volatile: frozenset
+
+
+# modelo -> cómo obtener los ids de producto afectados y qué atributos son volátiles
+_trackers: dict[type, _Tracker] = {}
+_subscribers: list[Callable[[CatalogChange], None]] = []
+
+
+def track(model: type, keys: Callable[[object], Iterable[int]] = lambda obj: (), volatile: Iterable[str] = ()) -> None:
+    _trackers[model] = _Tracker(keys, frozenset(volatile))
+
+
+def subscribe(callback: Callable[[CatalogChange], None]) -> None:
+    """`callback(change)` se llama tras cada commit que cambió el catálogo."""
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+
+def mark_dirty(session: Session, ids: Iterable[int] = (), metadata: bool = True) -> None:
+    session.info.setdefault(_IDS_KEY, set()).update(i for i in ids if i is not None)
+    if metadata:
+        session.info[_METADATA_KEY] = True
+
+
+def dirty_ids(session: Session) -> frozenset:
+    """Productos afectados en la transacción en curso (aún sin confirmar)."""
+    return frozenset(session.info.get(_IDS_KEY, ()))
+
+
+def pending_change(session: Session) -> Optional[CatalogChange]:
+    """El cambio que se notificará si la transacción en curso se confirma (None si no cambió nada)."""
+    ids = session.info.get(_IDS_KEY)
+    metadata = session.info.get(_METADATA_KEY, False)
+    if ids is None and not metadata:
+        return None
+    return CatalogChange(frozenset(ids or ()), metadata)
+
+
+def _changes_metadata(obj, volatile: frozenset) -> bool:
+    state = sa.inspect(obj)
+    return any(
+        attr.history.has_changes() for attr in state.attrs if attr.key not in volatile
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session, flush_context):
+    if not _trackers:
+        return
+    for objects, created_or_deleted in ((session.new, True), (session.dirty, False), (session.deleted, True)):
+        for obj in objects:
+            tracker = _trackers.get(type(obj))
+            if tracker is None:
+                continue
+            if created_or_deleted:
+                mark_dirty(session, tracker.keys(obj))
+            elif session.is_modified(obj):  # `dirty` incluye objetos sin cambios netos
+                mark_dirty(session, tracker.keys(obj), metadata=_changes_metadata(obj, tracker.volatile))
+
+
+@event.listens_for(Session, "after_commit")
+def _notify(session):
+    ids = session.info.pop(_IDS_KEY, None)
+    metadata = session.info.pop(_METADATA_KEY, False)
+    if ids is None and not metadata:
+        return
+    change = CatalogChange(frozenset(ids or ()), metadata)
+    for callback in _subscribers:
+        try:
+            callback(change)
+        except Exception:
+            logger.exception("Error notificando cambios del catálogo")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(_IDS_KEY, None)
+    session.info.pop(_METADATA_KEY, None)
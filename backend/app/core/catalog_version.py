@@ -0,0 +1,150 @@
+# app/core/catalog_version.py
+"""
+Versión global del catálogo (tabla `catalog_version`, una sola fila).
+
+- `version` sube con cualquier cambio de productos, variantes, categorías o
+  proveedores, incluido el stock: es la base de los ETag (app/core/http_cache.py).
+- `metadata_version` sube solo si cambió algo distinto del stock: es lo que
+  invalida las cachés de entidades.
+
+Se incrementa en `before_commit`, dentro de la misma transacción que el cambio
+(ver app/core/catalog_events.py): la versión y los datos se confirman juntos, o
+ninguno, y sin otra conexión ni I/O tras el commit. El UPDATE bloquea la fila
+hasta el commit, así que las escrituras de catálogo se serializan en ese punto.
+Cada proceso guarda la versión en memoria y la relee como mucho cada
+CATALOG_VERSION_POLL_SECONDS; si otro proceso la cambió, avisa a los listeners
+registrados con `on_remote_change` (cachés e índice en memoria).
+"""
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+import sqlalchemy as sa
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import catalog_events
+from app.database import Base
+
+logger = logging.getLogger(__name__)
+
+catalog_version_table = sa.Table(
+    "catalog_version",
+    Base.metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("version", sa.BigInteger, nullable=False, server_default="1"),
+    sa.Column("metadata_version", sa.BigInteger, nullable=False, server_default="1"),
+)
+
+_ROW = catalog_version_table.c.id == 1
+_BUMPED_KEY = "catalog_version_bumped"
+
+
+def _engine():
+    from app.database import engine
+    return engine
+
+
+class CatalogVersion:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version: Optional[int] = None
+        self.metadata_version: Optional[int] = None
+        self._checked_at = 0.0
+        self._changed_at: Optional[float] = None  # cuándo vio este proceso subir la versión
+        self._listeners: list[tuple[Callable[[], None], bool]] = []
+        self._warned = False
+
+    def on_remote_change(self, callback: Callable[[], None], metadata_only: bool = False) -> None:
+        """`callback()` cuando otro proceso cambió el catálogo (`metadata_only`: sin contar el stock)."""
+        self._listeners.append((callback, metadata_only))
+
+    def current(self) -> Optional[int]:
+        """Versión actual (None si la tabla no existe todavía)."""
+        if self.version is None or time.monotonic() - self._checked_at >= settings.CATALOG_VERSION_POLL_SECONDS:
+            self._refresh()
+        return self.version
+
+    def changed_within(self, seconds: float) -> bool:
+        """Si la versión subió hace menos de `seconds` (visto desde este proceso, que lo ve tarde, nunca antes)."""
+        changed_at = self._changed_at
+        return changed_at is not None and time.monotonic() - changed_at < seconds
+
+    def _refresh(self) -> None:
+        try:
+            with _engine().connect() as conn:
+                row = conn.execute(sa.select(
+                    catalog_version_table.c.version, catalog_version_table.c.metadata_version
+                ).where(_ROW)).first()
+        except exc.DBAPIError as e:
+            if not self._warned:
+                logger.warning(f"No se pudo leer catalog_version (¿migraciones pendientes?): {e}")
+                self._warned = True
+            return
+        if row is not None:
+            self._apply(row.version, row.metadata_version, bumped=None)
+
+    def bump(self, session: Session, change: catalog_events.CatalogChange) -> None:
+        """Incrementa la versión en la transacción de `session`; se aplica en memoria tras el commit."""
+        table = catalog_version_table
+        row = session.execute(
+            sa.update(table).where(_ROW).values(
+                version=table.c.version + 1,
+                metadata_version=table.c.metadata_version + (1 if change.metadata else 0),
+            ).returning(table.c.version, table.c.metadata_version)
+        ).first()
+        if row is not None:
+            session.info[_BUMPED_KEY] = (row.version, row.metadata_version, change)
+
+    def _apply(self, version: int, metadata_version: int, bumped: Optional[catalog_events.CatalogChange]) -> None:
+        with self._lock:
+            old_version, old_metadata = self.version, self.metadata_version
+            if old_version is not None and version < old_version:
+                return  # lectura más antigua que un incremento propio ya aplicado
+            self.version, self.metadata_version = version, metadata_version
+            self._checked_at = time.monotonic()
+            if old_version is not None and version > old_version:
+                self._changed_at = self._checked_at
+        if old_version is None:
+            return
+        # Lo que supere a nuestro propio incremento lo hizo otro proceso
+        expected_version = old_version + (1 if bumped else 0)
+        expected_metadata = old_metadata + (1 if bumped and bumped.metadata else 0)
+        if version <= expected_version:
+            return
+        remote_metadata = metadata_version > expected_metadata
+        for callback, metadata_only in self._listeners:
+            if metadata_only and not remote_metadata:
+                continue
+            try:
+                callback()
+            except Exception:
+                logger.exception("Error en listener de catalog_version")
+
+
+catalog_version = CatalogVersion()
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_before_commit(session):
+    # El flush del commit llega después de este evento: se adelanta para que los
+    # cambios pendientes ya estén marcados
+    session.flush()
+    change = catalog_events.pending_change(session)
+    if change is not None:
+        catalog_version.bump(session, change)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session):
+    bumped = session.info.pop(_BUMPED_KEY, None)
+    if bumped is not None:
+        version, metadata_version, change = bumped
+        catalog_version._apply(version, metadata_version, bumped=change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop(_BUMPED_KEY, None)
@@ -0,0 +1,129 @@
+# app/core/db_routing.py
+"""
+Enrutado de sesiones: las lecturas (GET de catálogo y reportes) van a una réplica,
+las escrituras siempre al primario.
+
+Read-your-writes: después de una escritura exitosa (POST/PUT/PATCH/DELETE), el mismo
+cliente lee del primario durante DB_READ_YOUR_WRITES_SECONDS para no ver datos atrasados
+de la réplica (p. ej. justo después de `create_sale`). El cliente se identifica por la
+cookie `db_primary_until` y, dentro del mismo proceso, por su token o IP.
+
+Una dependencia que se resuelva antes que la sesión puede forzar el primario para
+la petición con `request.state.db_primary = True` (ver app/core/http_cache.py).
+"""
+import hashlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app import database
+
+STICKY_COOKIE = "db_primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class WriteTracker:
+    """Recuerda qué clientes escribieron recientemente (acotado a `max_clients`)."""
+
+    def __init__(self, window: float, max_clients: int = 10_000):
+        self.window = window
+        self.max_clients = max_clients
+        self._last_write: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, key: str) -> None:
+        with self._lock:
+            self._last_write[key] = time.monotonic()
+            self._last_write.move_to_end(key)
+            while len(self._last_write) > self.max_clients:
+                self._last_write.popitem(last=False)
+
+    def recently_wrote(self, key: str) -> bool:
+        with self._lock:
+            last = self._last_write.get(key)
+        return last is not None and time.monotonic() - last < self.window
+
+
+write_tracker = WriteTracker(settings.DB_READ_YOUR_WRITES_SECONDS)
+
+# Round-robin entre réplicas
+_replica_cycle = itertools.cycle(range(len(database.ReplicaSessionLocals))) if database.ReplicaSessionLocals else None
+_cycle_lock = threading.Lock()
+
+
+def _next_replica_index() -> int:
+    with _cycle_lock:
+        return next(_replica_cycle)
+
+
+def client_key(request: Request) -> str:
+    """Identificador del cliente: su token si viene autenticado, si no su IP."""
+    raw = request.headers.get("authorization") or (request.client.host if request.client else "anon")
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def use_primary_for_reads(request: Request) -> bool:
+    if not database.REPLICA_URLS:
+        return True
+    if getattr(request.state, "db_primary", False):
+        return True
+    sticky_until = request.cookies.get(STICKY_COOKIE)
+    try:
+        if sticky_until and float(sticky_until) > time.time():
+            return True
+    except ValueError:
+        pass
+    return write_tracker.recently_wrote(client_key(request))
+
+
+async def track_writes_middleware(request: Request, call_next):
+    """Marca al cliente tras una escritura exitosa para aplicar read-your-writes."""
+    response = await call_next(request)
+    if database.REPLICA_URLS and request.method not in SAFE_METHODS and response.status_code < 400:
+        write_tracker.mark(client_key(request))
+        window = settings.DB_READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            STICKY_COOKIE,
+            str(time.time() + window),
+            max_age=max(1, int(window + 0.999)),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
+def get_read_db(request: Request):
+    """Como `get_db`, pero enruta a una réplica salvo que aplique read-your-writes."""
+    if use_primary_for_reads(request):
+        db = database.SessionLocal()
+    else:
+        db = database.ReplicaSessionLocals[_next_replica_index()]()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """Versión de `get_read_db` para endpoints `async` (ver `get_async_db`)."""
+    if database.AsyncSessionLocal is None:
+        if use_primary_for_reads(request):
+            db = database.SessionLocal()
+        else:
+            db = database.ReplicaSessionLocals[_next_replica_index()]()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+    if use_primary_for_reads(request):
+        session_factory = database.AsyncSessionLocal
+    else:
+        session_factory = database.AsyncReplicaSessionLocals[_next_replica_index()]
+    async with session_factory() as db:
+        yield db
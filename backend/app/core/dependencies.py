@@ -2,7 +2,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError
-from app.database import get_db
+from app.database import get_db, get_async_db
+from app.core.async_service import AsyncServiceAdapter
 from app.modules.users.user_service import UserService
 from app.modules.auth.auth_service import AuthService
 from app.modules.auth import auth_schema as auth_schemas
@@ -21,6 +22,14 @@ def get_user_service_dependency(db: Session = Depends(get_db)) -> UserService:
     """
     return UserService(db)
 
+# --- Versión async del UserService (no bloquea el event loop) ---
+def get_user_service_async(db = Depends(get_async_db)) -> AsyncServiceAdapter:
+    """
+    UserService para dependencias `async` como `get_current_user`.
+    Con DB_ASYNC=true usa AsyncSession; si no, ejecuta las consultas en el threadpool.
+    """
+    return AsyncServiceAdapter(UserService, db)
+
 # --- Dependencia para obtener el AuthService ---
 def get_auth_service_dependency(
     user_service: UserService = Depends(get_user_service_dependency)
@@ -34,7 +43,7 @@ def get_auth_service_dependency(
 # --- Dependencias para obtener el usuario actual y validar roles ---
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    user_service: UserService = Depends(get_user_service_dependency)
+    user_service: AsyncServiceAdapter = Depends(get_user_service_async)
 ) -> user_models.User:
     """
     Dependencia que verifica un token JWT y retorna el usuario asociado.
@@ -62,7 +71,7 @@ async def get_current_user(
         )
     
     # Asegurarse de que el usuario aún existe y está activo en la DB
-    user = user_service.get_user_by_email(token_data.email)
+    user = await user_service.get_user_by_email(token_data.email)
     if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,205 @@
+# app/core/fast_json.py
+"""
+Vía rápida de serialización para listas grandes (FAST_JSON_ENABLED).
+
+FastAPI valida cada objeto ORM contra el `response_model` y después lo vuelve a
+recorrer para generar el JSON. Para listados de miles de filas ese doble paso
+pesa más que la consulta. Aquí, a partir del mismo esquema de salida, se compila
+una función que lee los atributos del objeto ORM y arma el dict directamente;
+orjson lo convierte a bytes y el endpoint devuelve una `Response` ya construida.
+
+Los esquemas se tratan como de confianza: los datos se validaron al escribirse,
+así que no se revalidan. La salida es idéntica byte a byte a la de la vía
+normal; si aparece un valor que orjson escribiría distinto (floats en notación
+exponencial, NaN, zonas horarias con segundos) se devuelve la lista tal cual y
+FastAPI la serializa como siempre.
+
+    return fast_json.list_response(schemas.ProductResponse, products, response)
+"""
+import enum
+import json
+import logging
+import types
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Union, get_args, get_origin
+
+from fastapi import Response
+from pydantic import BaseModel, EmailStr
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:  # sin orjson se usa siempre la vía normal
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class _Fallback(Exception):
+    """Valor que orjson no escribiría igual que FastAPI: se usa la vía normal."""
+
+
+def _float(value):
+    value = float(value)  # Decimal (Numeric) -> float, como hace la validación
+    # Fuera de este rango orjson y json.dumps/pydantic usan notaciones distintas (1e16 vs 1e+16)
+    if value != 0.0 and not 1e-4 <= abs(value) < 1e16:
+        raise _Fallback
+    return value
+
+
+def _isoformat(value: datetime) -> str:
+    text = value.isoformat()
+    # pydantic escribe UTC como "Z"
+    return text[:-6] + "Z" if value.utcoffset() == timedelta(0) else text
+
+
+def _datetime(value: datetime):
+    offset = value.utcoffset()
+    if offset is not None and offset % timedelta(minutes=1):
+        raise _Fallback
+    return _isoformat(value)
+
+
+def _enum(value):
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def _optional(convert: Callable) -> Callable:
+    return lambda value: None if value is None else convert(value)
+
+
+def _list_of(convert: Optional[Callable]) -> Callable:
+    if convert is None:
+        return list
+    return lambda values: [convert(value) for value in values]
+
+
+def _dict_of(convert: Optional[Callable]) -> Callable:
+    if convert is None:
+        return dict
+    return lambda values: {key: convert(value) for key, value in values.items()}
+
+
+def _converter(annotation) -> Optional[Callable]:
+    """Conversión de un valor del objeto ORM al valor JSON; None = se usa tal cual."""
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            raise TypeError(f"Unión no soportada por la vía rápida: {annotation!r}")
+        convert = _converter(args[0])
+        return _optional(convert) if convert is not None else None
+    if origin in (list, List):
+        return _list_of(_converter(get_args(annotation)[0]))
+    if origin in (dict, Dict):
+        key, value = get_args(annotation)
+        if key is not str:
+            raise TypeError(f"Claves no soportadas por la vía rápida: {annotation!r}")
+        return _dict_of(_converter(value))
+    if annotation in (int, str, bool) or annotation is EmailStr:
+        return None
+    if annotation is float:
+        return _float
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return compile_serializer(annotation)
+        if issubclass(annotation, enum.Enum):
+            return _enum
+        if issubclass(annotation, datetime):
+            return _datetime
+    raise TypeError(f"Tipo no soportado por la vía rápida: {annotation!r}")
+
+
+_compiled: dict[type, Callable[[Any], dict]] = {}
+
+
+def compile_serializer(model: type[BaseModel]) -> Callable[[Any], dict]:
+    """
+    Función objeto -> dict equivalente a `model.model_validate(obj).model_dump(mode="json")`
+    para esquemas simples (sin alias, validadores de salida ni campos calculados).
+    """
+    serializer = _compiled.get(model)
+    if serializer is not None:
+        return serializer
+
+    decorators = model.__pydantic_decorators__
+    if decorators.field_serializers or decorators.model_serializers or model.model_computed_fields:
+        raise TypeError(f"{model.__name__} personaliza su serialización; no admite la vía rápida")
+    fields = []
+    for name, field in model.model_fields.items():
+        if field.alias or field.serialization_alias:
+            raise TypeError(f"{model.__name__}.{name} usa alias; no admite la vía rápida")
+        required = field.is_required()
+        default = None if required else field.get_default(call_default_factory=True)
+        fields.append((name, _converter(field.annotation), required, default))
+
+    def serialize(obj) -> dict:
+        data = {}
+        for name, convert, required, default in fields:
+            value = getattr(obj, name) if required else getattr(obj, name, default)
+            data[name] = value if convert is None else convert(value)
+        return data
+
+    _compiled[model] = serialize
+    return serialize
+
+
+def dumps_list(model: type[BaseModel], items) -> Optional[bytes]:
+    """JSON de `List[model]` con orjson, o None si hay que usar la vía normal."""
+    serialize = compile_serializer(model)
+    try:
+        return orjson.dumps([serialize(item) for item in items])
+    except _Fallback:
+        return None
+
+
+def to_json_value(value):
+    """Valor de una columna ORM -> valor JSON con el mismo formato que la vía normal."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return _isoformat(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _response(body: bytes, response: Optional[Response]) -> Response:
+    result = Response(content=body, media_type="application/json")
+    if response is not None:
+        if response.status_code:
+            result.status_code = response.status_code
+        result.headers.raw.extend(response.headers.raw)
+    return result
+
+
+def json_response(content, response: Optional[Response] = None) -> Response:
+    """
+    `Response` con `content` (dicts/listas de valores JSON, ver `to_json_value`)
+    ya serializado; con orjson si está instalado. Copia las cabeceras de `response`.
+    """
+    if orjson is not None:
+        body = orjson.dumps(content)
+    else:
+        body = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    return _response(body, response)
+
+
+def list_response(model: type[BaseModel], items, response: Optional[Response] = None):
+    """
+    Con FAST_JSON_ENABLED devuelve una `Response` con el JSON ya generado; si no
+    (o si algún valor exige la vía normal) devuelve `items` para que FastAPI los
+    valide y serialice con el `response_model` del endpoint.
+    `response` es la que inyecta FastAPI: sus cabeceras se copian a la nueva.
+    """
+    if not settings.FAST_JSON_ENABLED or orjson is None:
+        return items
+    body = dumps_list(model, items)
+    if body is None:
+        logger.debug(f"Vía rápida descartada para {model.__name__}: valor no representable igual con orjson")
+        return items
+    return _response(body, response)
@@ -0,0 +1,54 @@
+# app/core/http_cache.py
+"""
+ETag débil + Cache-Control para las lecturas de catálogo.
+
+El ETag se deriva de la versión del catálogo (app/core/catalog_version.py) y de la
+URL (ruta + query), así que comprobar If-None-Match no necesita la base de datos
+ni serializar nada. Se usa como dependencia de ruta, que FastAPI resuelve antes
+que las del endpoint (sesión, servicio):
+
+    @router.get("/", dependencies=[catalog_cache("products")])
+
+La política de Cache-Control de cada grupo de rutas se configura en
+HTTP_CACHE_CONTROL (JSON en el entorno).
+
+Con réplicas, el cuerpo podría salir de una réplica que aún no tiene el último
+cambio y quedar etiquetado con la versión nueva (y validarse con 304 hasta el
+siguiente cambio). Por eso, durante DB_READ_YOUR_WRITES_SECONDS tras cada
+subida de versión, estas lecturas van al primario (app/core/db_routing.py).
+"""
+import zlib
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from app.config import settings
+from app.core.catalog_version import catalog_version
+from app import database
+
+
+def _etag(request: Request, version: int) -> str:
+    url = request.url.path + "?" + "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    return f'W/"{version}-{zlib.crc32(url.encode()):08x}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def catalog_cache(policy: str):
+    def dependency(request: Request, response: Response):
+        headers = {"Cache-Control": settings.HTTP_CACHE_CONTROL.get(policy, "no-cache")}
+        version = catalog_version.current()
+        if database.REPLICA_URLS and catalog_version.changed_within(settings.DB_READ_YOUR_WRITES_SECONDS):
+            request.state.db_primary = True  # el ETag de la versión nueva solo con datos del primario
+        if version is not None:
+            headers["ETag"] = _etag(request, version)
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and _matches(if_none_match, headers["ETag"]):
+                raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    return Depends(dependency)
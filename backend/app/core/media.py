@@ -0,0 +1,214 @@
+# app/core/media.py
+"""
+`MediaFiles`: StaticFiles para /static con cabeceras pensadas para imágenes.
+
+- Cache-Control: los archivos con nombre por contenido (SHA-256, ver
+  `_store_upload`) y los derivados `<hash>-<ancho>-<ajustes>.webp` (con la huella
+  de la codificación en el nombre, ver product_images.py) nunca cambian, así que
+  se cachean un año con `immutable`; el resto, incluidos los derivados antiguos
+  sin huella, revalida (MEDIA_CACHE_CONTROL).
+- ETag fuerte: el propio hash del nombre o, si no lo hay, el SHA-256 del
+  contenido, calculado una vez por (ruta, mtime, tamaño) fuera del event loop.
+  Con él funcionan If-None-Match (304) e If-Range; los Range los sirve FileResponse.
+- Precomprimidos: si el cliente acepta br/gzip y existe `<archivo>.br`/`.gz`
+  (SVG, JSON, CSS...), se sirve ese con Content-Encoding. Se generan con
+  `python -m app.core.media compress`.
+- Detrás de un nginx/Apache local, con MEDIA_SENDFILE el envío se delega con
+  X-Accel-Redirect / X-Sendfile: Python solo decide cabeceras y 304.
+
+    location /_static/ { internal; alias /ruta/a/backend/app/static/; gzip_static on; }
+"""
+import argparse
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.config import settings
+from app.core.cache import LRUTTLCache
+
+try:
+    import brotli
+except ImportError:  # sin brotli solo se generan/sirven .gz
+    brotli = None
+
+# <sha256>.<ext> y los derivados <sha256>-<ancho>-<huella de ajustes>.<ext>
+_HASHED_NAME = re.compile(r"^(?P<hash>[0-9a-f]{64})(?:-\d+-[0-9a-f]{8})?\.[0-9a-z]+$")
+# Tipos que merece la pena comprimir (las imágenes rasterizadas ya van comprimidas)
+COMPRESSIBLE_SUFFIXES = {".svg", ".json", ".css", ".js", ".html", ".txt", ".xml", ".csv", ".map"}
+# Preferencia del servidor, de mejor a peor
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_etags = LRUTTLCache("media_etags", ttl=24 * 3600)
+
+
+@dataclass(frozen=True)
+class _MediaFile:
+    full_path: str  # archivo pedido
+    send_path: str  # archivo que se envía (el pedido o su precomprimido)
+    stat_result: os.stat_result
+    etag: str
+    immutable: bool
+    compressible: bool
+    encoding: Optional[str] = None
+
+
+def _content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        params = params.strip().replace(" ", "")
+        if params.startswith("q=") and params[2:] in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class MediaFiles(StaticFiles):
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+            media = await anyio.to_thread.run_sync(self._lookup_media, path, accept_encoding)
+            if media is not None:
+                return self._media_response(media, scope)
+        # Directorios, 404, 405, rutas inválidas...: como StaticFiles
+        return await super().get_response(path, scope)
+
+    def _lookup_media(self, path: str, accept_encoding: str) -> Optional[_MediaFile]:
+        """Bloqueante (stat, hash): se ejecuta en un hilo."""
+        try:
+            full_path, stat_result = self.lookup_path(path)
+        except (OSError, ValueError):
+            return None
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return None
+
+        name = os.path.basename(full_path)
+        hashed = _HASHED_NAME.match(name)
+        # El derivado <hash>-<ancho>-<ajustes> no es el hash de sus propios bytes: se calcula
+        if hashed and "-" not in name:
+            content_hash = hashed["hash"]
+        else:
+            key = (full_path, stat_result.st_mtime_ns, stat_result.st_size)
+            content_hash = _etags.get(key)
+            if content_hash is None:
+                content_hash = _content_hash(full_path)
+                _etags.set(key, content_hash)
+
+        compressible = os.path.splitext(name)[1].lower() in COMPRESSIBLE_SUFFIXES
+        media = _MediaFile(full_path, full_path, stat_result, f'"{content_hash}"', bool(hashed), compressible)
+        if compressible and not settings.MEDIA_SENDFILE and accept_encoding:
+            accepted = _accepted_encodings(accept_encoding)
+            for encoding, suffix in _ENCODINGS:
+                if encoding not in accepted:
+                    continue
+                try:
+                    encoded_stat = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                # Un precomprimido más viejo que el original no se usa
+                if encoded_stat.st_mtime_ns >= stat_result.st_mtime_ns:
+                    return _MediaFile(full_path, full_path + suffix, encoded_stat, f'"{content_hash}-{encoding}"',
+                                      media.immutable, True, encoding)
+        return media
+
+    def _media_response(self, media: _MediaFile, scope: Scope) -> Response:
+        media_type = mimetypes.guess_type(media.full_path)[0] or "application/octet-stream"
+        if media.send_path == media.full_path:
+            response = FileResponse(media.full_path, stat_result=media.stat_result, media_type=media_type)
+        else:
+            response = FileResponse(media.send_path, stat_result=media.stat_result, media_type=media_type)
+            response.headers["content-encoding"] = media.encoding
+        response.headers["etag"] = media.etag
+        response.headers["cache-control"] = (
+            settings.MEDIA_IMMUTABLE_CACHE_CONTROL if media.immutable else settings.MEDIA_CACHE_CONTROL
+        )
+        if media.compressible:
+            response.headers["vary"] = "Accept-Encoding"
+
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        if settings.MEDIA_SENDFILE:
+            return self._delegate(media, response)
+        return response
+
+    def _delegate(self, media: _MediaFile, response: FileResponse) -> Response:
+        """El servidor web envía el archivo (sendfile, Range); aquí solo van las cabeceras."""
+        headers = {
+            name: response.headers[name]
+            for name in ("content-type", "cache-control", "etag", "last-modified", "vary")
+            if name in response.headers
+        }
+        if settings.MEDIA_SENDFILE == "x-accel":
+            relative = os.path.relpath(media.full_path, self.directory)
+            headers["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX.rstrip("/") + "/" + quote(relative.replace(os.sep, "/"))
+        else:
+            headers["X-Sendfile"] = media.full_path
+        return Response(status_code=200, headers=headers)
+
+
+# --- CLI: precomprimir ---
+def compress(directory: Path, force: bool = False) -> None:
+    """Genera `.gz` (y `.br` con brotli instalado) junto a cada archivo comprimible."""
+    written = skipped = 0
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+            continue
+        data = None
+        for suffix, encode in ((".gz", lambda raw: gzip.compress(raw, compresslevel=9, mtime=0)),
+                               (".br", brotli.compress if brotli is not None else None)):
+            if encode is None:
+                continue
+            target = path.with_name(path.name + suffix)
+            if not force and target.exists() and target.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+                skipped += 1
+                continue
+            data = data if data is not None else path.read_bytes()
+            encoded = encode(data)
+            if len(encoded) >= len(data):
+                continue  # no compensa
+            tmp = target.with_name(f".{target.name}.part")
+            tmp.write_bytes(encoded)
+            os.replace(tmp, target)
+            written += 1
+            print(f"  {target.relative_to(directory)} ({len(data)} -> {len(encoded)} bytes)")
+    print(f"{written} precomprimidos escritos, {skipped} al día" + ("" if brotli else " (sin brotli: solo .gz)"))
+
+
+def main() -> int:
+    default_directory = Path(__file__).resolve().parent.parent / "static"
+    parser = argparse.ArgumentParser(prog="python -m app.core.media", description="Archivos de /static")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compress_parser = sub.add_parser("compress", help="Genera las versiones .gz/.br de SVG, JSON, CSS...")
+    compress_parser.add_argument("--directory", type=Path, default=default_directory)
+    compress_parser.add_argument("--force", action="store_true", help="Regenerar aunque estén al día")
+    args = parser.parse_args()
+
+    if args.command == "compress":
+        compress(args.directory, force=args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
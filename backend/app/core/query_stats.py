@@ -0,0 +1,171 @@
+# app/core/query_stats.py
+"""
+Instrumentación de SQL por petición, basada en eventos de SQLAlchemy.
+
+Para cada petición cuenta las sentencias y el tiempo total en base de datos, y agrupa
+las sentencias por "forma" (el SQL con placeholders). Si la misma forma se repite
+DB_NPLUSONE_THRESHOLD veces en una petición, se marca como posible N+1 (típicamente
+una relación lazy recorrida durante la serialización). Con DB_NPLUSONE_RAISE=true se
+lanza `NPlusOneError` en ese momento, útil en desarrollo y tests.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.core.slow_queries import slow_query_log
+
+logger = logging.getLogger(__name__)
+
+
+class NPlusOneError(RuntimeError):
+    """Se repitió la misma consulta demasiadas veces dentro de una petición."""
+
+
+# Listas expandidas de IN (`IN (?, ?, ?)`, `IN (%(id_1)s, ...)`) cuentan como una sola forma
+_IN_LIST_RE = re.compile(r"IN \((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+_shape_cache: dict[str, str] = {}
+
+
+def statement_shape(statement: str) -> str:
+    shape = _shape_cache.get(statement)
+    if shape is None:
+        shape = _IN_LIST_RE.sub("IN (?)", " ".join(statement.split()))
+        if len(_shape_cache) < 5000:
+            _shape_cache[statement] = shape
+    return shape
+
+
+class RequestQueryStats:
+    """Contadores de una petición."""
+
+    __slots__ = ("scope", "count", "total_time", "shapes", "suspects")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+        self.suspects: list[str] = []
+
+    def record(self, statement: str, elapsed: float) -> int:
+        self.count += 1
+        self.total_time += elapsed
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        repeats = self.shapes[shape]
+        if repeats == settings.DB_NPLUSONE_THRESHOLD:
+            self.suspects.append(shape)
+        return repeats
+
+    def endpoint(self) -> Optional[str]:
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")
+        return f"{self.scope.get('method')} {getattr(route, 'path', self.scope.get('path'))}"
+
+
+class EndpointQueryStats:
+    """Agregado por endpoint desde el arranque (para /_admin/query-stats)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: dict[str, dict] = {}
+
+    def add(self, endpoint: str, stats: RequestQueryStats) -> None:
+        with self._lock:
+            item = self._data.setdefault(endpoint, {
+                "requests": 0, "queries": 0, "max_queries": 0, "db_time_ms": 0.0, "n_plus_one": 0,
+            })
+            item["requests"] += 1
+            item["queries"] += stats.count
+            item["max_queries"] = max(item["max_queries"], stats.count)
+            item["db_time_ms"] += stats.total_time * 1000
+            if stats.suspects:
+                item["n_plus_one"] += 1
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            rows = [
+                {
+                    "endpoint": endpoint,
+                    **item,
+                    "avg_queries": round(item["queries"] / item["requests"], 2),
+                    "db_time_ms": round(item["db_time_ms"], 3),
+                }
+                for endpoint, item in self._data.items()
+            ]
+        return sorted(rows, key=lambda row: row["avg_queries"], reverse=True)
+
+
+endpoint_stats = EndpointQueryStats()
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # En el contexto de ejecución y no en conn.info: si la sentencia falla no hay
+    # after_cursor_execute y el inicio se descarta con el contexto
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    stats = _current_stats.get()
+    if (
+        settings.DB_SLOW_QUERY_MS
+        and elapsed * 1000 >= settings.DB_SLOW_QUERY_MS
+        and not statement.lstrip().upper().startswith("EXPLAIN")
+    ):
+        slow_query_log.record(
+            conn, statement_shape(statement), statement, parameters, elapsed, executemany,
+            stats.endpoint() if stats is not None else None,
+        )
+    if stats is None:
+        return
+    repeats = stats.record(statement, elapsed)
+    if repeats == settings.DB_NPLUSONE_THRESHOLD and settings.DB_NPLUSONE_RAISE:
+        raise NPlusOneError(f"Posible N+1: la consulta se repitió {repeats} veces en la petición: {statement_shape(statement)[:300]}")
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """Cuenta las consultas de la petición, las reporta en cabeceras y avisa de posibles N+1."""
+    stats = RequestQueryStats(request.scope)
+    token = _current_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_stats.reset(token)
+
+    endpoint = stats.endpoint()
+    endpoint_stats.add(endpoint, stats)
+    db_ms = stats.total_time * 1000
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    response.headers["Server-Timing"] = f'db;desc="{stats.count} queries";dur={db_ms:.2f}'
+
+    if stats.suspects:
+        worst = stats.shapes.most_common(1)[0]
+        logger.warning(
+            f"Posible N+1 en {endpoint}: {stats.count} consultas ({db_ms:.1f} ms); "
+            f"la más repetida ({worst[1]}x): {worst[0][:300]}"
+        )
+    elif stats.count > settings.DB_QUERY_COUNT_WARN:
+        logger.warning(f"{endpoint} ejecutó {stats.count} consultas ({db_ms:.1f} ms)")
+    return response
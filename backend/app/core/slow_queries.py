@@ -0,0 +1,159 @@
+# app/core/slow_queries.py
+"""
+Log de consultas lentas.
+
+Toda sentencia que supera DB_SLOW_QUERY_MS se registra con sus parámetros, la ruta
+que la originó y el método de servicio que la lanzó. Para las SELECT se captura el
+plan en un hilo aparte (no retrasa la petición):
+- PostgreSQL: EXPLAIN (ANALYZE, BUFFERS), dentro de una transacción que se descarta,
+  solo para las SELECT de solo lectura. Un rollback no deshace todo (bloqueos
+  advisory de sesión, nextval...), así que las que bloquean filas (FOR UPDATE/SHARE),
+  llaman a funciones con efectos o modifican datos en un WITH se explican sin
+  ANALYZE: plan estimado, sin volver a ejecutarlas.
+- SQLite: EXPLAIN QUERY PLAN.
+El plan de una misma forma de consulta se refresca como mucho cada
+DB_SLOW_QUERY_EXPLAIN_INTERVAL segundos, porque ANALYZE vuelve a ejecutar la consulta.
+"""
+import logging
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MAX_PARAMS_REPR = 500
+
+# Lo que hace que volver a ejecutar una SELECT tenga efectos que el rollback no deshace
+# (o que bloquee): cláusulas de bloqueo, funciones con efectos y escrituras en un WITH
+_SIDE_EFFECTS = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b"
+    r"|\b(?:pg_\w*lock\w*|nextval|setval|set_config|pg_notify|pg_sleep\w*|dblink\w*|lo_\w+)\s*\("
+    r"|\b(?:INSERT|UPDATE|DELETE|MERGE)\b",
+    re.IGNORECASE,
+)
+
+
+def _params_repr(parameters) -> str:
+    text = repr(parameters)
+    return text if len(text) <= _MAX_PARAMS_REPR else text[:_MAX_PARAMS_REPR] + "…"
+
+
+def _service_method() -> Optional[str]:
+    """Primer método de un `*_service` en la pila (p. ej. 'SaleService.get_all_sales')."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.modules.") and "service" in module.rsplit(".", 1)[-1]:
+            owner = frame.f_locals.get("self")
+            name = frame.f_code.co_name
+            return f"{type(owner).__name__}.{name}" if owner is not None else f"{module}.{name}"
+        frame = frame.f_back
+    return None
+
+
+def _is_explainable(statement: str) -> bool:
+    head = statement.lstrip()[:10].upper()
+    return head.startswith("SELECT") or head.startswith("WITH")
+
+
+def _is_read_only(statement: str) -> bool:
+    """Se puede volver a ejecutar (EXPLAIN ANALYZE) sin efectos: no bloquea ni escribe."""
+    return _is_explainable(statement) and not _SIDE_EFFECTS.search(statement)
+
+
+class SlowQueryLog:
+    """Agregado de consultas lentas por forma, desde el arranque."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    def record(self, conn, shape: str, statement: str, parameters, elapsed: float,
+               executemany: bool, endpoint: Optional[str]) -> None:
+        elapsed_ms = elapsed * 1000
+        service = _service_method()
+        params = _params_repr(parameters)
+        logger.warning(
+            f"Consulta lenta ({elapsed_ms:.1f} ms) en {endpoint or '-'} [{service or '-'}]: "
+            f"{shape[:500]} -- params: {params}"
+        )
+        now = time.time()
+        with self._lock:
+            entry = self._entries.setdefault(shape, {
+                "statement": shape, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "endpoints": set(), "services": set(), "plan": None, "plan_captured_at": None,
+                "_explain_requested_at": 0.0,
+            })
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            if elapsed_ms >= entry["max_ms"]:
+                entry["max_ms"] = elapsed_ms
+                entry["params"] = params
+            entry["last_ms"] = elapsed_ms
+            if endpoint and len(entry["endpoints"]) < 20:
+                entry["endpoints"].add(endpoint)
+            if service and len(entry["services"]) < 20:
+                entry["services"].add(service)
+            want_plan = (
+                settings.DB_SLOW_QUERY_EXPLAIN
+                and not executemany
+                and not conn.dialect.is_async
+                and _is_explainable(statement)
+                and now - entry["_explain_requested_at"] >= settings.DB_SLOW_QUERY_EXPLAIN_INTERVAL
+            )
+            if want_plan:
+                entry["_explain_requested_at"] = now
+        if want_plan:
+            self._executor.submit(self._capture_plan, conn.engine, shape, statement, parameters)
+
+    def _capture_plan(self, engine, shape: str, statement: str, parameters) -> None:
+        dialect = engine.dialect.name
+        if dialect == "postgresql":
+            prefix = "EXPLAIN (ANALYZE, BUFFERS) " if _is_read_only(statement) else "EXPLAIN "
+        elif dialect == "sqlite":
+            prefix = "EXPLAIN QUERY PLAN "
+        else:
+            prefix = "EXPLAIN "
+        try:
+            with engine.connect() as conn:
+                rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+                conn.rollback() # ANALYZE ejecuta la consulta: no dejar nada aplicado
+        except Exception as e:
+            logger.info(f"No se pudo capturar el plan de una consulta lenta: {e}")
+            return
+        plan = "\n".join(" ".join(str(col) for col in row) for row in rows)
+        with self._lock:
+            entry = self._entries.get(shape)
+            if entry is not None:
+                entry["plan"] = plan
+                entry["plan_captured_at"] = time.time()
+        logger.info(f"Plan de consulta lenta capturado:\n{plan}")
+
+    def top(self, limit: int = 20) -> list[dict]:
+        with self._lock:
+            rows = [
+                {
+                    "statement": entry["statement"],
+                    "count": entry["count"],
+                    "max_ms": round(entry["max_ms"], 3),
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+                    "last_ms": round(entry["last_ms"], 3),
+                    "params": entry.get("params"),
+                    "endpoints": sorted(entry["endpoints"]),
+                    "services": sorted(entry["services"]),
+                    "plan": entry["plan"],
+                    "plan_captured_at": entry["plan_captured_at"],
+                }
+                for entry in self._entries.values()
+            ]
+        rows.sort(key=lambda row: row["max_ms"], reverse=True)
+        return rows[:limit]
+
+
+slow_query_log = SlowQueryLog()
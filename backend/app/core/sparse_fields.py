@@ -0,0 +1,118 @@
+# app/core/sparse_fields.py
+"""
+Listados con campos a medida: `?fields=id,nombre,precio&include=categorias`.
+
+- `fields`: columnas que se devuelven; `id` va siempre.
+  Si se nombra una relación aquí, se incluye igual que con `include`.
+- `include`: relaciones a incrustar, en forma reducida (sin anidar más).
+
+Sin ninguno de los dos el endpoint responde como siempre (esquema completo).
+Con alguno, el servicio carga solo esas columnas y relaciones
+(`FieldSet.load_options()`) y el endpoint devuelve los dicts de
+`FieldSet.to_dicts()` con `fast_json.json_response`.
+
+    PRODUCT_FIELDS = FieldSetParams(Producto, columns=(...), relations={"categorias": ("name", "id")})
+
+    def endpoint(fieldset: Optional[FieldSet] = Depends(PRODUCT_FIELDS)): ...
+"""
+from typing import Dict, Optional, Sequence
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy.orm import RelationshipDirection, joinedload, load_only, selectinload
+
+from app.core.fast_json import to_json_value
+
+
+def _split(value: Optional[str]) -> list:
+    return [part.strip() for part in value.split(",") if part.strip()] if value else []
+
+
+class FieldSet:
+    """Columnas y relaciones pedidas, en el orden de declaración del recurso."""
+
+    def __init__(self, spec: "FieldSetParams", columns: Sequence[str], relations: Sequence[str]):
+        self.spec = spec
+        self.columns = tuple(columns)
+        self.relations = tuple(relations)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns or name in self.relations
+
+    def __repr__(self):
+        return f"FieldSet(columns={self.columns}, relations={self.relations})"
+
+    def load_options(self) -> tuple:
+        """
+        Opciones de carga: solo las columnas pedidas y las relaciones incluidas
+        (también reducidas a sus columnas). Muchos-a-uno con JOIN; colecciones
+        con selectinload, para no multiplicar filas.
+        """
+        model = self.spec.model
+        options = [load_only(*(getattr(model, name) for name in self.columns))]
+        for name in self.relations:
+            attr = getattr(model, name)
+            target = attr.property.mapper.class_
+            loader = joinedload(attr) if attr.property.direction is RelationshipDirection.MANYTOONE else selectinload(attr)
+            options.append(loader.load_only(*(getattr(target, column) for column in self.spec.relations[name])))
+        return tuple(options)
+
+    def to_dicts(self, items) -> list:
+        """Dicts JSON de `items`."""
+        relations = [(name, self.spec.relations[name]) for name in self.relations]
+        result = []
+        for obj in items:
+            data = project(obj, self.columns)
+            for name, columns in relations:
+                value = getattr(obj, name)
+                if value is None:
+                    data[name] = None
+                elif isinstance(value, list):
+                    data[name] = [project(item, columns) for item in value]
+                else:
+                    data[name] = project(value, columns)
+            result.append(data)
+        return result
+
+
+class FieldSetParams:
+    """
+    Dependencia que lee `fields` / `include` y los valida contra lo que el recurso
+    admite. Devuelve None si el cliente no pidió ninguno (respuesta completa).
+
+    - `columns`: columnas del modelo, en orden de salida (todas si solo se indica `include`).
+    - `relations`: relación -> columnas que se devuelven de cada elemento.
+    """
+
+    def __init__(self, model, columns: Sequence[str], relations: Dict[str, Sequence[str]]):
+        self.model = model
+        self.columns = tuple(columns)
+        self.relations = dict(relations)
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (`id` va siempre)"),
+        include: Optional[str] = Query(None, description="Relaciones a incluir, separadas por coma"),
+    ) -> Optional[FieldSet]:
+        requested, included = _split(fields), _split(include)
+        if not requested and not included:
+            return None
+        unknown = [name for name in requested if name not in self.columns and name not in self.relations]
+        unknown += [name for name in included if name not in self.relations]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Campos desconocidos: {', '.join(unknown)}. "
+                       f"Campos: {', '.join(self.columns)}. Relaciones: {', '.join(self.relations)}",
+            )
+        wanted = {"id", *(requested or self.columns)}
+        relations = set(included) | wanted
+        return FieldSet(
+            self,
+            [name for name in self.columns if name in wanted],
+            [name for name in self.relations if name in relations],
+        )
+
+
+def project(obj, columns: Sequence[str]) -> dict:
+    """Dict JSON con los atributos `columns` del objeto, en ese orden."""
+    return {name: to_json_value(getattr(obj, name)) for name in columns}
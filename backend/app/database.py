@@ -1,25 +1,238 @@
 # app/database.py
-from sqlalchemy import create_engine
+import logging
+import threading
+import time
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
-import os
 
-DATABASE_URL = os.environ.get("DATABASE_URL")
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = settings.DATABASE_URL
+
+
+class PoolStats:
+    """
+    Estadísticas de espera al pedir conexiones al pool.
+    Permite ver cuándo el pool se queda corto (esperas largas o timeouts).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if wait * 1000 >= settings.DB_POOL_WAIT_WARN_MS:
+                self.slow_checkouts += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "avg_wait_ms": round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+        data.update({
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+        return data
+
+
+class _InstrumentedPoolMixin:
+    """Mide cuánto tarda cada checkout (incluye la espera cuando el pool está agotado)."""
+
+    stats: PoolStats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            wait = time.perf_counter() - start
+            if self.stats is not None:
+                self.stats.record(wait, timed_out=True)
+            logger.error(f"Pool agotado: timeout tras {wait * 1000:.1f} ms esperando una conexión ({self.status()})")
+            raise
+        wait = time.perf_counter() - start
+        if self.stats is not None:
+            self.stats.record(wait)
+        if wait * 1000 >= settings.DB_POOL_WAIT_WARN_MS:
+            logger.warning(f"Checkout lento del pool: {wait * 1000:.1f} ms ({self.status()})")
+        return entry
+
+    def recreate(self):
+        # `dispose()` recrea el pool; conservamos las estadísticas acumuladas
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: str, pool_class=InstrumentedQueuePool, read_only: bool = False, **overrides) -> dict:
+    """
+    Construye los argumentos de `create_engine` a partir de `settings`.
+    `read_only` marca las transacciones como de solo lectura (réplicas, PostgreSQL).
+    `overrides` permite ajustar valores puntuales (p. ej. en scripts).
+    """
+    parsed = make_url(url)
+    options = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    # SQLite en memoria usa su propio pool (una sola conexión); no admite tamaño/overflow
+    if not _is_memory_sqlite(parsed):
+        options.update({
+            "poolclass": pool_class,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+        })
+    if parsed.get_backend_name() == "postgresql":
+        server_settings = {}
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if read_only:
+            server_settings["default_transaction_read_only"] = "on"
+        if server_settings:
+            if parsed.get_driver_name() == "asyncpg":
+                options["connect_args"] = {"server_settings": server_settings}
+            else:
+                options["connect_args"] = {"options": " ".join(f"-c {k}={v}" for k, v in server_settings.items())}
+    options.update(overrides)
+    return options
 
-engine = create_engine(DATABASE_URL, echo=True) # `echo=True` para ver las queries SQL
+
+# Estadísticas por engine (clave: nombre lógico del engine)
+pool_stats: dict[str, PoolStats] = {}
+_engines: dict[str, Engine] = {}
+
+
+def _register_engine(name: str, engine) -> None:
+    pool = engine.pool
+    if isinstance(pool, _InstrumentedPoolMixin):
+        pool.stats = pool_stats.setdefault(name, PoolStats())
+    _engines[name] = engine
+
+
+def create_db_engine(url: str, name: str = "primary", read_only: bool = False, **overrides) -> Engine:
+    """Fábrica de engines configurada desde `app.config.settings`."""
+    engine = create_engine(url, **engine_options(url, read_only=read_only, **overrides))
+    _register_engine(name, engine)
+    return engine
+
+
+# Drivers asíncronos usados cuando DB_ASYNC=true
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def to_async_url(url: str) -> str:
+    """Convierte una URL síncrona (psycopg2/pysqlite) a su equivalente asíncrono."""
+    parsed = make_url(url)
+    drivername = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if drivername is None:
+        raise ValueError(f"No hay driver asíncrono configurado para '{parsed.get_backend_name()}'")
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str, name: str = "primary_async", read_only: bool = False, **overrides) -> AsyncEngine:
+    """Igual que `create_db_engine`, pero para `AsyncSession`."""
+    engine = create_async_engine(
+        url, **engine_options(url, pool_class=InstrumentedAsyncQueuePool, read_only=read_only, **overrides)
+    )
+    _register_engine(name, engine.sync_engine)
+    return engine
+
+
+def get_pool_stats() -> dict:
+    """Devuelve las estadísticas de checkout de todos los engines registrados."""
+    return {
+        name: pool_stats[name].snapshot(engine.pool) if name in pool_stats else {"status": engine.pool.status()}
+        for name, engine in _engines.items()
+    }
+
+
+engine = create_db_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+# Modo asíncrono opcional: solo se crea el engine si DB_ASYNC=true
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    async_engine = create_async_db_engine(settings.ASYNC_DATABASE_URL or to_async_url(DATABASE_URL))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
-def create_db_tables():
+# Réplicas de lectura (ver app/core/db_routing.py). Sin réplicas, las lecturas van al primario.
+REPLICA_URLS = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+ReplicaSessionLocals = [
+    sessionmaker(autocommit=False, autoflush=False, bind=create_db_engine(url, name=f"replica_{i}", read_only=True))
+    for i, url in enumerate(REPLICA_URLS)
+]
+AsyncReplicaSessionLocals = []
+if settings.DB_ASYNC:
+    AsyncReplicaSessionLocals = [
+        async_sessionmaker(
+            create_async_db_engine(to_async_url(url), name=f"replica_{i}_async", read_only=True),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        for i, url in enumerate(REPLICA_URLS)
+    ]
 
-    Base.metadata.create_all(bind=engine)
-    print("Tablas verificadas/creadas exitosamente.")
+Base = declarative_base()
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """
+    Sesión para endpoints `async`. Con DB_ASYNC=true entrega una AsyncSession;
+    si no, una Session normal que `AsyncServiceAdapter` usa desde el threadpool.
+    """
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -8,24 +8,48 @@ from app.modules.categorias.categoria_router import router as categories_router
 from app.modules.proveedores.proveedor_router import router as proveedor_router
 from app.modules.pedidos.pedido_router import router as pedido_router
 from app.modules.ventas.ventas_router import router as sales_router
+from app.core.admin_router import router as admin_router
+from app.core.media import MediaFiles
+from app.core.db_routing import track_writes_middleware
+from app.core.query_stats import query_stats_middleware
 from app.modules.productos import product_model
+from app.modules.productos import product_import_model
+from app.modules.productos import product_related_model
+from app.modules.productos.product_import_service import resume_import_jobs
+from app.modules.productos import product_images
 from app.modules.categorias import categoria_model
 from app.modules.proveedores import proveedor_model
 from app.modules.pedidos import pedido_model
 from app.modules.ventas import ventas_model
-from app.database import create_db_tables
+from app import migrations
+from app.config import settings
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from pathlib import Path
-from app.database import Base, engine
+from starlette.concurrency import run_in_threadpool
 import traceback
 from app.database import SessionLocal
 from app.modules.users.user_service import UserService
 from app.modules.users.user_schema import UserCreate, UserRole
 
 
-create_db_tables()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El esquema lo gestiona `python -m app.migrations upgrade`. Al arrancar solo se
+    # lee la versión (una consulta); migrar aquí es opcional y va bajo bloqueo.
+    if settings.DB_MIGRATE_ON_STARTUP:
+        await run_in_threadpool(migrations.upgrade)
+    else:
+        await run_in_threadpool(migrations.check_schema_version)
+    # Importaciones masivas que quedaron a medias (se reanudan desde su último lote)
+    if settings.IMPORT_RESUME_ON_STARTUP:
+        resume_import_jobs()
+    yield
+    product_images.shutdown_pool()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Sistema de Gestión de Ventas API",
     description="Backend para un sistema de gestión de ventas con FastAPI y PostgreSQL",
     version="0.0.1",
@@ -37,7 +61,7 @@ static_dir = Path(__file__).parent / "static"
 
 app.mount(
     "/static",
-    StaticFiles(directory=static_dir),
+    MediaFiles(directory=static_dir),  # caché inmutable, ETag fuerte, Range, precomprimidos
     name="static"
 )
 
@@ -53,12 +77,20 @@ origins = [
     "https://proyectoanfer-1.onrender.com"
     # "https://tu-frontend.vercel.app",
 ]
+# Read-your-writes: tras una escritura, el cliente lee del primario un momento
+app.middleware("http")(track_writes_middleware)
+
+# Conteo de consultas por petición y detección de N+1 (ver app/core/query_stats.py)
+if settings.DB_QUERY_STATS_ENABLED:
+    app.middleware("http")(query_stats_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "ETag"],
 )
 
 # Incluir los routers de los módulos
@@ -69,17 +101,17 @@ app.include_router(categories_router)
 app.include_router(pedido_router)
 app.include_router(proveedor_router)
 app.include_router(sales_router)
+app.include_router(admin_router)
 
 @app.get("/_admin/create-all-tables")
 def create_tables():
     """
-    Endpoint temporal y secreto para crear las tablas en la BD.
+    Endpoint temporal y secreto para crear/actualizar las tablas en la BD.
+    Aplica las migraciones pendientes (bajo bloqueo, idempotente).
     """
     try:
-        # Esta línea le dice a SQLAlchemy: 
-        # "mira todos los modelos que definí y créalos como tablas en la BD"
-        Base.metadata.create_all(bind=engine)
-        return {"message": "¡Tablas creadas exitosamente!"}
+        applied = migrations.upgrade()
+        return {"message": "¡Esquema actualizado exitosamente!", "migraciones_aplicadas": applied}
     except Exception as e:
         return {"error": str(e)}
 
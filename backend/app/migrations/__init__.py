@@ -0,0 +1,10 @@
+# app/migrations/__init__.py
+from app.migrations.runner import (
+    check_schema_version,
+    create_index,
+    current_version,
+    head_version,
+    iter_id_chunks,
+    load_migrations,
+    upgrade,
+)
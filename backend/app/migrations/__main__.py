@@ -0,0 +1,35 @@
+# app/migrations/__main__.py
+# Uso:
+#   python -m app.migrations upgrade [--target N]
+#   python -m app.migrations current
+#   python -m app.migrations history
+import argparse
+import logging
+import sys
+
+from app.migrations.runner import current_version, head_version, load_migrations, upgrade
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Migraciones del esquema")
+    sub = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = sub.add_parser("upgrade", help="Aplica las migraciones pendientes")
+    upgrade_parser.add_argument("--target", type=int, default=None, help="Versión máxima a aplicar")
+    sub.add_parser("current", help="Muestra la versión actual de la base")
+    sub.add_parser("history", help="Lista las migraciones disponibles")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        applied = upgrade(target=args.target)
+        print(f"Migraciones aplicadas: {applied or 'ninguna'} (versión actual: {current_version()})")
+    elif args.command == "current":
+        print(f"Versión actual: {current_version()} / última: {head_version()}")
+    elif args.command == "history":
+        for migration in load_migrations():
+            print(f"{migration.version:04d}  {migration.description}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
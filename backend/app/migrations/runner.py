@@ -0,0 +1,253 @@
+# app/migrations/runner.py
+"""
+Runner de migraciones versionadas.
+
+- Las migraciones viven en `app/migrations/versions/vNNNN_<nombre>.py`.
+- Cada versión aplicada queda registrada en la tabla `schema_migrations`.
+- Solo un proceso migra a la vez: advisory lock en PostgreSQL, fila de bloqueo
+  en `schema_migration_lock` para el resto (SQLite en desarrollo).
+- Las migraciones deben ser idempotentes: se pueden relanzar sobre una base
+  creada con el antiguo `create_all` o a medio migrar.
+
+Uso: `python -m app.migrations upgrade` (ver app/migrations/__main__.py).
+"""
+import importlib
+import logging
+import os
+import pkgutil
+import socket
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional
+
+import sqlalchemy as sa
+from sqlalchemy import exc
+from sqlalchemy.engine import Connection, Engine
+
+from app.config import settings
+from app.migrations import versions as versions_package
+
+logger = logging.getLogger(__name__)
+
+# Tablas propias del runner (fuera de Base.metadata a propósito)
+migration_metadata = sa.MetaData()
+
+schema_migrations = sa.Table(
+    "schema_migrations",
+    migration_metadata,
+    sa.Column("version", sa.Integer, primary_key=True),
+    sa.Column("description", sa.String(200), nullable=False),
+    sa.Column("applied_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+)
+
+schema_migration_lock = sa.Table(
+    "schema_migration_lock",
+    migration_metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("owner", sa.String(200), nullable=False),
+    sa.Column("locked_at", sa.Float, nullable=False),
+)
+
+# Clave arbitraria (constante) para pg_advisory_lock
+_PG_LOCK_KEY = 724_511_003
+_LOCK_STALE_SECONDS = 3600
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+    transactional: bool
+    module: str
+
+
+def load_migrations() -> List[Migration]:
+    """Carga las migraciones de `app/migrations/versions`, ordenadas por versión."""
+    migrations = []
+    for info in pkgutil.iter_modules(versions_package.__path__):
+        if not info.name.startswith("v"):
+            continue
+        module = importlib.import_module(f"{versions_package.__name__}.{info.name}")
+        migrations.append(Migration(
+            version=module.VERSION,
+            description=module.DESCRIPTION,
+            upgrade=module.upgrade,
+            transactional=getattr(module, "TRANSACTIONAL", True),
+            module=info.name,
+        ))
+    migrations.sort(key=lambda m: m.version)
+    seen = set()
+    for migration in migrations:
+        if migration.version in seen:
+            raise RuntimeError(f"Versión de migración duplicada: {migration.version}")
+        seen.add(migration.version)
+    return migrations
+
+
+def head_version() -> int:
+    migrations = load_migrations()
+    return migrations[-1].version if migrations else 0
+
+
+def _default_engine() -> Engine:
+    from app.database import engine
+    return engine
+
+
+def current_version(engine: Optional[Engine] = None) -> Optional[int]:
+    """
+    Versión aplicada más alta, o None si la base aún no tiene `schema_migrations`.
+    Es una sola consulta: es lo único que se hace al arrancar la app.
+    """
+    engine = engine or _default_engine()
+    try:
+        with engine.connect() as conn:
+            return conn.execute(sa.select(sa.func.max(schema_migrations.c.version))).scalar() or 0
+    except (exc.OperationalError, exc.ProgrammingError):
+        return None
+
+
+def check_schema_version(engine: Optional[Engine] = None) -> bool:
+    """Comprueba (sin migrar) que la base está en la última versión. Se usa al arrancar."""
+    current = current_version(engine)
+    head = head_version()
+    if current is None:
+        logger.error("La base de datos no tiene esquema versionado. Ejecuta: python -m app.migrations upgrade")
+        return False
+    if current < head:
+        logger.error(f"Esquema desactualizado (versión {current}, última {head}). Ejecuta: python -m app.migrations upgrade")
+        return False
+    return True
+
+
+@contextmanager
+def migration_lock(engine: Engine, timeout: float) -> Iterator[None]:
+    """Garantiza que un solo proceso ejecute migraciones a la vez."""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            # set_config admite parámetros con cualquier driver (SET no); el valor es
+            # de sesión y la conexión vuelve al pool, así que se restablece al salir
+            conn.execute(sa.text("SELECT set_config('lock_timeout', :ms, false)"), {"ms": str(int(timeout * 1000))})
+            try:
+                conn.execute(sa.text("SELECT pg_advisory_lock(:key)"), {"key": _PG_LOCK_KEY})
+                conn.commit()
+                try:
+                    yield
+                finally:
+                    conn.execute(sa.text("SELECT pg_advisory_unlock(:key)"), {"key": _PG_LOCK_KEY})
+                    conn.commit()
+            finally:
+                conn.rollback()
+                conn.execute(sa.text("RESET lock_timeout"))
+                conn.commit()
+        return
+
+    schema_migration_lock.create(engine, checkfirst=True)
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with engine.begin() as conn:
+                conn.execute(schema_migration_lock.insert().values(id=1, owner=owner, locked_at=time.time()))
+            break
+        except exc.IntegrityError:
+            with engine.begin() as conn:
+                # Un bloqueo muy antiguo se considera abandonado (proceso caído)
+                conn.execute(schema_migration_lock.delete().where(
+                    schema_migration_lock.c.locked_at < time.time() - _LOCK_STALE_SECONDS
+                ))
+            if time.monotonic() > deadline:
+                raise TimeoutError("No se pudo obtener el bloqueo de migraciones")
+            time.sleep(0.5)
+    try:
+        yield
+    finally:
+        with engine.begin() as conn:
+            conn.execute(schema_migration_lock.delete().where(schema_migration_lock.c.owner == owner))
+
+
+def upgrade(engine: Optional[Engine] = None, target: Optional[int] = None) -> List[int]:
+    """Aplica las migraciones pendientes (hasta `target` si se indica). Devuelve las versiones aplicadas."""
+    engine = engine or _default_engine()
+    applied_now = []
+    with migration_lock(engine, settings.DB_MIGRATION_LOCK_TIMEOUT):
+        schema_migrations.create(engine, checkfirst=True)
+        with engine.connect() as conn:
+            applied = set(conn.execute(sa.select(schema_migrations.c.version)).scalars())
+
+        for migration in load_migrations():
+            if migration.version in applied or (target is not None and migration.version > target):
+                continue
+            logger.info(f"Aplicando migración {migration.version}: {migration.description}")
+            start = time.perf_counter()
+            if migration.transactional:
+                with engine.begin() as conn:
+                    migration.upgrade(conn)
+                    _record(conn, migration)
+            else:
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    migration.upgrade(conn)
+                with engine.begin() as conn:
+                    _record(conn, migration)
+            logger.info(f"Migración {migration.version} aplicada en {time.perf_counter() - start:.2f}s")
+            applied_now.append(migration.version)
+    return applied_now
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(schema_migrations.insert().values(version=migration.version, description=migration.description))
+
+
+# --- Utilidades para migraciones de datos ---
+
+def iter_id_chunks(conn: Connection, id_column: sa.Column, chunk_size: int = 1000, where=None) -> Iterator[List[int]]:
+    """
+    Recorre los IDs de una tabla por lotes (keyset sobre `id_column`), para que las
+    migraciones de datos no bloqueen tablas grandes en una sola transacción.
+    """
+    last_id = None
+    while True:
+        stmt = sa.select(id_column).order_by(id_column).limit(chunk_size)
+        if where is not None:
+            stmt = stmt.where(where)
+        if last_id is not None:
+            stmt = stmt.where(id_column > last_id)
+        ids = list(conn.execute(stmt).scalars())
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(col["name"] == column for col in sa.inspect(conn).get_columns(table))
+
+
+def has_index(conn: Connection, table: str, index: str) -> bool:
+    return any(ix["name"] == index for ix in sa.inspect(conn).get_indexes(table))
+
+
+def create_index(conn: Connection, name: str, table: str, columns: str, unique: bool = False,
+                 using: Optional[str] = None) -> None:
+    """
+    Crea un índice si no existe. En PostgreSQL usa CREATE INDEX CONCURRENTLY (no bloquea
+    escrituras), así que la migración debe declarar `TRANSACTIONAL = False`.
+    `columns` es la lista SQL de columnas/expresiones, p. ej. "cliente_id, fecha_creacion".
+    `using` es el método de acceso en PostgreSQL (p. ej. "gin").
+    """
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    if conn.dialect.name != "postgresql":
+        conn.execute(sa.text(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({columns})"))
+        return
+    method = f" USING {using}" if using else ""
+    # Un CONCURRENTLY interrumpido deja el índice marcado como inválido: se reconstruye
+    invalid = conn.execute(sa.text("""
+        SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name AND NOT i.indisvalid
+    """), {"name": name}).first()
+    if invalid:
+        logger.warning(f"Índice {name} inválido (build concurrente interrumpido); se reconstruye")
+        conn.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(sa.text(f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {table}{method} ({columns})"))
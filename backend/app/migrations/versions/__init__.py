@@ -0,0 +1,3 @@
+# Cada módulo `vNNNN_<nombre>.py` define VERSION, DESCRIPTION y upgrade(conn).
+# TRANSACTIONAL = False para migraciones que hacen commit por lotes o usan
+# operaciones que no pueden ir en una transacción (p. ej. CREATE INDEX CONCURRENTLY).
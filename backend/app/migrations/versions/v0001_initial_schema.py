@@ -0,0 +1,99 @@
+# Esquema base: las tablas tal como las creaba `Base.metadata.create_all`.
+# Se definen aquí (y no importando los modelos) para que esta versión no cambie
+# cuando evolucionen los modelos. Con checkfirst, sobre una base existente no hace nada.
+import sqlalchemy as sa
+
+VERSION = 1
+DESCRIPTION = "Esquema inicial (usuarios, catálogo, pedidos y ventas)"
+
+metadata = sa.MetaData()
+
+sa.Table(
+    "users", metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("email", sa.String, unique=True, index=True, nullable=False),
+    sa.Column("cedula", sa.String, unique=True, index=True, nullable=False),
+    sa.Column("hashed_password", sa.String, nullable=False),
+    sa.Column("full_name", sa.String, nullable=True),
+    sa.Column("is_active", sa.Boolean),
+    sa.Column("role", sa.String, nullable=False),
+)
+
+sa.Table(
+    "categorias", metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("name", sa.String(100), unique=True, nullable=False),
+)
+
+sa.Table(
+    "proveedor", metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("nombre", sa.String(100), nullable=False),
+    sa.Column("telefono", sa.String(20)),
+    sa.Column("correo", sa.String(100)),
+)
+
+sa.Table(
+    "productos", metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("nombre", sa.String, nullable=False),
+    sa.Column("descripcion", sa.String, nullable=False),
+    sa.Column("precio", sa.Numeric(10, 2), nullable=False),
+    sa.Column("proveedor_id", sa.Integer, sa.ForeignKey("proveedor.id"), nullable=False),
+    sa.Column("image_url", sa.String, nullable=True),
+)
+
+sa.Table(
+    "producto_categoria", metadata,
+    sa.Column("producto_id", sa.Integer, sa.ForeignKey("productos.id"), primary_key=True),
+    sa.Column("categoria_id", sa.Integer, sa.ForeignKey("categorias.id"), primary_key=True),
+)
+
+sa.Table(
+    "variantes_producto", metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("producto_id", sa.Integer, sa.ForeignKey("productos.id"), nullable=False),
+    sa.Column("color", sa.String, nullable=False),
+    sa.Column("talla", sa.String, nullable=False),
+    sa.Column("stock", sa.Integer),
+)
+
+sa.Table(
+    "pedidos", metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("proveedor_id", sa.Integer, sa.ForeignKey("proveedor.id"), nullable=False),
+    sa.Column("fecha", sa.Date, nullable=False),
+    sa.Column("estado", sa.String),
+)
+
+sa.Table(
+    "detalle_pedido", metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("pedido_id", sa.Integer, sa.ForeignKey("pedidos.id"), nullable=False),
+    sa.Column("variante_id", sa.Integer, sa.ForeignKey("variantes_producto.id"), nullable=False),
+    sa.Column("cantidad", sa.Integer, nullable=False),
+    sa.Column("precio_unitario", sa.Float, nullable=False),
+)
+
+sa.Table(
+    "ventas", metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("cliente_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+    sa.Column("total", sa.Float, nullable=False),
+    sa.Column("estado", sa.Enum("pendiente", "confirmada", "cancelada", name="estadoventa")),
+    sa.Column("codigo", sa.String, unique=True, index=True, nullable=False),
+    sa.Column("fecha_creacion", sa.DateTime(timezone=True), server_default=sa.func.now()),
+)
+
+sa.Table(
+    "detalle_venta", metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("venta_id", sa.Integer, sa.ForeignKey("ventas.id", ondelete="CASCADE"), nullable=False),
+    sa.Column("variante_id", sa.Integer, sa.ForeignKey("variantes_producto.id", ondelete="RESTRICT"), nullable=False),
+    sa.Column("cantidad", sa.Integer, nullable=False),
+    sa.Column("precio_unitario", sa.Float, nullable=False),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
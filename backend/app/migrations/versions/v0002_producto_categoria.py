@@ -0,0 +1,68 @@
+# Antes migrate_to_multiple_categories.py: pasa `productos.categoria_id` a la tabla
+# many-to-many `producto_categoria` y elimina la columna. Si la columna ya no existe
+# (bases nuevas o ya migradas) no hace nada.
+# Copia por lotes con commit por lote; cada lote es idempotente (NOT EXISTS).
+import logging
+
+import sqlalchemy as sa
+
+from app.migrations.runner import has_column, iter_id_chunks
+
+VERSION = 2
+DESCRIPTION = "Migrar productos.categoria_id a producto_categoria"
+TRANSACTIONAL = False
+
+CHUNK_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade(conn):
+    if not has_column(conn, "productos", "categoria_id"):
+        return
+
+    productos = sa.table("productos", sa.column("id"), sa.column("categoria_id"))
+    copied = 0
+    for ids in iter_id_chunks(conn, productos.c.id, CHUNK_SIZE, where=productos.c.categoria_id.isnot(None)):
+        result = conn.execute(sa.text("""
+            INSERT INTO producto_categoria (producto_id, categoria_id)
+            SELECT p.id, p.categoria_id
+            FROM productos p
+            WHERE p.id BETWEEN :first_id AND :last_id
+              AND p.categoria_id IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM producto_categoria pc
+                  WHERE pc.producto_id = p.id AND pc.categoria_id = p.categoria_id
+              )
+        """), {"first_id": ids[0], "last_id": ids[-1]})
+        copied += result.rowcount or 0
+    logger.info(f"{copied} asociaciones producto-categoría copiadas")
+
+    # La eliminación de la columna va en su propia transacción
+    with conn.engine.begin() as tx:
+        _drop_categoria_id(tx)
+
+
+def _drop_categoria_id(conn):
+    if conn.dialect.name == "sqlite":
+        # SQLite no puede eliminar una columna con FOREIGN KEY: se recrea la tabla
+        conn.execute(sa.text("""
+            CREATE TABLE productos_new (
+                id INTEGER PRIMARY KEY,
+                nombre VARCHAR NOT NULL,
+                descripcion VARCHAR NOT NULL,
+                precio DECIMAL(10, 2) NOT NULL,
+                proveedor_id INTEGER NOT NULL,
+                image_url VARCHAR,
+                FOREIGN KEY (proveedor_id) REFERENCES proveedor (id)
+            )
+        """))
+        conn.execute(sa.text("""
+            INSERT INTO productos_new (id, nombre, descripcion, precio, proveedor_id, image_url)
+            SELECT id, nombre, descripcion, precio, proveedor_id, image_url FROM productos
+        """))
+        conn.execute(sa.text("DROP TABLE productos"))
+        conn.execute(sa.text("ALTER TABLE productos_new RENAME TO productos"))
+        conn.execute(sa.text("CREATE INDEX IF NOT EXISTS ix_productos_id ON productos (id)"))
+    else:
+        conn.execute(sa.text("ALTER TABLE productos DROP COLUMN IF EXISTS categoria_id"))
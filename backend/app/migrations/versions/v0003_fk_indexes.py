@@ -0,0 +1,30 @@
+# Índices para todas las claves foráneas y columnas de filtro frecuentes.
+# En PostgreSQL se construyen con CREATE INDEX CONCURRENTLY (sin bloquear escrituras),
+# por eso la migración no es transaccional. Los nombres siguen la convención
+# `ix_<tabla>_<columna>` de SQLAlchemy (`index=True` en los modelos).
+from app.migrations.runner import create_index
+
+VERSION = 3
+DESCRIPTION = "Índices para claves foráneas y columnas de filtro"
+TRANSACTIONAL = False
+
+INDEXES = [
+    ("producto_categoria", "categoria_id"),
+    ("productos", "proveedor_id"),
+    ("variantes_producto", "producto_id"),
+    ("ventas", "cliente_id"),
+    ("ventas", "fecha_creacion"),
+    ("ventas", "estado"),
+    ("detalle_venta", "venta_id"),
+    ("detalle_venta", "variante_id"),
+    ("pedidos", "proveedor_id"),
+    ("pedidos", "fecha"),
+    ("pedidos", "estado"),
+    ("detalle_pedido", "pedido_id"),
+    ("detalle_pedido", "variante_id"),
+]
+
+
+def upgrade(conn):
+    for table, column in INDEXES:
+        create_index(conn, f"ix_{table}_{column}", table, column)
@@ -0,0 +1,12 @@
+# Índices compuestos (clave de orden, id) para la paginación keyset de GET /products.
+# `newest` usa la clave primaria; `stock` se calcula a partir de las variantes.
+from app.migrations.runner import create_index
+
+VERSION = 4
+DESCRIPTION = "Índices de orden para la paginación de productos"
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    create_index(conn, "ix_productos_precio_id", "productos", "precio, id")
+    create_index(conn, "ix_productos_nombre_id", "productos", "nombre, id")
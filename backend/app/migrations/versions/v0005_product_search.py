@@ -0,0 +1,46 @@
+# Índices de búsqueda de texto para GET /products/search.
+# - PostgreSQL: índice GIN sobre una expresión tsvector (nombre + descripción) y, si la
+#   extensión pg_trgm se puede instalar, índice de trigramas sobre `nombre` para tolerar
+#   errores de escritura. Al ser índices de expresión, se mantienen solos.
+# - SQLite (desarrollo): tabla FTS5 `productos_fts` (rowid = productos.id), que
+#   ProductSearchService mantiene al crear/editar/borrar productos.
+# La expresión tsvector debe coincidir con SEARCH_TSV en product_search_service.py.
+import logging
+
+import sqlalchemy as sa
+from sqlalchemy import exc
+
+from app.migrations.runner import create_index
+
+VERSION = 5
+DESCRIPTION = "Índices de búsqueda de texto de productos"
+TRANSACTIONAL = False
+
+logger = logging.getLogger(__name__)
+
+TSV = "to_tsvector('spanish', coalesce(nombre, '') || ' ' || coalesce(descripcion, ''))"
+
+
+def upgrade(conn):
+    if conn.dialect.name == "postgresql":
+        create_index(conn, "ix_productos_search_tsv", "productos", TSV, using="gin")
+        try:
+            conn.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except exc.DBAPIError as e:
+            logger.warning(f"No se pudo instalar pg_trgm (la búsqueda no tolerará errores de escritura): {e}")
+            return
+        create_index(conn, "ix_productos_nombre_trgm", "productos", "nombre gin_trgm_ops", using="gin")
+    elif conn.dialect.name == "sqlite":
+        try:
+            conn.execute(sa.text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts "
+                "USING fts5(nombre, descripcion, tokenize = 'unicode61 remove_diacritics 2')"
+            ))
+        except exc.OperationalError as e:
+            logger.warning(f"SQLite sin FTS5; la búsqueda usará LIKE: {e}")
+            return
+        conn.execute(sa.text("""
+            INSERT INTO productos_fts (rowid, nombre, descripcion)
+            SELECT id, nombre, descripcion FROM productos
+            WHERE id NOT IN (SELECT rowid FROM productos_fts)
+        """))
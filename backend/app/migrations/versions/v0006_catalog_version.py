@@ -0,0 +1,22 @@
+# Tabla de una fila con la versión del catálogo (ETags e invalidación de cachés
+# entre procesos, ver app/core/catalog_version.py).
+import sqlalchemy as sa
+
+VERSION = 6
+DESCRIPTION = "Versión del catálogo"
+
+metadata = sa.MetaData()
+
+catalog_version = sa.Table(
+    "catalog_version",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("version", sa.BigInteger, nullable=False, server_default="1"),
+    sa.Column("metadata_version", sa.BigInteger, nullable=False, server_default="1"),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    if conn.execute(sa.select(catalog_version.c.id).where(catalog_version.c.id == 1)).first() is None:
+        conn.execute(catalog_version.insert().values(id=1))
@@ -0,0 +1,32 @@
+# Trabajos de importación masiva de productos (POST /products/import,
+# ver app/modules/productos/product_import_service.py).
+import sqlalchemy as sa
+
+VERSION = 7
+DESCRIPTION = "Trabajos de importación de productos"
+
+metadata = sa.MetaData()
+
+import_jobs = sa.Table(
+    "import_jobs",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True, index=True),
+    sa.Column("status", sa.String(20), nullable=False, index=True),
+    sa.Column("format", sa.String(10), nullable=False),
+    sa.Column("filename", sa.String, nullable=True),
+    sa.Column("path", sa.String, nullable=False),
+    sa.Column("size_bytes", sa.BigInteger, nullable=False),
+    sa.Column("bytes_processed", sa.BigInteger, nullable=False),
+    sa.Column("rows_processed", sa.Integer, nullable=False),
+    sa.Column("rows_imported", sa.Integer, nullable=False),
+    sa.Column("error_count", sa.Integer, nullable=False),
+    sa.Column("errors", sa.JSON, nullable=True),
+    sa.Column("error_message", sa.Text, nullable=True),
+    sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
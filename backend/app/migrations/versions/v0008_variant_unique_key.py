@@ -0,0 +1,36 @@
+# Una sola variante por (producto, color, talla): índice único que además es la
+# clave del upsert de POST /products/variants/bulk (ON CONFLICT).
+# Si ya hay variantes repetidas la migración se detiene y las lista; hay que
+# fusionarlas (sumar el stock y mover sus líneas de venta/pedido a una de ellas)
+# antes de volver a ejecutarla.
+import sqlalchemy as sa
+
+from app.migrations.runner import create_index
+
+VERSION = 8
+DESCRIPTION = "Clave única de variantes (producto_id, color, talla)"
+TRANSACTIONAL = False
+
+_DUPLICATES = sa.text("""
+    SELECT producto_id, color, talla, COUNT(*) AS repeticiones
+    FROM variantes_producto
+    GROUP BY producto_id, color, talla
+    HAVING COUNT(*) > 1
+    ORDER BY producto_id, color, talla
+""")
+
+
+def upgrade(conn):
+    duplicates = conn.execute(_DUPLICATES).all()
+    if duplicates:
+        sample = "; ".join(
+            f"producto {row.producto_id} {row.color}/{row.talla} ×{row.repeticiones}" for row in duplicates[:20]
+        )
+        raise RuntimeError(
+            f"Hay {len(duplicates)} combinaciones (producto_id, color, talla) repetidas en variantes_producto; "
+            f"fusiónalas antes de migrar: {sample}"
+        )
+    create_index(
+        conn, "uq_variantes_producto_producto_color_talla", "variantes_producto",
+        "producto_id, color, talla", unique=True,
+    )
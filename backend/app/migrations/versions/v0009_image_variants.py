@@ -0,0 +1,16 @@
+# Rutas de los derivados (WebP/AVIF redimensionados) de la imagen de cada producto,
+# ver app/modules/productos/product_images.py. Se rellenan al subir la imagen o con
+# `python -m app.modules.productos.product_images backfill`.
+import sqlalchemy as sa
+
+from app.migrations.runner import has_column
+
+VERSION = 9
+DESCRIPTION = "productos.image_variants"
+
+
+def upgrade(conn):
+    if has_column(conn, "productos", "image_variants"):
+        return
+    column_type = sa.JSON().compile(dialect=conn.dialect)
+    conn.execute(sa.text(f"ALTER TABLE productos ADD COLUMN image_variants {column_type}"))
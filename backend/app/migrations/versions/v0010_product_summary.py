@@ -0,0 +1,45 @@
+# Resumen de variantes en productos (total_stock, in_stock, variant_count), ver
+# app/modules/productos/product_summary.py. Se rellena por lotes de ids y se
+# añaden los índices de los órdenes `stock` y `available` de GET /products.
+import logging
+
+import sqlalchemy as sa
+
+from app.migrations.runner import create_index, has_column, iter_id_chunks
+
+VERSION = 10
+DESCRIPTION = "Resumen de stock en productos"
+TRANSACTIONAL = False
+
+CHUNK_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade(conn):
+    for column, ddl in (
+        ("total_stock", "INTEGER NOT NULL DEFAULT 0"),
+        ("in_stock", "BOOLEAN NOT NULL DEFAULT false"),
+        ("variant_count", "INTEGER NOT NULL DEFAULT 0"),
+    ):
+        if not has_column(conn, "productos", column):
+            conn.execute(sa.text(f"ALTER TABLE productos ADD COLUMN {column} {ddl}"))
+    if conn.in_transaction():
+        conn.commit()
+
+    productos = sa.table("productos", sa.column("id"))
+    updated = 0
+    for ids in iter_id_chunks(conn, productos.c.id, CHUNK_SIZE):
+        result = conn.execute(sa.text("""
+            UPDATE productos SET
+                total_stock = COALESCE((SELECT SUM(v.stock) FROM variantes_producto v WHERE v.producto_id = productos.id), 0),
+                variant_count = (SELECT COUNT(*) FROM variantes_producto v WHERE v.producto_id = productos.id),
+                in_stock = EXISTS (SELECT 1 FROM variantes_producto v WHERE v.producto_id = productos.id AND v.stock > 0)
+            WHERE id BETWEEN :first_id AND :last_id
+        """), {"first_id": ids[0], "last_id": ids[-1]})
+        updated += result.rowcount or 0
+        conn.commit()
+    logger.info(f"Resumen de stock calculado para {updated} productos")
+
+    create_index(conn, "ix_productos_total_stock_id", "productos", "total_stock, id")
+    create_index(conn, "ix_productos_in_stock_id", "productos", "in_stock, id")
@@ -0,0 +1,46 @@
+# Productos que se compran juntos (GET /products/{id}/related): pares contados a
+# partir de detalle_venta, top por producto y punto de control del proceso, ver
+# app/modules/productos/product_related_service.py.
+import sqlalchemy as sa
+
+VERSION = 11
+DESCRIPTION = "Productos relacionados por ventas"
+
+metadata = sa.MetaData()
+
+# Solo para resolver las claves foráneas; no se crea
+sa.Table("productos", metadata, sa.Column("id", sa.Integer, primary_key=True))
+
+coocurrencias_producto = sa.Table(
+    "coocurrencias_producto",
+    metadata,
+    sa.Column("producto_a", sa.Integer, sa.ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True),
+    sa.Column("producto_b", sa.Integer, sa.ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True),
+    sa.Column("veces", sa.Integer, nullable=False),
+    sa.Index("ix_coocurrencias_producto_b", "producto_b"),
+)
+
+productos_relacionados = sa.Table(
+    "productos_relacionados",
+    metadata,
+    sa.Column("producto_id", sa.Integer, sa.ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True),
+    sa.Column("posicion", sa.SmallInteger, primary_key=True),
+    sa.Column("relacionado_id", sa.Integer, sa.ForeignKey("productos.id", ondelete="CASCADE"), nullable=False),
+    sa.Column("veces", sa.Integer, nullable=False),
+)
+
+relacionados_estado = sa.Table(
+    "relacionados_estado",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("last_venta_id", sa.BigInteger, nullable=False, server_default="0"),
+    sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(
+        conn, tables=[coocurrencias_producto, productos_relacionados, relacionados_estado], checkfirst=True
+    )
+    if conn.execute(sa.select(relacionados_estado.c.id).where(relacionados_estado.c.id == 1)).first() is None:
+        conn.execute(relacionados_estado.insert().values(id=1))
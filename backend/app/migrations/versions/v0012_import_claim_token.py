@@ -0,0 +1,15 @@
+# Dueño de cada importación en curso (import_jobs.claim_token): el punto de
+# control solo se guarda si el proceso sigue siendo el dueño, ver
+# app/modules/productos/product_import_service.py.
+import sqlalchemy as sa
+
+from app.migrations.runner import has_column
+
+VERSION = 12
+DESCRIPTION = "import_jobs.claim_token"
+
+
+def upgrade(conn):
+    if has_column(conn, "import_jobs", "claim_token"):
+        return
+    conn.execute(sa.text("ALTER TABLE import_jobs ADD COLUMN claim_token VARCHAR(32)"))
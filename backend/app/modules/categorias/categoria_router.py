@@ -2,22 +2,25 @@
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
 from app.core.dependencies import get_db
+from app.core.async_service import AsyncServiceAdapter
+from app.core.db_routing import get_async_read_db
+from app.core.http_cache import catalog_cache
 from app.modules.categorias.categoria_service import CategoriaService
 from app.modules.categorias import categoria_schema as schemas
 
 router = APIRouter(prefix="/categorias", tags=["Categorias"])
 
-@router.get("/", response_model=list[schemas.CategoriaResponse])
-def list_categories(db: Session = Depends(get_db)):
-    return CategoriaService(db).get_all()
+@router.get("/", response_model=list[schemas.CategoriaResponse], dependencies=[catalog_cache("categorias")])
+async def list_categories(db = Depends(get_async_read_db)):
+    return await AsyncServiceAdapter(CategoriaService, db).get_all()
 
 @router.post("/", response_model=schemas.CategoriaResponse, status_code=status.HTTP_201_CREATED)
 def create_categoria(data: schemas.CategoriaCreate, db: Session = Depends(get_db)):
     return CategoriaService(db).create(data)
 
-@router.get("/{categoria_id}", response_model=schemas.CategoriaResponse)
-def get_categoria(categoria_id: int, db: Session = Depends(get_db)):
-    return CategoriaService(db).get_by_id(categoria_id)
+@router.get("/{categoria_id}", response_model=schemas.CategoriaResponse, dependencies=[catalog_cache("categorias")])
+async def get_categoria(categoria_id: int, db = Depends(get_async_read_db)):
+    return await AsyncServiceAdapter(CategoriaService, db).get_cached(categoria_id)
 
 @router.put("/{categoria_id}", response_model=schemas.CategoriaResponse)
 def update_categoria(categoria_id: int, data: schemas.CategoriaUpdate, db: Session = Depends(get_db)):
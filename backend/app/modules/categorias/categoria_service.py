@@ -2,13 +2,42 @@
 from sqlalchemy.orm import Session
 from app.modules.categorias import categoria_model as models, categoria_schema as schemas
 from app.core.exceptions import NotFoundException, DuplicateEntryException
+from app.core import catalog_events
+from app.core.cache import LRUTTLCache
+from app.core.catalog_version import catalog_version
+from app.modules.productos.product_service import invalidate_product_cache
+
+# Lecturas de categorías (esquemas, no objetos ORM); se invalida en cada escritura
+categoria_cache = LRUTTLCache("categorias")
+_ALL = "all"
+
+catalog_events.track(models.Categoria)
+catalog_version.on_remote_change(categoria_cache.clear, metadata_only=True)
 
 class CategoriaService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_all(self):
-        return self.db.query(models.Categoria).all()
+    def get_all(self) -> list[schemas.CategoriaResponse]:
+        return categoria_cache.get_or_load(_ALL, lambda: [
+            schemas.CategoriaResponse.model_validate(categoria) for categoria in self.db.query(models.Categoria).all()
+        ])
+
+    def get_cached(self, categoria_id: int) -> schemas.CategoriaResponse:
+        """Lectura con caché para GET /categorias/{id}. Para modificar, usar get_by_id."""
+        def load():
+            categoria = self.db.query(models.Categoria).filter(models.Categoria.id == categoria_id).first()
+            return schemas.CategoriaResponse.model_validate(categoria) if categoria else None
+        categoria = categoria_cache.get_or_load(categoria_id, load)
+        if categoria is None:
+            raise NotFoundException("Categoria not found")
+        return categoria
+
+    def _invalidate(self, categoria_id: int | None = None):
+        categoria_cache.invalidate(_ALL, categoria_id)
+        if categoria_id is not None:
+            # Las respuestas de producto incluyen el nombre de sus categorías
+            invalidate_product_cache()
 
     def get_by_id(self, categoria_id: int):
         categoria = self.db.query(models.Categoria).filter(models.Categoria.id == categoria_id).first()
@@ -25,6 +54,7 @@ class CategoriaService:
         self.db.add(categoria)
         self.db.commit()
         self.db.refresh(categoria)
+        self._invalidate()
         return categoria
 
     def update(self, categoria_id: int, data: schemas.CategoriaUpdate):
@@ -33,9 +63,11 @@ class CategoriaService:
             setattr(categoria, key, value)
         self.db.commit()
         self.db.refresh(categoria)
+        self._invalidate(categoria_id)
         return categoria
 
     def delete(self, categoria_id: int):
         categoria = self.get_by_id(categoria_id)
         self.db.delete(categoria)
         self.db.commit()
+        self._invalidate(categoria_id)
@@ -6,9 +6,9 @@ class Pedido(Base):
     __tablename__ = "pedidos"
 
     id = Column(Integer, primary_key=True, index=True)
-    proveedor_id = Column(Integer, ForeignKey("proveedor.id"), nullable=False)
-    fecha = Column(Date, nullable=False)
-    estado = Column(String, default="pendiente")
+    proveedor_id = Column(Integer, ForeignKey("proveedor.id"), nullable=False, index=True)
+    fecha = Column(Date, nullable=False, index=True)
+    estado = Column(String, default="pendiente", index=True)
 
     proveedor = relationship("Proveedor", back_populates="pedidos")
     detalles = relationship("DetallePedido", back_populates="pedido", cascade="all, delete-orphan")
@@ -18,8 +18,8 @@ class DetallePedido(Base):
     __tablename__ = "detalle_pedido"
 
     id = Column(Integer, primary_key=True, index=True)
-    pedido_id = Column(Integer, ForeignKey("pedidos.id"), nullable=False)
-    variante_id = Column(Integer, ForeignKey("variantes_producto.id"), nullable=False)
+    pedido_id = Column(Integer, ForeignKey("pedidos.id"), nullable=False, index=True)
+    variante_id = Column(Integer, ForeignKey("variantes_producto.id"), nullable=False, index=True)
     cantidad = Column(Integer, nullable=False)
     precio_unitario = Column(Float, nullable=False)
 
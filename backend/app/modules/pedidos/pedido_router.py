@@ -1,11 +1,14 @@
 # app/modules/pedidos/pedido_router.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
+from app.core.db_routing import get_read_db
 # Importa la clase del servicio, asumiendo que ahora es una clase como en tus otros módulos
-from app.modules.pedidos.pedido_service import PedidoService
+from app.modules.pedidos.pedido_service import PEDIDO_FIELDS, PedidoService
 from app.modules.pedidos import pedido_schema as schemas
+from app.core import fast_json
+from app.core.sparse_fields import FieldSet
 
 router = APIRouter(prefix="/pedidos", tags=["Pedidos"])
 
@@ -14,6 +17,10 @@ router = APIRouter(prefix="/pedidos", tags=["Pedidos"])
 def get_pedido_service(db: Session = Depends(get_db)) -> PedidoService:
     return PedidoService(db)
 
+# Listados y consultas (solo lectura): réplica si hay
+def get_pedido_read_service(db: Session = Depends(get_read_db)) -> PedidoService:
+    return PedidoService(db)
+
 @router.post("/", response_model=schemas.PedidoResponse)
 def crear_pedido(
     pedido: schemas.PedidoCreate,
@@ -23,20 +30,26 @@ def crear_pedido(
 
 @router.get("/", response_model=List[schemas.PedidoResponse])
 def listar_pedidos(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=200),
-    pedido_service: PedidoService = Depends(get_pedido_service) # Inyecta el servicio
+    fieldset: Optional[FieldSet] = Depends(PEDIDO_FIELDS),
+    pedido_service: PedidoService = Depends(get_pedido_read_service) # Inyecta el servicio
 ):
     """
-    Lista todos los pedidos con sus detalles y relaciones anidadas.
+    Lista todos los pedidos con sus detalles.
+    Con `fields` / `include` cada pedido trae solo esos campos y relaciones.
     """
+    if fieldset:
+        pedidos = pedido_service.obtener_pedidos(skip=skip, limit=limit, options=fieldset.load_options())
+        return fast_json.json_response(fieldset.to_dicts(pedidos), response)
     pedidos = pedido_service.obtener_pedidos(skip=skip, limit=limit)
     return pedidos
 
 @router.get("/{pedido_id}", response_model=schemas.PedidoResponse)
 def obtener_pedido(
     pedido_id: int,
-    pedido_service: PedidoService = Depends(get_pedido_service) # Inyecta el servicio
+    pedido_service: PedidoService = Depends(get_pedido_read_service) # Inyecta el servicio
 ):
     # CRÍTICO: Delega completamente al servicio para obtener el pedido con sus relaciones
     return pedido_service.obtener_pedido(pedido_id)
@@ -1,11 +1,27 @@
 # app/modules/pedidos/pedido_service.py
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from fastapi import HTTPException
 from app.modules.pedidos import pedido_model as models, pedido_schema as schemas
 from app.modules.productos import product_model as product_models # Usaremos este alias
 from app.modules.proveedores import proveedor_model as proveedor_models # Necesario para la validación/carga
+from app.modules.productos.product_service import get_variant_meta
+from app.core.sparse_fields import FieldSetParams
 from typing import List
 
+# PedidoResponse solo usa columnas del pedido y de sus líneas: no hace falta
+# cargar variantes, productos ni categorías para listarlos
+PEDIDO_LOAD_OPTIONS = (selectinload(models.Pedido.detalles),)
+
+# Campos de ?fields= / ?include= en el listado de pedidos (ver app/core/sparse_fields.py)
+PEDIDO_FIELDS = FieldSetParams(
+    models.Pedido,
+    columns=("proveedor_id", "fecha", "estado", "id"),
+    relations={
+        "detalles": ("variante_id", "cantidad", "precio_unitario"),
+        "proveedor": ("nombre", "telefono", "correo", "id"),
+    },
+)
+
 
 class PedidoService:
     def __init__(self, db: Session):
@@ -14,21 +30,19 @@ class PedidoService:
     # --- Función auxiliar para validar la pertenencia de productos a un proveedor ---
     def _validar_productos_de_proveedor(self, proveedor_id_pedido: int, detalles: List[schemas.DetallePedidoCreate]):
 
+        # Producto y proveedor de cada variante, desde la caché de metadatos (una consulta para las que falten)
+        metas = get_variant_meta(self.db, [detalle.variante_id for detalle in detalles])
         for detalle in detalles:
-            # Cargamos la variante y su producto asociado para poder acceder al proveedor_id del producto
-            variante = self.db.query(product_models.VarianteProducto)\
-                              .options(joinedload(product_models.VarianteProducto.producto))\
-                              .filter(product_models.VarianteProducto.id == detalle.variante_id)\
-                              .first()
+            variante = metas.get(detalle.variante_id)
 
             if not variante:
                 raise HTTPException(status_code=404, detail=f"Variante de producto con ID {detalle.variante_id} no encontrada.")
 
             # CRÍTICO: Comprobar que el proveedor del producto de la variante coincide con el proveedor del pedido
-            if variante.producto.proveedor_id != proveedor_id_pedido:
+            if variante.proveedor_id != proveedor_id_pedido:
                 raise HTTPException(
                     status_code=400,
-                    detail=f"El producto '{variante.producto.nombre}' (Variante ID: {variante.id}) no pertenece al proveedor seleccionado (ID: {proveedor_id_pedido})."
+                    detail=f"El producto '{variante.producto_nombre}' (Variante ID: {variante.id}) no pertenece al proveedor seleccionado (ID: {proveedor_id_pedido})."
                 )
 
     # --- Funciones CRUD de Pedidos ---
@@ -144,15 +158,11 @@ class PedidoService:
         self.db.commit()
         # No hay refresh ya que el objeto es eliminado
 
-    def obtener_pedidos(self, skip: int = 0, limit: int = 100):
+    def obtener_pedidos(self, skip: int = 0, limit: int = 100, options: tuple = PEDIDO_LOAD_OPTIONS):
         """
-        Obtiene una lista de todos los pedidos, cargando sus relaciones anidadas.
+        Obtiene una página de pedidos con sus detalles (o lo que indiquen `options`).
         """
         return self.db.query(models.Pedido)\
-                 .options(
-                     joinedload(models.Pedido.proveedor), # Carga el proveedor del pedido
-                     # Carga los detalles, su variante, el producto de la variante, la categoría y el proveedor del producto
-                     joinedload(models.Pedido.detalles).joinedload(models.DetallePedido.variante).joinedload(product_models.VarianteProducto.producto).joinedload(product_models.Producto.categorias),
-                     joinedload(models.Pedido.detalles).joinedload(models.DetallePedido.variante).joinedload(product_models.VarianteProducto.producto).joinedload(product_models.Producto.proveedor)
-                 )\
+                 .options(*options)\
+                 .order_by(models.Pedido.id)\
                  .offset(skip).limit(limit).all()
\ No newline at end of file
@@ -0,0 +1,284 @@
+# app/modules/productos/catalog_index.py
+"""
+Índice del catálogo en memoria para filtros y facetas de GET /products.
+
+Cada conjunto de productos es un bitmap (un `int` de Python: el bit N es el
+producto con id N), así que AND/OR entre categorías, stock y rangos de precio son
+operaciones sobre enteros:
+- un bitmap por categoría, uno de productos con stock y uno con todos;
+- los precios ordenados con bitmaps acumulados cada `STRIDE` posiciones, para
+  convertir un rango de precios en bitmap sin recorrer todo el catálogo.
+
+Se construye en la primera consulta con la sesión de la petición. Los commits que
+tocan productos/variantes (ver app/core/catalog_events.py) marcan esos ids y se
+recargan en la siguiente consulta. Si otro proceso cambia el catálogo
+(app/core/catalog_version.py) se reconstruye entero, como mucho cada
+MIN_REBUILD_INTERVAL segundos; y en todo caso cada CATALOG_INDEX_MAX_AGE.
+"""
+import bisect
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import catalog_events
+from app.core.catalog_version import catalog_version
+from app.modules.productos import product_model as models
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogFilter:
+    categoria_ids: Optional[List[int]] = None
+    match_all: bool = False  # True: el producto debe estar en todas las categorías
+    min_price: Optional[Decimal] = None
+    max_price: Optional[Decimal] = None
+    in_stock: bool = False
+
+    @property
+    def active(self) -> bool:
+        return bool(self.categoria_ids) or self.min_price is not None or self.max_price is not None or self.in_stock
+
+
+def bitmap_ids(bitmap: int) -> List[int]:
+    """Ids (ascendentes) de los bits activos."""
+    ids = []
+    while bitmap:
+        low = bitmap & -bitmap
+        ids.append(low.bit_length() - 1)
+        bitmap ^= low
+    return ids
+
+
+class CatalogIndex:
+    STRIDE = 64
+    MIN_REBUILD_INTERVAL = 2.0
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built_at: Optional[float] = None
+        self._stale = False
+        self._pending: set[int] = set()
+        self._products: Dict[int, tuple] = {}  # id -> (precio, categorías, stock total)
+        self._all = 0
+        self._in_stock = 0
+        self._categories: Dict[int, int] = {}
+        self._prices: List[Decimal] = []
+        self._price_ids: List[int] = []
+        self._price_checkpoints: List[int] = []
+        self._prices_dirty = True
+
+    # --- Mantenimiento ---
+
+    def invalidate(self, ids: Iterable[int]) -> None:
+        with self._lock:
+            self._pending.update(ids)
+
+    def on_catalog_change(self, change: catalog_events.CatalogChange) -> None:
+        self.invalidate(change.ids)
+
+    def mark_stale(self) -> None:
+        """Cambios de otro proceso (ids desconocidos): reconstruir en la próxima consulta."""
+        with self._lock:
+            self._stale = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._built_at = None
+
+    def _ensure_fresh(self, db: Session) -> None:
+        age = time.monotonic() - self._built_at if self._built_at is not None else None
+        if age is None or age > settings.CATALOG_INDEX_MAX_AGE or (self._stale and age > self.MIN_REBUILD_INTERVAL):
+            self._rebuild(db)
+        elif self._pending:
+            ids, self._pending = self._pending, set()
+            self._load(db, ids)
+
+    def _rebuild(self, db: Session) -> None:
+        start = time.perf_counter()
+        self._stale = False
+        self._pending = set()
+        self._products = {}
+        self._all = self._in_stock = 0
+        self._categories = {}
+        self._load(db, None)
+        self._built_at = time.monotonic()
+        logger.info(f"Índice de catálogo construido: {len(self._products)} productos en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def _load(self, db: Session, ids: Optional[set]) -> None:
+        """Carga todos los productos (`ids=None`) o recarga solo los indicados."""
+        products = sa.select(models.Producto.id, models.Producto.precio, models.Producto.total_stock)
+        categories = sa.select(models.producto_categoria.c.producto_id, models.producto_categoria.c.categoria_id)
+        if ids is not None:
+            id_list = list(ids)
+            products = products.where(models.Producto.id.in_(id_list))
+            categories = categories.where(models.producto_categoria.c.producto_id.in_(id_list))
+            for product_id in id_list:
+                self._remove(product_id)
+
+        cats_by_product: Dict[int, set] = {}
+        for product_id, categoria_id in db.execute(categories):
+            cats_by_product.setdefault(product_id, set()).add(categoria_id)
+        for product_id, precio, total_stock in db.execute(products):
+            self._add(product_id, precio, frozenset(cats_by_product.get(product_id, ())), total_stock)
+        self._prices_dirty = True
+
+    def _add(self, product_id: int, precio, categorias: frozenset, stock: int) -> None:
+        bit = 1 << product_id
+        self._products[product_id] = (Decimal(precio), categorias, stock)
+        self._all |= bit
+        if stock > 0:
+            self._in_stock |= bit
+        for categoria_id in categorias:
+            self._categories[categoria_id] = self._categories.get(categoria_id, 0) | bit
+
+    def _remove(self, product_id: int) -> None:
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        mask = ~(1 << product_id)
+        self._all &= mask
+        self._in_stock &= mask
+        for categoria_id in entry[1]:
+            remaining = self._categories[categoria_id] & mask
+            if remaining:
+                self._categories[categoria_id] = remaining
+            else:
+                del self._categories[categoria_id]
+
+    def _rebuild_prices(self) -> None:
+        ordered = sorted((entry[0], product_id) for product_id, entry in self._products.items())
+        self._prices = [precio for precio, _ in ordered]
+        self._price_ids = [product_id for _, product_id in ordered]
+        checkpoints, acc = [0], 0
+        for position, product_id in enumerate(self._price_ids, 1):
+            acc |= 1 << product_id
+            if position % self.STRIDE == 0:
+                checkpoints.append(acc)
+        self._price_checkpoints = checkpoints
+        self._prices_dirty = False
+
+    # --- Consultas ---
+
+    def _prefix(self, position: int) -> int:
+        """Bitmap de los `position` productos más baratos."""
+        block = position // self.STRIDE
+        bitmap = self._price_checkpoints[block]
+        for product_id in self._price_ids[block * self.STRIDE:position]:
+            bitmap |= 1 << product_id
+        return bitmap
+
+    def _price_range(self, min_price: Optional[Decimal], max_price: Optional[Decimal]) -> int:
+        if self._prices_dirty:
+            self._rebuild_prices()
+        lo = bisect.bisect_left(self._prices, min_price) if min_price is not None else 0
+        hi = bisect.bisect_right(self._prices, max_price) if max_price is not None else len(self._prices)
+        if lo >= hi:
+            return 0
+        return self._prefix(hi) ^ self._prefix(lo)
+
+    def _price_bounds(self, selection: int) -> tuple:
+        """
+        (precio mínimo, precio máximo) de `selection` sin recorrer sus ids: los bitmaps
+        acumulados dicen en qué bloque de STRIDE posiciones (en orden de precio) cae el
+        primer y el último seleccionado, y solo se revisa ese bloque.
+        """
+        if not selection:
+            return None, None
+        if self._prices_dirty:
+            self._rebuild_prices()
+        checkpoints, total = self._price_checkpoints, len(self._price_ids)
+        blocks = range(1, len(checkpoints))
+        # Primer bloque acumulado que ya contiene algún seleccionado (el más barato está en él)
+        block = bisect.bisect_left(blocks, True, key=lambda k: bool(checkpoints[k] & selection)) + 1
+        cheapest = next(
+            position for position in range((block - 1) * self.STRIDE, min(block * self.STRIDE, total))
+            if selection >> self._price_ids[position] & 1
+        )
+        # Primer bloque acumulado que los contiene a todos (el más caro está en él)
+        block = bisect.bisect_left(blocks, True, key=lambda k: not selection & ~checkpoints[k]) + 1
+        priciest = next(
+            position for position in range(min(block * self.STRIDE, total) - 1, (block - 1) * self.STRIDE - 1, -1)
+            if selection >> self._price_ids[position] & 1
+        )
+        return self._prices[cheapest], self._prices[priciest]
+
+    def _base(self, f: CatalogFilter) -> int:
+        bitmap = self._in_stock if f.in_stock else self._all
+        if f.min_price is not None or f.max_price is not None:
+            bitmap &= self._price_range(f.min_price, f.max_price)
+        return bitmap
+
+    def _category_bitmap(self, categoria_ids: List[int], match_all: bool) -> int:
+        bitmaps = [self._categories.get(categoria_id, 0) for categoria_id in categoria_ids]
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            result = result & bitmap if match_all else result | bitmap
+        return result
+
+    def filter(self, db: Session, f: CatalogFilter) -> List[int]:
+        """Ids de los productos que cumplen el filtro, en orden ascendente."""
+        with self._lock:
+            self._ensure_fresh(db)
+            bitmap = self._base(f)
+            if f.categoria_ids:
+                bitmap &= self._category_bitmap(f.categoria_ids, f.match_all)
+        return bitmap_ids(bitmap)
+
+    def facets(self, db: Session, f: CatalogFilter) -> dict:
+        """
+        Conteos para la selección actual. Con OR, el conteo de cada categoría ignora el
+        filtro de categorías (cuántos productos aportaría marcarla); con AND, lo respeta.
+        """
+        with self._lock:
+            self._ensure_fresh(db)
+            base = self._base(f)
+            selection = base
+            if f.categoria_ids:
+                selection &= self._category_bitmap(f.categoria_ids, f.match_all)
+            scope = selection if f.match_all else base
+            categorias = [
+                {"id": categoria_id, "count": count}
+                for categoria_id, bitmap in sorted(self._categories.items())
+                if (count := (bitmap & scope).bit_count())
+            ]
+            precio_min, precio_max = self._price_bounds(selection)
+            return {
+                "total": selection.bit_count(),
+                "in_stock": (selection & self._in_stock).bit_count(),
+                "precio_min": precio_min,
+                "precio_max": precio_max,
+                "categorias": categorias,
+            }
+
+
+catalog_index = CatalogIndex()
+
+
+def _producto_keys(producto) -> tuple:
+    state = sa.inspect(producto)
+    # En after_flush un producto recién insertado aún no tiene identidad (se asigna al
+    # terminar el flush), pero el INSERT ya dejó su id en el estado. Sin esto las altas
+    # se notificaban sin ids y no entraban en el índice hasta la reconstrucción completa.
+    return state.identity or (state.dict.get("id"),)
+
+
+# Se leen el estado y el historial ya cargados, sin disparar consultas durante el flush
+catalog_events.track(models.Producto, _producto_keys)
+catalog_events.track(
+    models.VarianteProducto,
+    lambda variante: (
+        sa.inspect(variante).dict.get("producto_id"),
+        *sa.inspect(variante).attrs.producto_id.history.deleted,
+    ),
+    volatile=("stock",),
+)
+catalog_events.subscribe(catalog_index.on_catalog_change)
+catalog_version.on_remote_change(catalog_index.mark_stale)
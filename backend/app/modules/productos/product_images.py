@@ -0,0 +1,343 @@
+# app/modules/productos/product_images.py
+"""
+Derivados de las imágenes de producto: copias redimensionadas a los anchos de
+IMAGE_VARIANT_WIDTHS, en WebP (y AVIF si se configura), sin metadatos (EXIF, GPS,
+perfiles de color: se convierten a sRGB antes de descartarlos).
+
+Se generan al subir la imagen en un ProcessPoolExecutor: decodificar y comprimir
+es CPU puro y retiene el GIL, así que en un hilo frenaría al resto de peticiones
+del worker. Los archivos van a `static/images/derived/` y el producto guarda sus
+rutas (relativas a /static, como `image_url`) en `image_variants`:
+
+    {"webp": {"320": "images/derived/<nombre>-320-<ajustes>.webp", "640": "...", ...}}
+
+`<ajustes>` es una huella de la codificación (formato, calidad, Pillow): con otros
+ajustes el derivado tiene otro nombre, así que un nombre nunca cambia de bytes y
+/static lo sirve como `immutable` (app/core/media.py).
+
+Nunca se amplía: los anchos mayores que el original se reducen al ancho original.
+
+Imágenes subidas antes de existir los derivados:
+
+    python -m app.modules.productos.product_images backfill [--force] [--workers N]
+
+Archivos que ya no usa ningún producto (solo los lista salvo con --delete):
+
+    python -m app.modules.productos.product_images gc [--delete] [--min-age SEGUNDOS]
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional, Sequence
+
+from fastapi import HTTPException
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from app.config import settings
+
+try:
+    from PIL import ImageCms
+except ImportError:  # Pillow sin LittleCMS: los perfiles de color se descartan sin convertir
+    ImageCms = None
+
+logger = logging.getLogger(__name__)
+
+# Mismo directorio que UPLOAD_DIRECTORY de product_service; este módulo no lo importa
+# para que los procesos del pool (spawn) no carguen la base de datos.
+STATIC_DIRECTORY = Path(__file__).resolve().parent.parent.parent / "static"
+IMAGES_DIRECTORY = STATIC_DIRECTORY / "images"
+DERIVED_DIRECTORY = IMAGES_DIRECTORY / "derived"
+
+_SAVE_OPTIONS = {"webp": {"format": "WEBP", "method": 4}, "avif": {"format": "AVIF"}}
+# Subir si cambia cómo se generan los derivados (redimensionado, conversión de color...)
+_RENDER_REVISION = 1
+
+
+# --- Trabajo de cada proceso del pool ---
+def image_path(image_url: str) -> Path:
+    """Ruta en disco de una `image_url` local ("images/<archivo>"); ValueError si sale de static/images."""
+    path = (STATIC_DIRECTORY / image_url).resolve()
+    if path.parent != IMAGES_DIRECTORY.resolve():
+        raise ValueError(f"Imagen fuera de {IMAGES_DIRECTORY}: {image_url}")
+    return path
+
+
+def _to_srgb(img: Image.Image) -> Image.Image:
+    """Orientación EXIF aplicada, colores en sRGB y modo RGB/RGBA, sin metadatos."""
+    img = ImageOps.exif_transpose(img)  # antes de descartar el EXIF
+    alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+    mode = "RGBA" if alpha else "RGB"
+    icc = img.info.get("icc_profile")
+    if icc and ImageCms is not None and img.mode in ("RGB", "RGBA", "CMYK"):
+        try:
+            img = ImageCms.profileToProfile(
+                img, ImageCms.ImageCmsProfile(io.BytesIO(icc)), ImageCms.createProfile("sRGB"), outputMode=mode
+            )
+        except (ImageCms.PyCMSError, OSError):
+            pass  # perfil ilegible: se usan los valores tal cual
+    img = img.convert(mode)
+    img.info = {}
+    return img
+
+
+def settings_fingerprint(fmt: str, quality: int) -> str:
+    """8 hex que identifican cómo se codificó un derivado (va en su nombre)."""
+    raw = f"{_RENDER_REVISION}:{fmt}:{quality}:{sorted(_SAVE_OPTIONS[fmt].items())}:{Image.__version__}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:8]
+
+
+def _save(img: Image.Image, path: Path, fmt: str, quality: int) -> None:
+    tmp = path.with_name(f".{path.name}.part")
+    img.save(tmp, quality=quality, **_SAVE_OPTIONS[fmt])
+    os.replace(tmp, path)  # nunca se sirve un derivado a medio escribir
+
+
+def render_variants(image_url: str, widths: Sequence[int], formats: Sequence[str], quality: int) -> dict:
+    """Genera los derivados de una imagen y devuelve su `image_variants`. Se ejecuta en el pool."""
+    source = image_path(image_url)
+    DERIVED_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    try:
+        with Image.open(source) as original:
+            largest = max(widths)
+            original.draft(None, (largest, largest))  # JPEG: decodificar ya a escala reducida
+            img = _to_srgb(original)
+    except UnidentifiedImageError:
+        raise
+    except OSError as e:  # cabecera válida pero datos truncados o corruptos
+        raise UnidentifiedImageError(f"No se pudo decodificar {image_url}: {e}") from e
+
+    stem = source.stem
+    fingerprints = {fmt: settings_fingerprint(fmt, quality) for fmt in formats}
+    variants = {fmt: {} for fmt in formats}
+    done = set()
+    for width in sorted(widths):
+        width = min(width, img.width)
+        if width in done:
+            continue
+        done.add(width)
+        resized = img if width == img.width else img.resize(
+            (width, max(1, round(img.height * width / img.width))), Image.Resampling.LANCZOS, reducing_gap=3.0
+        )
+        for fmt in formats:
+            name = f"{stem}-{width}-{fingerprints[fmt]}.{fmt}"
+            _save(resized, DERIVED_DIRECTORY / name, fmt, quality)
+            variants[fmt][str(width)] = f"images/derived/{name}"
+    return variants
+
+
+# --- Lado del servidor ---
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn y no fork: el proceso principal tiene hilos (threadpool, importaciones)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers or settings.IMAGE_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def variant_formats() -> list:
+    """Formatos configurados que este Pillow sabe codificar."""
+    formats = []
+    for fmt in settings.IMAGE_VARIANT_FORMATS:
+        if fmt in _SAVE_OPTIONS and features.check(fmt):
+            formats.append(fmt)
+        else:
+            logger.warning(f"Formato de derivado no disponible en este Pillow: {fmt}")
+    return formats
+
+
+def _job_args() -> Optional[tuple]:
+    formats = variant_formats()
+    if not settings.IMAGE_VARIANTS_ENABLED or not formats or not settings.IMAGE_VARIANT_WIDTHS:
+        return None
+    return tuple(settings.IMAGE_VARIANT_WIDTHS), tuple(formats), settings.IMAGE_VARIANT_QUALITY
+
+
+async def create_variants(image_url: str) -> Optional[dict]:
+    """
+    Derivados de una imagen recién subida (None si están desactivados o fallan por
+    un motivo nuestro: la imagen original se sigue usando). Si el archivo no es una
+    imagen que Pillow pueda decodificar se responde 400; el archivo no se borra aquí
+    (con nombres por contenido podría ser de otro producto): lo recoge el `gc`.
+    """
+    args = _job_args()
+    if args is None:
+        return None
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_pool(), render_variants, image_url, *args)
+    except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+        logger.warning(f"Imagen rechazada {image_url}: {e}")
+        raise HTTPException(status_code=400, detail="El archivo no es una imagen válida")
+    except BrokenProcessPool:
+        logger.exception("El pool de imágenes se rompió; se recrea en la próxima subida")
+        shutdown_pool()
+    except Exception:
+        logger.exception(f"No se pudieron generar los derivados de {image_url}")
+    return None
+
+
+# --- CLI: backfill de las imágenes existentes ---
+def backfill(force: bool = False, workers: Optional[int] = None) -> None:
+    import sqlalchemy as sa
+
+    from app.core import catalog_events
+    from app.database import SessionLocal
+    from app.modules.productos.product_model import Producto
+
+    args = _job_args()
+    if args is None:
+        print("Derivados desactivados (IMAGE_VARIANTS_ENABLED / IMAGE_VARIANT_FORMATS)")
+        return
+    productos = Producto.__table__  # Core: no hace falta configurar el resto de modelos
+    with SessionLocal() as db:
+        query = sa.select(productos.c.image_url).where(productos.c.image_url.like("images/%")).distinct()
+        if not force:
+            query = query.where(productos.c.image_variants.is_(None))
+        urls, missing = [], 0
+        for url in db.scalars(query):
+            try:
+                exists = image_path(url).is_file()
+            except ValueError:
+                exists = False
+            if exists:
+                urls.append(url)
+            else:
+                missing += 1
+                print(f"  sin archivo: {url}")
+        print(f"{len(urls)} imágenes a procesar ({missing} sin archivo)")
+
+        pool = _get_pool(workers)
+        futures = {pool.submit(render_variants, url, *args): url for url in urls}
+        done = failed = 0
+        try:
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    variants = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"  error en {url}: {e}")
+                    continue
+                ids = db.scalars(
+                    sa.update(productos).where(productos.c.image_url == url)
+                    .values(image_variants=variants).returning(productos.c.id)
+                ).all()
+                catalog_events.mark_dirty(db, ids)
+                done += 1
+                if done % 50 == 0:
+                    db.commit()
+                    print(f"  {done}/{len(urls)}")
+            db.commit()
+        finally:
+            shutdown_pool()
+    print(f"Listo: {done} procesadas, {failed} con error")
+
+
+# --- CLI: recolección de imágenes huérfanas ---
+def collect_garbage(delete: bool = False, min_age: float = 3600.0) -> None:
+    """
+    Cuenta cuántos productos usan cada archivo de static/images y static/images/derived
+    (`image_url` e `image_variants`) y borra los que no usa ninguno, además de los
+    temporales de subidas interrumpidas. Sin `delete` solo lista lo que borraría.
+    Los archivos modificados hace menos de `min_age` segundos no se tocan: una subida
+    se guarda antes de asociarse al producto (y reusar un archivo renueva su fecha).
+    """
+    import time
+    from collections import Counter
+
+    import sqlalchemy as sa
+
+    from app.database import SessionLocal
+    from app.modules.productos.product_model import Producto
+
+    productos = Producto.__table__
+    refs = Counter()
+    with SessionLocal() as db:
+        rows = db.execute(sa.select(productos.c.image_url, productos.c.image_variants)
+                          .execution_options(yield_per=1000))
+        for image_url, image_variants in rows:
+            if image_url:
+                refs[image_url] += 1
+            for by_width in (image_variants or {}).values():
+                for url in by_width.values():
+                    refs[url] += 1
+
+    cutoff = time.time() - min_age
+    orphans, kept, recent = [], 0, 0
+    for directory, prefix in ((IMAGES_DIRECTORY, "images/"), (DERIVED_DIRECTORY, "images/derived/")):
+        if not directory.is_dir():
+            continue
+        for path in directory.iterdir():
+            if not path.is_file():
+                continue
+            if refs[prefix + path.name]:
+                kept += 1
+                continue
+            stat = path.stat()
+            if stat.st_mtime > cutoff:
+                recent += 1
+                continue
+            orphans.append((path, stat.st_size))
+
+    missing = sum(1 for url in refs if url.startswith("images/") and not (STATIC_DIRECTORY / url).is_file())
+    shared = sum(1 for count in refs.values() if count > 1)
+    print(f"{kept} archivos en uso ({shared} compartidos por varios productos), "
+          f"{recent} recientes sin referencia, {missing} referencias sin archivo")
+    freed = 0
+    for path, size in orphans:
+        print(f"  {'borrado' if delete else 'huérfano'}: {path.relative_to(STATIC_DIRECTORY)} ({size / 1024:.0f} KB)")
+        if delete:
+            path.unlink(missing_ok=True)
+        freed += size
+    verb = "Liberados" if delete else "Se liberarían (usar --delete para borrar)"
+    print(f"{verb}: {len(orphans)} archivos, {freed / 2**20:.1f} MB")
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(prog="python -m app.modules.productos.product_images",
+                                     description="Derivados de las imágenes de producto")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = sub.add_parser("backfill", help="Genera los derivados de las imágenes ya subidas")
+    backfill_parser.add_argument("--force", action="store_true", help="Regenerar también los que ya existen")
+    backfill_parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto IMAGE_PROCESS_WORKERS)")
+    gc_parser = sub.add_parser("gc", help="Borra las imágenes que no usa ningún producto")
+    gc_parser.add_argument("--delete", action="store_true", help="Borrar (por defecto solo se listan)")
+    gc_parser.add_argument("--min-age", type=float, default=3600.0,
+                           help="Segundos desde la última modificación para considerar un archivo (por defecto 3600)")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        backfill(force=args.force, workers=args.workers)
+    elif args.command == "gc":
+        collect_garbage(delete=args.delete, min_age=args.min_age)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+# app/modules/productos/product_import_model.py
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, JSON, func
+from app.database import Base
+
+
+class ImportJob(Base):
+    """Importación masiva de productos (POST /products/import), reanudable por lotes."""
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(20), nullable=False, default="pending", index=True)  # pending, running, completed, failed
+    claim_token = Column(String(32), nullable=True)  # proceso que lo ejecuta: se comprueba en cada punto de control
+    format = Column(String(10), nullable=False)  # csv, ndjson
+    filename = Column(String, nullable=True)  # nombre original del archivo subido
+    path = Column(String, nullable=False)  # copia en disco de la que se lee (y se reanuda)
+    size_bytes = Column(BigInteger, nullable=False, default=0)
+
+    # Punto de control: se guarda en la misma transacción que cada lote insertado
+    bytes_processed = Column(BigInteger, nullable=False, default=0)
+    rows_processed = Column(Integer, nullable=False, default=0)
+    rows_imported = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=True)  # [{"fila": n, "error": "..."}], hasta IMPORT_MAX_ERRORS
+    error_message = Column(Text, nullable=True)  # error que detuvo el trabajo
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())  # latido del proceso que lo ejecuta
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def progress(self) -> float:
+        """Fracción del archivo ya procesada (0-1)."""
+        if self.status == "completed":
+            return 1.0
+        return round(self.bytes_processed / self.size_bytes, 4) if self.size_bytes else 0.0
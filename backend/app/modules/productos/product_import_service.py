@@ -0,0 +1,436 @@
+# app/modules/productos/product_import_service.py
+"""
+Importación masiva de productos (POST /products/import).
+
+El archivo subido se guarda en IMPORT_DIRECTORY y se procesa en segundo plano,
+leyéndolo en streaming y escribiendo por lotes de IMPORT_BATCH_SIZE filas.
+Formatos:
+
+- CSV con cabecera: nombre, descripcion, precio, proveedor_id, categoria_ids,
+  variantes y, opcional, image_url. `categoria_ids` separa los ids con "|"
+  (1|4|7); `variantes` separa las variantes con "|" y sus campos con ":"
+  (rojo:M:10|azul:L:0).
+- NDJSON (JSON Lines): un objeto por línea con la forma de ProductCreate.
+
+Cada fila se valida con ProductCreate y contra los ids de categorías y
+proveedores cargados al empezar (ninguna consulta por fila). Los productos se
+insertan con un INSERT multi-fila con RETURNING; variantes y enlaces
+producto-categoría, con INSERT multi-fila o con COPY en PostgreSQL (psycopg2).
+Las filas inválidas se saltan y quedan anotadas en el trabajo.
+
+Cada lote se confirma junto con el punto de control del trabajo (bytes y filas
+leídos), así que un trabajo interrumpido se reanuda desde el último lote sin
+duplicar productos: al arrancar (IMPORT_RESUME_ON_STARTUP) o con
+POST /products/import/{id}/resume.
+
+Quien toma el trabajo le pone su `claim_token` y cada punto de control (que
+además es el latido en `updated_at`) solo se guarda si el token sigue siendo el
+suyo. Si un proceso lento pierde el trabajo porque otro lo retomó por inactivo,
+su lote se deshace y se detiene: dos procesos nunca insertan las mismas filas.
+"""
+import csv
+import io
+import json
+import logging
+import re
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import sqlalchemy as sa
+from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import catalog_events
+from app.database import SessionLocal
+from app.modules.categorias import categoria_model as categoria_models
+from app.modules.productos import product_model as models
+from app.modules.productos import product_schema as schemas
+from app.modules.productos.product_import_model import ImportJob
+from app.modules.productos.product_search_service import ProductSearchService
+from app.modules.proveedores import proveedor_model as proveedor_models
+
+logger = logging.getLogger(__name__)
+
+# Copias de los archivos subidos (no se sirven como estáticos); se borran al terminar
+IMPORT_DIRECTORY = Path(__file__).resolve().parent.parent.parent / "imports"
+
+CSV_COLUMNS = ("nombre", "descripcion", "precio", "proveedor_id", "categoria_ids", "variantes")
+_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+_ID_SEPARATORS = re.compile(r"[|;,]")
+
+# Un solo hilo: las importaciones se ejecutan de una en una por proceso
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="product-import")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ImportClaimLost(Exception):
+    """Otro proceso retomó el trabajo: este deja de escribir."""
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+            for e in error.errors()
+        )
+    if isinstance(error, sa.exc.DBAPIError):
+        return str(error.orig).strip()
+    return str(error)
+
+
+# --- Lectura en streaming: (fila, posición en bytes tras la fila, datos o error) ---
+
+def _read_lines(f, position: list) -> Iterator[str]:
+    for raw in f:
+        position[0] += len(raw)
+        yield raw.decode("utf-8")
+
+
+def _csv_record(header: List[str], values: List[str]) -> dict:
+    if len(values) != len(header):
+        raise ValueError(f"Se esperaban {len(header)} columnas y hay {len(values)}")
+    data = {key: value.strip() for key, value in zip(header, values)}
+    data["categoria_ids"] = [part.strip() for part in _ID_SEPARATORS.split(data["categoria_ids"]) if part.strip()]
+    variantes = []
+    for item in (part.strip() for part in data["variantes"].split("|")):
+        if not item:
+            continue
+        fields = [field.strip() for field in item.split(":")]
+        if len(fields) not in (2, 3):
+            raise ValueError(f"Variante '{item}' no tiene el formato color:talla:stock")
+        variantes.append(dict(zip(("color", "talla", "stock"), fields)))
+    data["variantes"] = variantes
+    data["image_url"] = data.get("image_url") or None
+    return data
+
+
+def _iter_csv(f, offset: int, row: int) -> Iterator[Tuple[int, int, object]]:
+    first = f.readline()
+    header = [column.strip().lower() for column in next(csv.reader([first.decode("utf-8-sig")]), [])]
+    missing = [column for column in CSV_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"Faltan columnas en el CSV: {', '.join(missing)}")
+    position = [max(offset, len(first))]
+    f.seek(position[0])
+    for values in csv.reader(_read_lines(f, position)):
+        if not any(value.strip() for value in values):
+            continue
+        row += 1
+        try:
+            yield row, position[0], _csv_record(header, values)
+        except ValueError as e:
+            yield row, position[0], e
+
+
+def _iter_ndjson(f, offset: int, row: int) -> Iterator[Tuple[int, int, object]]:
+    f.seek(offset)
+    position = offset
+    for raw in f:
+        position += len(raw)
+        line = raw.decode("utf-8").lstrip("\ufeff").strip()
+        if not line:
+            continue
+        row += 1
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("Cada línea debe ser un objeto JSON")
+        except ValueError as e:
+            yield row, position, e
+            continue
+        yield row, position, data
+
+
+_READERS = {"csv": _iter_csv, "ndjson": _iter_ndjson}
+
+
+class ProductImportService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.claim_token: Optional[str] = None
+
+    # --- Trabajos ---
+
+    def create_job(self, file: UploadFile, format: Optional[str] = None) -> ImportJob:
+        """Guarda el archivo subido y registra el trabajo (pendiente)."""
+        format = format or _FORMATS.get(Path(file.filename or "").suffix.lower())
+        if format not in _READERS:
+            raise HTTPException(status_code=400, detail="Formato no reconocido: usa un archivo .csv o .ndjson (o el parámetro format)")
+        IMPORT_DIRECTORY.mkdir(parents=True, exist_ok=True)
+        path = IMPORT_DIRECTORY / f"{uuid.uuid4().hex}.{format}"
+        with open(path, "wb") as out:
+            shutil.copyfileobj(file.file, out, 1024 * 1024)
+        job = ImportJob(
+            status="pending",
+            format=format,
+            filename=file.filename,
+            path=str(path),
+            size_bytes=path.stat().st_size,
+            bytes_processed=0,
+            rows_processed=0,
+            rows_imported=0,
+            error_count=0,
+            errors=[],
+            updated_at=_now(),
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        logger.info(f"Importación {job.id} registrada: {file.filename} ({job.size_bytes} bytes, {format})")
+        return job
+
+    def get_job(self, job_id: int) -> ImportJob:
+        job = self.db.get(ImportJob, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Importación no encontrada")
+        return job
+
+    def request_resume(self, job_id: int) -> ImportJob:
+        """Vuelve a poner en cola un trabajo fallido o interrumpido."""
+        job = self.get_job(job_id)
+        if job.status == "completed":
+            raise HTTPException(status_code=409, detail="La importación ya terminó")
+        if job.status == "running" and job.updated_at and not self._is_stale(job.updated_at):
+            raise HTTPException(status_code=409, detail="La importación está en curso")
+        if not Path(job.path).exists():
+            raise HTTPException(status_code=409, detail="El archivo de la importación ya no existe")
+        job.status = "pending"
+        job.error_message = None
+        job.updated_at = _now()
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    @staticmethod
+    def _is_stale(updated_at: datetime) -> bool:
+        if updated_at.tzinfo is None:  # SQLite devuelve fechas sin zona (UTC)
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        return updated_at < _now() - timedelta(seconds=settings.IMPORT_STALE_SECONDS)
+
+    def _claim(self, job_id: int) -> bool:
+        """Marca el trabajo como en curso, a nombre de este proceso, si nadie más lo está ejecutando."""
+        cutoff = _now() - timedelta(seconds=settings.IMPORT_STALE_SECONDS)
+        token = uuid.uuid4().hex
+        result = self.db.execute(
+            sa.update(ImportJob)
+            .where(ImportJob.id == job_id)
+            .where(sa.or_(
+                ImportJob.status == "pending",
+                sa.and_(ImportJob.status == "running", ImportJob.updated_at < cutoff),
+            ))
+            .values(status="running", claim_token=token, updated_at=_now())
+        )
+        self.db.commit()
+        if result.rowcount != 1:
+            return False
+        self.claim_token = token
+        return True
+
+    def _heartbeat(self, job: ImportJob) -> None:
+        """
+        Renueva `updated_at` si el trabajo sigue siendo de este proceso; si no,
+        lanza ImportClaimLost antes del commit y el lote en curso se deshace.
+        """
+        result = self.db.execute(
+            sa.update(ImportJob)
+            .where(ImportJob.id == job.id, ImportJob.claim_token == self.claim_token)
+            .values(updated_at=_now())
+        )
+        if result.rowcount != 1:
+            raise ImportClaimLost(f"Importación {job.id}: la retomó otro proceso")
+
+    def resumable_job_ids(self) -> List[int]:
+        cutoff = _now() - timedelta(seconds=settings.IMPORT_STALE_SECONDS)
+        return list(self.db.execute(
+            sa.select(ImportJob.id)
+            .where(sa.or_(
+                ImportJob.status == "pending",
+                sa.and_(ImportJob.status == "running", ImportJob.updated_at < cutoff),
+            ))
+            .order_by(ImportJob.id)
+        ).scalars())
+
+    # --- Ejecución ---
+
+    def run(self, job_id: int) -> None:
+        if not self._claim(job_id):
+            logger.info(f"Importación {job_id}: ya terminada o en curso en otro proceso")
+            return
+        job = self.db.get(ImportJob, job_id)
+        logger.info(f"Importación {job.id}: empieza en la fila {job.rows_processed + 1} (byte {job.bytes_processed})")
+        # Ids válidos precargados: la validación de cada fila no consulta la base de datos
+        self.categoria_ids = set(self.db.execute(sa.select(categoria_models.Categoria.id)).scalars())
+        self.proveedor_ids = set(self.db.execute(sa.select(proveedor_models.Proveedor.id)).scalars())
+        self.db.commit()
+
+        batch = []
+        with open(job.path, "rb") as f:
+            for row, position, data in _READERS[job.format](f, job.bytes_processed, job.rows_processed):
+                batch.append((row, position) + self._validate(data))
+                if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                    self._write_batch(job, batch)
+                    batch = []
+        self._write_batch(job, batch)
+
+        self._heartbeat(job)
+        job.status = "completed"
+        job.finished_at = _now()
+        self.db.commit()
+        Path(job.path).unlink(missing_ok=True)
+        logger.info(
+            f"Importación {job.id} completada: {job.rows_imported} productos, "
+            f"{job.error_count} filas con errores de {job.rows_processed}"
+        )
+
+    def _validate(self, data) -> Tuple[Optional[schemas.ProductCreate], Optional[str]]:
+        if isinstance(data, Exception):
+            return None, _describe(data)
+        try:
+            product = schemas.ProductCreate.model_validate(data)
+        except ValidationError as e:
+            return None, _describe(e)
+        missing = set(product.categoria_ids) - self.categoria_ids
+        if missing:
+            return None, f"Categorías con IDs {sorted(missing)} no encontradas"
+        if product.proveedor_id not in self.proveedor_ids:
+            return None, f"Proveedor con ID {product.proveedor_id} no encontrado"
+        return product, None
+
+    def _write_batch(self, job: ImportJob, batch: list) -> None:
+        """Inserta el lote y guarda el punto de control en la misma transacción."""
+        if not batch:
+            return
+        products = [product for _, _, product, _ in batch if product is not None]
+        try:
+            self._insert_products(products)
+            self._checkpoint(job, batch[-1], len(products), [(row, error) for row, _, _, error in batch if error])
+            self.db.commit()
+            return
+        except sa.exc.DBAPIError as e:
+            self.db.rollback()
+            logger.warning(f"Importación {job.id}: el lote falló ({_describe(e)}); se reintenta fila a fila")
+        # Fila a fila, con punto de control en cada una: solo se pierden las filas que fallan
+        for entry in batch:
+            row, _, product, error = entry
+            if product is not None:
+                try:
+                    self._insert_products([product])
+                except sa.exc.DBAPIError as e:
+                    self.db.rollback()
+                    product, error = None, _describe(e)
+            self._checkpoint(job, entry, 1 if product is not None else 0, [(row, error)] if error else [])
+            self.db.commit()
+
+    def _checkpoint(self, job: ImportJob, last_entry: tuple, imported: int, errors: list) -> None:
+        self._heartbeat(job)
+        job.rows_processed, job.bytes_processed = last_entry[0], last_entry[1]
+        job.rows_imported += imported
+        job.error_count += len(errors)
+        stored = list(job.errors or [])
+        room = settings.IMPORT_MAX_ERRORS - len(stored)
+        if errors and room > 0:
+            job.errors = stored + [{"fila": row, "error": error} for row, error in errors[:room]]
+
+    def _insert_products(self, products: List[schemas.ProductCreate]) -> None:
+        if not products:
+            return
+        ids = self.db.execute(
+            sa.insert(models.Producto).returning(models.Producto.id, sort_by_parameter_order=True),
+            [
+                {
+                    "nombre": product.nombre,
+                    "descripcion": product.descripcion,
+                    "precio": product.precio,
+                    "proveedor_id": product.proveedor_id,
+                    "image_url": product.image_url,
+                }
+                for product in products
+            ],
+        ).scalars().all()
+        self._bulk_insert(models.producto_categoria, [
+            {"producto_id": product_id, "categoria_id": categoria_id}
+            for product_id, product in zip(ids, products)
+            for categoria_id in dict.fromkeys(product.categoria_ids)
+        ])
+        self._bulk_insert(models.VarianteProducto.__table__, [
+            {"producto_id": product_id, "color": variant.color, "talla": variant.talla, "stock": variant.stock}
+            for product_id, product in zip(ids, products)
+            for variant in product.variantes
+        ])
+        ProductSearchService(self.db).index_products(
+            {"id": product_id, "nombre": product.nombre, "descripcion": product.descripcion}
+            for product_id, product in zip(ids, products)
+        )
+        # Inserciones fuera de la unidad de trabajo del ORM: avisamos a índice y cachés
+        catalog_events.mark_dirty(self.db, ids)
+
+    def _bulk_insert(self, table: sa.Table, rows: List[dict]) -> None:
+        if not rows:
+            return
+        bind = self.db.get_bind()
+        if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2":
+            self._copy(table, rows)
+        else:
+            # executemany: el dialecto lo agrupa en INSERT multi-fila
+            self.db.execute(table.insert(), rows)
+
+    def _copy(self, table: sa.Table, rows: List[dict]) -> None:
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        # QUOTE_ALL: en COPY ... CSV un campo vacío sin comillas es NULL; entre comillas, ''
+        csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows([row[column] for column in columns] for row in rows)
+        buffer.seek(0)
+        dbapi_connection = self.db.connection().connection.dbapi_connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+# --- Ejecución en segundo plano ---
+
+def run_import_job(job_id: int) -> None:
+    with SessionLocal() as db:
+        service = ProductImportService(db)
+        try:
+            service.run(job_id)
+        except ImportClaimLost as e:
+            db.rollback()
+            logger.warning(str(e))
+        except Exception as e:
+            logger.exception(f"Importación {job_id} fallida")
+            db.rollback()
+            failed = sa.update(ImportJob).where(ImportJob.id == job_id)
+            if service.claim_token is not None:
+                # No marcar como fallido un trabajo que ya ejecuta otro proceso
+                failed = failed.where(ImportJob.claim_token == service.claim_token)
+            db.execute(failed.values(status="failed", error_message=_describe(e), updated_at=_now()))
+            db.commit()
+
+
+def submit_import_job(job_id: int) -> None:
+    _executor.submit(run_import_job, job_id)
+
+
+def _resume_pending_jobs() -> None:
+    try:
+        with SessionLocal() as db:
+            job_ids = ProductImportService(db).resumable_job_ids()
+    except sa.exc.DBAPIError as e:
+        logger.warning(f"No se pudieron consultar las importaciones pendientes: {_describe(e)}")
+        return
+    for job_id in job_ids:
+        logger.info(f"Reanudando importación {job_id}")
+        run_import_job(job_id)
+
+
+def resume_import_jobs() -> None:
+    """Encola las importaciones pendientes o interrumpidas (se llama al arrancar)."""
+    _executor.submit(_resume_pending_jobs)
@@ -10,7 +10,7 @@ producto_categoria = Table(
     'producto_categoria',
     Base.metadata,
     Column('producto_id', Integer, ForeignKey('productos.id'), primary_key=True),
-    Column('categoria_id', Integer, ForeignKey('categorias.id'), primary_key=True)
+    Column('categoria_id', Integer, ForeignKey('categorias.id'), primary_key=True, index=True)
 )
 
 class Producto(Base):
@@ -20,20 +20,35 @@ class Producto(Base):
     nombre = Column(String, nullable=False)
     descripcion = Column(String, nullable=False)
     precio = Column(Numeric(10, 2), nullable=False)
-    proveedor_id = Column(Integer, ForeignKey("proveedor.id"), nullable=False)
+    proveedor_id = Column(Integer, ForeignKey("proveedor.id"), nullable=False, index=True)
     image_url = sa.Column(sa.String, nullable=True)
+    # Derivados de la imagen: {"webp": {"320": "images/derived/...", ...}} (ver product_images.py)
+    image_variants = sa.Column(sa.JSON(none_as_null=True), nullable=True)
+    # Resumen de las variantes, al día en cada commit (ver product_summary.py): las
+    # tarjetas y los listados no necesitan leer variantes_producto
+    total_stock = Column(Integer, nullable=False, default=0, server_default="0")
+    in_stock = Column(sa.Boolean, nullable=False, default=False, server_default=sa.false())
+    variant_count = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relación many-to-many con categorías
     categorias = relationship("Categoria", secondary=producto_categoria, back_populates="productos")
     proveedor = relationship("Proveedor", back_populates="productos")
     variantes = relationship("VarianteProducto", back_populates="producto", cascade="all, delete") # Nota: cascade="all, delete-orphan" es común si quieres eliminar variantes al borrar un producto. Si solo "delete" está bien para ti, déjalo.
 
+    # Índices para los órdenes de GET /products (paginación keyset: clave + id)
+    __table_args__ = (
+        sa.Index("ix_productos_precio_id", "precio", "id"),
+        sa.Index("ix_productos_nombre_id", "nombre", "id"),
+        sa.Index("ix_productos_total_stock_id", "total_stock", "id"),
+        sa.Index("ix_productos_in_stock_id", "in_stock", "id"),
+    )
+
 
 class VarianteProducto(Base):
     __tablename__ = "variantes_producto"
 
     id = Column(Integer, primary_key=True, index=True)
-    producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False)
+    producto_id = Column(Integer, ForeignKey("productos.id"), nullable=False, index=True)
     color = Column(String, nullable=False)
     talla = Column(String, nullable=False)
     stock = Column(Integer, default=0)
@@ -44,3 +59,8 @@ class VarianteProducto(Base):
     # se refiere a este lado de la relación.
     detalles_venta = relationship("DetalleVenta", back_populates="variante")
 
+    # Una variante por combinación; clave del upsert de POST /products/variants/bulk
+    __table_args__ = (
+        sa.Index("uq_variantes_producto_producto_color_talla", "producto_id", "color", "talla", unique=True),
+    )
+
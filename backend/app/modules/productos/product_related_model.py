@@ -0,0 +1,35 @@
+# app/modules/productos/product_related_model.py
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, DateTime, ForeignKey, Index, func
+from app.database import Base
+
+
+class CoocurrenciaProducto(Base):
+    """Ventas (no canceladas) en las que aparecen juntos dos productos; un par por fila, producto_a < producto_b."""
+    __tablename__ = "coocurrencias_producto"
+
+    producto_a = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True)
+    producto_b = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True)
+    veces = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_coocurrencias_producto_b", "producto_b"),
+    )
+
+
+class ProductoRelacionado(Base):
+    """Los RELATED_PRODUCTS_TOP_N productos que más se compran con cada uno, ya ordenados (GET /products/{id}/related)."""
+    __tablename__ = "productos_relacionados"
+
+    producto_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), primary_key=True)
+    posicion = Column(SmallInteger, primary_key=True)  # 0 = el más frecuente
+    relacionado_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), nullable=False)
+    veces = Column(Integer, nullable=False)
+
+
+class RelacionadosEstado(Base):
+    """Una sola fila (id=1): hasta qué venta se han contado los pares."""
+    __tablename__ = "relacionados_estado"
+
+    id = Column(Integer, primary_key=True)
+    last_venta_id = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,239 @@
+# app/modules/productos/product_related_service.py
+"""
+"Se compran juntos": productos relacionados a partir del historial de ventas.
+
+Un proceso fuera de las peticiones (cron, worker) recorre las ventas nuevas:
+
+    python -m app.modules.productos.product_related_service update [--full] [--batch-size N]
+
+Por cada lote de RELATED_PRODUCTS_BATCH_SIZE ventas no canceladas arma la matriz
+dispersa ventas × productos (scipy) y la multiplica por su traspuesta: cada
+celda (a, b) es en cuántas ventas del lote aparecen juntos a y b. Esos conteos
+se suman a `coocurrencias_producto` y se recalcula el top
+(RELATED_PRODUCTS_TOP_N) de los productos afectados en `productos_relacionados`,
+en la misma transacción que el punto de control (`relacionados_estado`): un
+proceso interrumpido sigue desde el último lote sin contar dos veces.
+
+GET /products/{id}/related solo lee las filas ya ordenadas del producto; cada
+lote que cambia algún top sube la versión del catálogo, que es su ETag.
+
+Las ventas se cuentan una vez, al procesarlas: una cancelación posterior no
+descuenta sus pares. `--full` lo recalcula todo desde cero.
+
+El punto de control es el id de la última venta procesada. En PostgreSQL el id se
+asigna antes del commit, así que una venta aún sin confirmar puede quedar por
+debajo de otra ya visible; si se saltara, sus pares no se contarían nunca. Por eso
+solo se procesan las ventas creadas hace más de RELATED_PRODUCTS_SETTLE_SECONDS:
+una transacción de venta abierta durante más tiempo que ese margen sí se perdería
+(hasta el siguiente `--full`).
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import catalog_events
+from app.modules.productos.product_model import VarianteProducto
+from app.modules.productos.product_related_model import CoocurrenciaProducto, ProductoRelacionado, RelacionadosEstado
+from app.modules.ventas.ventas_model import DetalleVenta, EstadoVenta, Venta
+
+logger = logging.getLogger(__name__)
+
+WRITE_CHUNK_SIZE = 1000
+
+# Core sobre las tablas: el proceso no necesita configurar el resto de modelos
+_pairs = CoocurrenciaProducto.__table__
+_related = ProductoRelacionado.__table__
+_state = RelacionadosEstado.__table__
+_ventas = Venta.__table__
+_detalles = DetalleVenta.__table__
+_variantes = VarianteProducto.__table__
+
+
+def _chunks(items: list, size: int = WRITE_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def count_pairs(venta_ids, producto_ids):
+    """
+    Pares de productos comprados juntos a partir de filas (venta, producto).
+    Devuelve tres arrays (producto_a, producto_b, veces) con producto_a < producto_b.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    ventas, venta_index = np.unique(np.asarray(venta_ids, dtype=np.int64), return_inverse=True)
+    productos, producto_index = np.unique(np.asarray(producto_ids, dtype=np.int64), return_inverse=True)
+    compras = sparse.csr_matrix(
+        (np.ones(len(venta_index), dtype=np.int32), (venta_index, producto_index)),
+        shape=(len(ventas), len(productos)),
+    )
+    compras.sum_duplicates()
+    compras.data[:] = 1  # varias variantes del mismo producto en una venta cuentan una vez
+    # productos × productos; solo el triángulo superior: cada par una vez y sin la diagonal
+    juntos = sparse.triu(compras.T @ compras, k=1).tocoo()
+    return productos[juntos.row], productos[juntos.col], juntos.data
+
+
+def top_related(producto_a, producto_b, veces, ids, top_n: int):
+    """
+    Top `top_n` de cada producto de `ids` a partir de sus pares: arrays
+    (producto_id, posicion, relacionado_id, veces), ordenados por producto y posición.
+    """
+    import numpy as np
+
+    source = np.concatenate([producto_a, producto_b])
+    target = np.concatenate([producto_b, producto_a])
+    counts = np.concatenate([veces, veces])
+    keep = np.isin(source, np.asarray(ids, dtype=np.int64))
+    source, target, counts = source[keep], target[keep], counts[keep]
+    # Por producto; dentro, más veces primero y a igualdad el id menor
+    order = np.lexsort((target, -counts, source))
+    source, target, counts = source[order], target[order], counts[order]
+    _, first, sizes = np.unique(source, return_index=True, return_counts=True)
+    position = np.arange(len(source)) - np.repeat(first, sizes)
+    keep = position < top_n
+    return source[keep], position[keep], target[keep], counts[keep]
+
+
+class RelatedProductsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_related_ids(self, product_id: int, limit: int) -> List[int]:
+        """Ids de los productos que más se compran con `product_id`, ya ordenados."""
+        return list(self.db.execute(
+            sa.select(_related.c.relacionado_id)
+            .where(_related.c.producto_id == product_id)
+            .order_by(_related.c.posicion)
+            .limit(limit)
+        ).scalars())
+
+    # --- Proceso incremental ---
+
+    def update(self, full: bool = False, batch_size: Optional[int] = None) -> dict:
+        """Procesa las ventas posteriores al punto de control (todas con `full`)."""
+        batch_size = batch_size or settings.RELATED_PRODUCTS_BATCH_SIZE
+        if full:
+            self.db.execute(sa.delete(_related))
+            self.db.execute(sa.delete(_pairs))
+            self.db.execute(sa.update(_state).where(_state.c.id == 1).values(last_venta_id=0, updated_at=_now()))
+            self.db.commit()
+
+        # Las ventas que lleguen mientras tanto, o demasiado recientes (ver el docstring
+        # del módulo), quedan para la próxima ejecución
+        settled = _now() - timedelta(seconds=settings.RELATED_PRODUCTS_SETTLE_SECONDS)
+        until = self.db.execute(
+            sa.select(sa.func.max(_ventas.c.id)).where(_ventas.c.fecha_creacion <= settled)
+        ).scalar() or 0
+        stats = {"ventas": 0, "pares": 0, "productos": 0}
+        while True:
+            # El bloqueo de la fila evita que dos procesos cuenten el mismo lote (PostgreSQL)
+            last_id = self.db.execute(
+                sa.select(_state.c.last_venta_id).where(_state.c.id == 1).with_for_update()
+            ).scalar_one_or_none()
+            if last_id is None:
+                raise RuntimeError("Falta la fila de relacionados_estado: aplica las migraciones (python -m app.migrations upgrade)")
+            venta_ids = list(self.db.execute(
+                sa.select(_ventas.c.id)
+                .where(_ventas.c.id > last_id, _ventas.c.id <= until)
+                .order_by(_ventas.c.id)
+                .limit(batch_size)
+            ).scalars())
+            if not venta_ids:
+                self.db.rollback()
+                break
+
+            rows = self.db.execute(
+                sa.select(_detalles.c.venta_id, _variantes.c.producto_id)
+                .join(_variantes, _variantes.c.id == _detalles.c.variante_id)
+                .join(_ventas, _ventas.c.id == _detalles.c.venta_id)
+                .where(_detalles.c.venta_id.between(venta_ids[0], venta_ids[-1]),
+                       _ventas.c.estado != EstadoVenta.cancelada)
+                .distinct()
+            ).all()
+            affected = self._add_pairs(*count_pairs([r[0] for r in rows], [r[1] for r in rows])) if rows else []
+            self._refresh_top(affected)
+            if affected:
+                # Sube la versión del catálogo (el ETag de GET /products/{id}/related) sin
+                # invalidar productos: solo cambian estas tablas, no los productos
+                catalog_events.mark_dirty(self.db, metadata=False)
+            self.db.execute(
+                sa.update(_state).where(_state.c.id == 1).values(last_venta_id=venta_ids[-1], updated_at=_now())
+            )
+            self.db.commit()
+            stats["ventas"] += len(venta_ids)
+            stats["productos"] += len(affected)
+            logger.info(f"Relacionados: ventas hasta {venta_ids[-1]} procesadas ({len(affected)} productos actualizados)")
+        stats["pares"] = self.db.execute(sa.select(sa.func.count()).select_from(_pairs)).scalar_one()
+        self.db.rollback()
+        return stats
+
+    def _add_pairs(self, producto_a, producto_b, veces) -> List[int]:
+        """Suma los conteos del lote a `coocurrencias_producto`. Devuelve los productos afectados."""
+        insert = postgresql.insert if self.db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        values = [
+            {"producto_a": a, "producto_b": b, "veces": n}
+            for a, b, n in zip(producto_a.tolist(), producto_b.tolist(), veces.tolist())
+        ]
+        for chunk in _chunks(values):
+            stmt = insert(_pairs).values(chunk)
+            self.db.execute(stmt.on_conflict_do_update(
+                index_elements=[_pairs.c.producto_a, _pairs.c.producto_b],
+                set_={"veces": _pairs.c.veces + stmt.excluded.veces},
+            ))
+        return sorted(set(producto_a.tolist()) | set(producto_b.tolist()))
+
+    def _refresh_top(self, ids: List[int]) -> None:
+        """Recalcula `productos_relacionados` de `ids` con todos sus pares acumulados."""
+        import numpy as np
+
+        for chunk in _chunks(ids):
+            rows = self.db.execute(
+                sa.select(_pairs.c.producto_a, _pairs.c.producto_b, _pairs.c.veces)
+                .where(sa.or_(_pairs.c.producto_a.in_(chunk), _pairs.c.producto_b.in_(chunk)))
+            ).all()
+            pairs = np.array(rows, dtype=np.int64).reshape(-1, 3)
+            top = top_related(pairs[:, 0], pairs[:, 1], pairs[:, 2], chunk, settings.RELATED_PRODUCTS_TOP_N)
+            self.db.execute(sa.delete(_related).where(_related.c.producto_id.in_(chunk)))
+            values = [
+                {"producto_id": producto_id, "posicion": posicion, "relacionado_id": relacionado_id, "veces": veces}
+                for producto_id, posicion, relacionado_id, veces in zip(*(column.tolist() for column in top))
+            ]
+            for values_chunk in _chunks(values):
+                self.db.execute(sa.insert(_related), values_chunk)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(prog="python -m app.modules.productos.product_related_service",
+                                     description="Productos que se compran juntos")
+    sub = parser.add_subparsers(dest="command", required=True)
+    update_parser = sub.add_parser("update", help="Cuenta las ventas nuevas y actualiza los relacionados")
+    update_parser.add_argument("--full", action="store_true", help="Recalcular desde la primera venta")
+    update_parser.add_argument("--batch-size", type=int, default=None,
+                               help="Ventas por lote (por defecto RELATED_PRODUCTS_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    if args.command == "update":
+        from app.database import SessionLocal
+
+        with SessionLocal() as db:
+            stats = RelatedProductsService(db).update(full=args.full, batch_size=args.batch_size)
+        logger.info(f"Relacionados al día: {stats['ventas']} ventas nuevas, {stats['pares']} pares en total")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,21 @@
 # app/modules/products/product_router.py
 
-from fastapi import APIRouter, Depends, status, File, UploadFile, HTTPException, Query
+from fastapi import APIRouter, Depends, status, File, UploadFile, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from decimal import Decimal
+from typing import List, Literal, Optional
 from app.modules.productos import product_schema as schemas
-from app.modules.productos.product_service import ProductService # Asegúrate de que esto apunta al archivo correcto
+from app.modules.productos.product_service import PRODUCT_FIELDS, PRODUCT_LOAD_OPTIONS, ProductService # Asegúrate de que esto apunta al archivo correcto
+from app.modules.productos.catalog_index import CatalogFilter
+from app.modules.productos.product_import_service import ProductImportService, submit_import_job
+from app.modules.productos import product_images
 from app.core.dependencies import get_db # Asegúrate de que get_db está bien definido aquí
+from app.core.async_service import AsyncServiceAdapter
+from app.core.db_routing import get_read_db, get_async_read_db
+from app.database import get_async_db
+from app.core.http_cache import catalog_cache
+from app.core import fast_json
+from app.core.sparse_fields import FieldSet
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
@@ -13,6 +23,17 @@ router = APIRouter(prefix="/products", tags=["Products"])
 def get_product_service(db: Session = Depends(get_db)) -> ProductService:
     return ProductService(db)
 
+# Lecturas de catálogo: réplica si hay (ver app/core/db_routing.py)
+def get_product_read_service(db: Session = Depends(get_read_db)) -> ProductService:
+    return ProductService(db)
+
+# Versión para endpoints `async` (AsyncSession si DB_ASYNC=true, threadpool si no)
+def get_product_service_async(db = Depends(get_async_db)) -> AsyncServiceAdapter:
+    return AsyncServiceAdapter(ProductService, db)
+
+def get_product_read_service_async(db = Depends(get_async_read_db)) -> AsyncServiceAdapter:
+    return AsyncServiceAdapter(ProductService, db)
+
 @router.post("/", response_model=schemas.ProductResponse, status_code=status.HTTP_201_CREATED)
 def create_product_endpoint(
     product_data: schemas.ProductCreate,
@@ -20,22 +41,137 @@ def create_product_endpoint(
 ):
     return product_service.create_product(product_data)
 
-@router.get("/", response_model=List[schemas.ProductResponse])
-def list_products_endpoint(
+def get_catalog_filter(
     categoria_ids: Optional[List[int]] = Query(None, description="Lista de IDs de categorías para filtrar"),
-    product_service: ProductService = Depends(get_product_service)
+    match: Literal["any", "all"] = Query("any", description="any: en alguna de las categorías; all: en todas"),
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    in_stock: bool = Query(False, description="Solo productos con stock"),
+) -> CatalogFilter:
+    return CatalogFilter(categoria_ids, match == "all", min_price, max_price, in_stock)
+
+@router.get("/", response_model=List[schemas.ProductResponse], dependencies=[catalog_cache("products")])
+def list_products_endpoint(
+    response: Response,
+    catalog_filter: CatalogFilter = Depends(get_catalog_filter),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Tamaño de página; sin él se devuelve todo el catálogo"),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    sort: Optional[Literal["price", "-price", "name", "-name", "newest", "stock", "available"]] = Query(None),
+    fieldset: Optional[FieldSet] = Depends(PRODUCT_FIELDS),
+    product_service: ProductService = Depends(get_product_read_service)
+):
+    """
+    Con `limit`, `cursor` o `sort` se pagina en el servidor (keyset): la respuesta trae
+    `X-Total-Count` y, si hay más resultados, `X-Next-Cursor`.
+    Con `fields` / `include` cada producto trae solo esos campos y relaciones.
+    """
+    options = fieldset.load_options() if fieldset else PRODUCT_LOAD_OPTIONS
+    if limit is not None or cursor is not None or sort is not None:
+        products, next_cursor, total = product_service.list_products(
+            catalog_filter, sort=sort or "newest", limit=limit, cursor=cursor, options=options
+        )
+        response.headers["X-Total-Count"] = str(total)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+    elif catalog_filter.active:
+        products = product_service.get_filtered_products(catalog_filter, options)
+    else:
+        products = product_service.get_all_products(options)
+    if fieldset:
+        return fast_json.json_response(fieldset.to_dicts(products), response)
+    return fast_json.list_response(schemas.ProductResponse, products, response)
+
+@router.get("/facets", response_model=schemas.CatalogFacetsResponse, dependencies=[catalog_cache("products")])
+def catalog_facets_endpoint(
+    catalog_filter: CatalogFilter = Depends(get_catalog_filter),
+    product_service: ProductService = Depends(get_product_read_service)
+):
+    """Conteos por categoría, con stock y rango de precios para el filtro dado (índice en memoria)."""
+    return product_service.get_catalog_facets(catalog_filter)
+
+@router.get("/search", response_model=List[schemas.ProductResponse], dependencies=[catalog_cache("products")])
+def search_products_endpoint(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar en nombre y descripción"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+    fieldset: Optional[FieldSet] = Depends(PRODUCT_FIELDS),
+    product_service: ProductService = Depends(get_product_read_service)
+):
+    """Búsqueda con ranking y tolerancia a errores de escritura. `X-Total-Count` trae el total."""
+    options = fieldset.load_options() if fieldset else PRODUCT_LOAD_OPTIONS
+    products, total = product_service.search_products(q, limit, offset, options)
+    response.headers["X-Total-Count"] = str(total)
+    if fieldset:
+        return fast_json.json_response(fieldset.to_dicts(products), response)
+    return fast_json.list_response(schemas.ProductResponse, products, response)
+
+@router.get("/suggest", response_model=List[schemas.ProductSuggestion], dependencies=[catalog_cache("products")])
+def suggest_products_endpoint(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Comienzo de alguna palabra del nombre"),
+    limit: int = Query(10, ge=1, le=20),
+    product_service: ProductService = Depends(get_product_read_service)
+):
+    """Autocompletado del buscador: nombres que empiezan por `prefix` (sin tildes), los más vendidos primero."""
+    return product_service.suggest_products(prefix, limit)
+
+# ----------------- IMPORTACIÓN MASIVA -----------------
+def get_product_import_service(db: Session = Depends(get_db)) -> ProductImportService:
+    return ProductImportService(db)
+
+@router.post("/import", response_model=schemas.ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def import_products_endpoint(
+    file: UploadFile = File(..., description="CSV con cabecera o NDJSON (un producto por línea)"),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Por defecto, según la extensión del archivo"),
+    import_service: ProductImportService = Depends(get_product_import_service)
+):
+    """
+    Registra una importación masiva y la ejecuta en segundo plano.
+    El progreso y los errores por fila se consultan en GET /products/import/{job_id}.
+    """
+    job = import_service.create_job(file, format)
+    submit_import_job(job.id)
+    return job
+
+@router.get("/import/{job_id}", response_model=schemas.ImportJobResponse)
+def get_import_job_endpoint(
+    job_id: int,
+    import_service: ProductImportService = Depends(get_product_import_service)
 ):
-    if categoria_ids:
-        return product_service.get_products_by_categories(categoria_ids)
-    return product_service.get_all_products()
+    return import_service.get_job(job_id)
 
-@router.get("/{product_id}", response_model=schemas.ProductResponse)
-def get_product_by_id_endpoint(
+@router.post("/import/{job_id}/resume", response_model=schemas.ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def resume_import_job_endpoint(
+    job_id: int,
+    import_service: ProductImportService = Depends(get_product_import_service)
+):
+    """Reanuda una importación fallida o interrumpida desde su último lote confirmado."""
+    job = import_service.request_resume(job_id)
+    submit_import_job(job.id)
+    return job
+
+@router.get("/{product_id}", response_model=schemas.ProductResponse, dependencies=[catalog_cache("products")])
+async def get_product_by_id_endpoint(
     product_id: int,
-    product_service: ProductService = Depends(get_product_service)
+    product_service: AsyncServiceAdapter = Depends(get_product_read_service_async)
+):
+    # El servicio ya lanza 404 si no lo encuentra; la respuesta sale de la caché de productos
+    return await product_service.get_product_response(product_id)
+
+@router.get("/{product_id}/related", response_model=List[schemas.ProductResponse], dependencies=[catalog_cache("products")])
+def related_products_endpoint(
+    response: Response,
+    product_id: int,
+    limit: int = Query(10, ge=1, le=20),
+    fieldset: Optional[FieldSet] = Depends(PRODUCT_FIELDS),
+    product_service: ProductService = Depends(get_product_read_service)
 ):
-    # El servicio ya lanza NotFoundException si no lo encuentra
-    return product_service.get_product_by_id(product_id)
+    """"Se compran juntos": precalculado a partir de las ventas, en orden de frecuencia."""
+    options = fieldset.load_options() if fieldset else PRODUCT_LOAD_OPTIONS
+    products = product_service.get_related_products(product_id, limit, options)
+    if fieldset:
+        return fast_json.json_response(fieldset.to_dicts(products), response)
+    return fast_json.list_response(schemas.ProductResponse, products, response)
 
 @router.put("/{product_id}", response_model=schemas.ProductResponse)
 def update_product_endpoint(
@@ -58,12 +194,18 @@ def delete_product_endpoint(
 async def upload_product_image_endpoint(
     product_id: int,
     file: UploadFile = File(...), # <-- ¡CLAVE! 'file' debe ser el nombre del campo en el FormData del frontend
-    product_service: ProductService = Depends(get_product_service)
+    product_service: AsyncServiceAdapter = Depends(get_product_service_async)
 ):
     """
     Sube una imagen para un producto específico y asocia su URL en la base de datos.
     """
-    return await product_service.upload_image_to_product(product_id, file)
+    await product_service.get_product_by_id(product_id) # 404 antes de escribir el archivo
+    image_url = await ProductService.guardar_archivo_imagen(file)
+    # Mismo contenido = mismo archivo: si otro producto ya lo usa, sus derivados sirven
+    image_variants = await product_service.get_image_variants(image_url)
+    if image_variants is None:
+        image_variants = await product_images.create_variants(image_url)  # en el pool de procesos
+    return await product_service.fetch(schemas.ProductResponse, "set_image_url", product_id, image_url, image_variants)
 
 # ----------------- ENDPOINTS DE VARIANTES -----------------
 
@@ -75,19 +217,19 @@ def create_variant_endpoint(
 ):
     return product_service.create_variant(product_id, variant_data)
 
-@router.get("/{product_id}/variants", response_model=List[schemas.VarianteProductoResponse])
-def list_variants_by_product_endpoint(
+@router.get("/{product_id}/variants", response_model=List[schemas.VarianteProductoResponse], dependencies=[catalog_cache("products")])
+async def list_variants_by_product_endpoint(
     product_id: int,
-    product_service: ProductService = Depends(get_product_service)
+    product_service: AsyncServiceAdapter = Depends(get_product_read_service_async)
 ):
-    return product_service.get_variants_by_product(product_id)
+    return await product_service.fetch(List[schemas.VarianteProductoResponse], "get_variants_by_product", product_id)
 
-@router.get("/variants/{variant_id}", response_model=schemas.VarianteProductoResponse)
-def get_variant_by_id_endpoint(
+@router.get("/variants/{variant_id}", response_model=schemas.VarianteProductoResponse, dependencies=[catalog_cache("products")])
+async def get_variant_by_id_endpoint(
     variant_id: int,
-    product_service: ProductService = Depends(get_product_service)
+    product_service: AsyncServiceAdapter = Depends(get_product_read_service_async)
 ):
-    return product_service.get_variant_by_id(variant_id)
+    return await product_service.fetch(schemas.VarianteProductoResponse, "get_variant_by_id", variant_id)
 
 @router.put("/variants/{variant_id}", response_model=schemas.VarianteProductoResponse)
 def update_variant_endpoint(
@@ -103,4 +245,13 @@ def delete_variant_endpoint(
     product_service: ProductService = Depends(get_product_service)
 ):
     product_service.delete_variant(variant_id)
-    return None
\ No newline at end of file
+    return None
+
+
+@router.post("/variants/bulk", response_model=schemas.VariantBulkResponse, response_model_exclude_none=True)
+def bulk_update_variants_endpoint(
+    request: schemas.VariantBulkRequest,
+    product_service: ProductService = Depends(get_product_service)
+):
+    """Stock absoluto o ajuste (`delta`) de muchas variantes en una transacción; crea las que falten."""
+    return product_service.bulk_update_variants(request)
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
 
 # Importaciones de otros módulos
 from app.modules.proveedores.proveedor_schema import ProveedorResponse
@@ -45,6 +46,42 @@ class VarianteProductoResponse(VarianteProductoBase):
     )
 
 
+# ----------- Stock masivo (POST /products/variants/bulk) --------------
+class VariantStockChange(BaseModel):
+    """Variante por `variant_id` o por `producto_id` + `color` + `talla`; `stock` absoluto o `delta`."""
+    variant_id: Optional[int] = None
+    producto_id: Optional[int] = None
+    color: Optional[str] = None
+    talla: Optional[str] = None
+    stock: Optional[int] = Field(None, ge=0)
+    delta: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.stock is None) == (self.delta is None):
+            raise ValueError("Indica 'stock' (valor absoluto) o 'delta' (ajuste), uno de los dos")
+        if self.variant_id is None and None in (self.producto_id, self.color, self.talla):
+            raise ValueError("Indica 'variant_id' o 'producto_id', 'color' y 'talla'")
+        return self
+
+class VariantBulkRequest(BaseModel):
+    items: List[VariantStockChange] = Field(..., min_length=1, max_length=10_000)
+    upsert: bool = Field(True, description="Crear las variantes que no existan (filas con producto_id, color y talla)")
+
+class VariantBulkResult(BaseModel):
+    fila: int
+    estado: Literal["actualizada", "creada", "error"]
+    id: Optional[int] = None
+    stock: Optional[int] = None
+    error: Optional[str] = None
+
+class VariantBulkResponse(BaseModel):
+    actualizadas: int
+    creadas: int
+    errores: int
+    resultados: List[VariantBulkResult]
+
+
 # ----------- Producto (esquema completo) ----------------------
 class ProductBase(BaseModel):
     nombre: str
@@ -57,6 +94,17 @@ class ProductCreate(ProductBase):
     proveedor_id: int
     variantes: List[VarianteProductoCreate]
 
+    @field_validator("variantes")
+    @classmethod
+    def variantes_unicas(cls, variantes: List[VarianteProductoCreate]) -> List[VarianteProductoCreate]:
+        # (producto_id, color, talla) es único en la base de datos
+        vistas = set()
+        for variante in variantes:
+            if (variante.color, variante.talla) in vistas:
+                raise ValueError(f"Variante repetida: {variante.color}/{variante.talla}")
+            vistas.add((variante.color, variante.talla))
+        return variantes
+
 
 class ProductUpdate(ProductBase):
     categoria_ids: Optional[List[int]] = Field(None, min_items=1, description="Lista de IDs de categorías")
@@ -69,12 +117,59 @@ class ProductResponse(ProductBase):
     variantes: List[VarianteProductoResponse] # Aquí sí queremos todas las variantes
     proveedor: Optional[ProveedorResponse] = None
     image_url: Optional[str] = None
+    # formato -> ancho -> ruta, p. ej. {"webp": {"320": "images/derived/<nombre>-320.webp"}}
+    image_variants: Optional[Dict[str, Dict[str, str]]] = None
+    # Resumen de las variantes (columnas de productos, ver product_summary.py)
+    total_stock: int = 0
+    in_stock: bool = False
+    variant_count: int = 0
 
     model_config = ConfigDict(
         from_attributes=True,
         arbitrary_types_allowed=True
     )
 
+# ----------- Autocompletado (GET /products/suggest) ----------------------
+class ProductSuggestion(BaseModel):
+    id: int
+    nombre: str
+
+# ----------- Facetas del catálogo (GET /products/facets) ----------------------
+class CategoriaFacet(BaseModel):
+    id: int
+    count: int
+
+class CatalogFacetsResponse(BaseModel):
+    total: int
+    in_stock: int
+    precio_min: Optional[float] = None
+    precio_max: Optional[float] = None
+    categorias: List[CategoriaFacet]
+
+# ----------- Importación masiva (POST /products/import) ----------------------
+class ImportRowError(BaseModel):
+    fila: int
+    error: str
+
+class ImportJobResponse(BaseModel):
+    id: int
+    status: str
+    format: str
+    filename: Optional[str] = None
+    size_bytes: int
+    bytes_processed: int
+    progress: float
+    rows_processed: int
+    rows_imported: int
+    error_count: int
+    errors: List[ImportRowError] = []
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
 # Ya no necesitamos model_rebuild() si se rompe el ciclo con ProductSimpleResponse,
 # pero no hace daño dejarlo si hay otras referencias complejas.
 # Si lo quitas y hay un error de forward reference, vuelve a ponerlo.
@@ -0,0 +1,150 @@
+# app/modules/productos/product_search_service.py
+"""
+Búsqueda de productos por texto (GET /products/search).
+
+- PostgreSQL: `tsvector` en español sobre nombre + descripción (índice GIN de
+  expresión) y, si está pg_trgm, similitud de trigramas sobre el nombre para
+  tolerar errores de escritura. El ranking combina ambos.
+- SQLite: tabla FTS5 `productos_fts` con ranking bm25 (el nombre pesa más) y
+  corrección aproximada con difflib cuando no hay resultados exactos.
+- Otros motores, o SQLite sin FTS5: LIKE sobre nombre y descripción.
+
+Los índices los crea la migración 5. En PostgreSQL se mantienen solos; en SQLite
+ProductService llama a `index_product` / `remove_product` dentro de su transacción.
+"""
+import difflib
+import logging
+import re
+from typing import Iterable, List, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.modules.productos import product_model as models
+
+logger = logging.getLogger(__name__)
+
+# Debe coincidir con la expresión del índice ix_productos_search_tsv (migración 5)
+SEARCH_TSV = "to_tsvector('spanish', coalesce(p.nombre, '') || ' ' || coalesce(p.descripcion, ''))"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Capacidades detectadas por base de datos (clave: URL del engine)
+_capabilities: dict[str, bool] = {}
+
+
+class ProductSearchService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def _has(self, capability: str, sql: str) -> bool:
+        key = f"{self.db.get_bind().engine.url}:{capability}"
+        if key not in _capabilities:
+            _capabilities[key] = self.db.execute(sa.text(sql)).first() is not None
+        return _capabilities[key]
+
+    def _has_fts(self) -> bool:
+        return self.dialect == "sqlite" and self._has(
+            "fts", "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'productos_fts'"
+        )
+
+    def _has_trgm(self) -> bool:
+        return self._has("trgm", "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+
+    # --- Mantenimiento del índice (solo SQLite/FTS5) ---
+
+    def index_product(self, product: models.Producto) -> None:
+        self.index_products([{"id": product.id, "nombre": product.nombre, "descripcion": product.descripcion}])
+
+    def index_products(self, rows: Iterable[dict]) -> None:
+        """Indexa varios productos a la vez (dicts con id, nombre y descripcion)."""
+        if not self._has_fts():
+            return
+        rows = list(rows)
+        if not rows:
+            return
+        self.db.execute(sa.text("DELETE FROM productos_fts WHERE rowid = :id"), [{"id": row["id"]} for row in rows])
+        self.db.execute(
+            sa.text("INSERT INTO productos_fts (rowid, nombre, descripcion) VALUES (:id, :nombre, :descripcion)"),
+            rows,
+        )
+
+    def remove_product(self, product_id: int) -> None:
+        if self._has_fts():
+            self.db.execute(sa.text("DELETE FROM productos_fts WHERE rowid = :id"), {"id": product_id})
+
+    # --- Búsqueda ---
+
+    def search_ids(self, q: str, limit: int, offset: int) -> Tuple[List[int], int]:
+        """IDs de productos ordenados por relevancia y número total de coincidencias."""
+        if self.dialect == "postgresql":
+            return self._search_postgres(q, limit, offset)
+        if self._has_fts():
+            return self._search_fts(q, limit, offset)
+        return self._search_like(q, limit, offset)
+
+    def _search_postgres(self, q: str, limit: int, offset: int) -> Tuple[List[int], int]:
+        params = {"q": q, "limit": limit, "offset": offset}
+        if self._has_trgm():
+            # `<%`: similitud de palabra (usa ix_productos_nombre_trgm); tolera errores de escritura
+            match = f"{SEARCH_TSV} @@ tsq OR :q <% p.nombre"
+            rank = f"ts_rank_cd({SEARCH_TSV}, tsq) + word_similarity(:q, p.nombre)"
+        else:
+            match = f"{SEARCH_TSV} @@ tsq"
+            rank = f"ts_rank_cd({SEARCH_TSV}, tsq)"
+        base = f"FROM productos p, websearch_to_tsquery('spanish', :q) AS tsq WHERE {match}"
+        total = self.db.execute(sa.text(f"SELECT count(*) {base}"), params).scalar_one()
+        ids = self.db.execute(
+            sa.text(f"SELECT p.id {base} ORDER BY {rank} DESC, p.id LIMIT :limit OFFSET :offset"), params
+        ).scalars().all()
+        return list(ids), total
+
+    def _fts_query(self, words: List[str]) -> str:
+        # Cada palabra como prefijo ("cami" encuentra "camisa"); todas deben aparecer
+        return " ".join(f'"{word}"*' for word in words)
+
+    def _run_fts(self, match: str, limit: int, offset: int) -> Tuple[List[int], int]:
+        params = {"match": match, "limit": limit, "offset": offset}
+        total = self.db.execute(
+            sa.text("SELECT count(*) FROM productos_fts WHERE productos_fts MATCH :match"), params
+        ).scalar_one()
+        if not total:
+            return [], 0
+        ids = self.db.execute(sa.text("""
+            SELECT rowid FROM productos_fts WHERE productos_fts MATCH :match
+            ORDER BY bm25(productos_fts, 10.0, 1.0), rowid
+            LIMIT :limit OFFSET :offset
+        """), params).scalars().all()
+        return list(ids), total
+
+    def _search_fts(self, q: str, limit: int, offset: int) -> Tuple[List[int], int]:
+        words = [word.lower() for word in _WORD.findall(q)]
+        if not words:
+            return [], 0
+        ids, total = self._run_fts(self._fts_query(words), limit, offset)
+        if total:
+            return ids, total
+        # Sin coincidencias: corregir cada palabra contra el vocabulario de nombres (solo desarrollo)
+        vocabulary = {
+            word.lower()
+            for nombre in self.db.execute(sa.select(models.Producto.nombre)).scalars()
+            for word in _WORD.findall(nombre or "")
+        }
+        corrected = []
+        for word in words:
+            corrected.extend(difflib.get_close_matches(word, vocabulary, n=3, cutoff=0.7))
+        if not corrected:
+            return [], 0
+        return self._run_fts(" OR ".join(f'"{word}"' for word in corrected), limit, offset)
+
+    def _search_like(self, q: str, limit: int, offset: int) -> Tuple[List[int], int]:
+        pattern = f"%{q}%"
+        match = sa.or_(models.Producto.nombre.ilike(pattern), models.Producto.descripcion.ilike(pattern))
+        total = self.db.execute(sa.select(sa.func.count()).select_from(models.Producto).where(match)).scalar_one()
+        ids = self.db.execute(
+            sa.select(models.Producto.id).where(match)
+            .order_by(sa.case((models.Producto.nombre.ilike(pattern), 0), else_=1), models.Producto.id)
+            .limit(limit).offset(offset)
+        ).scalars().all()
+        return list(ids), total
@@ -1,15 +1,35 @@
 # app/modules/products/product_service.py
 
-from sqlalchemy.orm import Session, joinedload
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
 from app.modules.productos import product_model as models
 from app.modules.productos import product_schema as schemas
+from app.modules.productos.product_search_service import ProductSearchService
+from app.modules.productos.catalog_index import CatalogFilter, catalog_index
+from app.modules.productos import product_summary  # noqa: F401 (registra el resumen de stock en before_commit)
+from app.modules.productos.suggest_index import suggest_index
+from app.modules.productos.product_related_service import RelatedProductsService
+from app.config import settings
 from app.modules.categorias import categoria_model as categoria_models
 from app.modules.proveedores import proveedor_model as proveedor_models
+from app.core import catalog_events
 from app.core.exceptions import NotFoundException, DuplicateEntryException # Revisa si estas se usan o si HTTPException es suficiente
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.cache import LRUTTLCache
+from app.core.catalog_version import catalog_version
+from app.core.sparse_fields import FieldSetParams
 from fastapi import UploadFile, HTTPException # HTTPException ya está importado
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
-from typing import Optional, List
-import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional, List, Tuple
+import hashlib
+import json
+import os
+import tempfile
 import logging # ¡Importante para ver qué está pasando!
 
 # Configuración básica del logger
@@ -30,6 +50,154 @@ except Exception as e:
     logger.critical(f"ERROR CRÍTICO: No se pudo crear o asegurar el directorio de subida {UPLOAD_DIRECTORY}: {e}")
     # Considera si aquí debería haber un sys.exit() si es un fallo fatal.
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Extensión según el tipo declarado: los mismos bytes dan siempre el mismo nombre
+IMAGE_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif", "image/webp": ".webp"}
+
+
+def _upload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"La imagen supera el tamaño máximo de {settings.MAX_UPLOAD_BYTES // (1024 * 1024)} MB",
+    )
+
+
+def _store_upload(source, suffix: str) -> str:
+    """
+    Copia la subida por bloques a un temporal en UPLOAD_DIRECTORY, cortando en cuanto
+    pasa de MAX_UPLOAD_BYTES, y la renombra al nombre final (os.replace es atómico:
+    nunca se sirve una imagen a medio escribir). Bloqueante: llamar en un hilo.
+
+    El nombre es el SHA-256 del contenido: la misma foto subida para varios productos
+    se guarda una sola vez y cada URL apunta siempre a los mismos bytes (cacheable
+    para siempre). Los archivos que ya no usa ningún producto los borra
+    `python -m app.modules.productos.product_images gc`.
+    """
+    try:
+        UPLOAD_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        logger.error(f"Error al crear directorio: {e}")
+        raise HTTPException(status_code=500, detail="Error del servidor al preparar el almacenamiento")
+
+    fd, tmp_name = tempfile.mkstemp(dir=UPLOAD_DIRECTORY, prefix=".upload-", suffix=".part")
+    try:
+        written = 0
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > settings.MAX_UPLOAD_BYTES:
+                    raise _upload_too_large()
+                digest.update(chunk)
+                out.write(chunk)
+        file_path = UPLOAD_DIRECTORY / f"{digest.hexdigest()}{suffix}"
+        if file_path.exists():
+            os.unlink(tmp_name)
+            # Renovar la fecha: el GC no borra archivos recientes (aún sin producto que los use)
+            os.utime(file_path)
+            logger.info(f"Imagen ya almacenada, se reutiliza: {file_path}")
+            return f"images/{file_path.name}"
+        os.replace(tmp_name, file_path)
+    except HTTPException:
+        os.unlink(tmp_name)
+        raise
+    except OSError as e:
+        logger.error(f"Error al guardar archivo: {e}")
+        Path(tmp_name).unlink(missing_ok=True)
+        raise HTTPException(status_code=500, detail=f"Error al guardar la imagen: {e}")
+
+    logger.info(f"Archivo guardado exitosamente: {file_path} ({written} bytes)")
+    return f"images/{file_path.name}"
+
+
+# Carga de relaciones para las respuestas completas de producto. Las colecciones van
+# por "select in" (una consulta por relación para todo el lote de productos) en vez de
+# joinedload: dos colecciones en el mismo JOIN multiplican las filas (variantes × categorías)
+# y obligaban a deduplicar en Python. El proveedor es many-to-one: el JOIN no multiplica.
+PRODUCT_LOAD_OPTIONS = (
+    selectinload(models.Producto.variantes),
+    selectinload(models.Producto.categorias),
+    joinedload(models.Producto.proveedor),
+)
+
+# Campos de ?fields= / ?include= en los listados (ver app/core/sparse_fields.py).
+# Las tarjetas del catálogo, p. ej.: fields=id,nombre,precio,image_url,in_stock
+PRODUCT_FIELDS = FieldSetParams(
+    models.Producto,
+    columns=("nombre", "descripcion", "precio", "image_url", "image_variants", "id", "proveedor_id",
+             "total_stock", "in_stock", "variant_count"),
+    relations={
+        "categorias": ("name", "id"),
+        "variantes": ("color", "talla", "stock", "id"),
+        "proveedor": ("nombre", "telefono", "correo", "id"),
+    },
+)
+
+# Órdenes de GET /products: (expresión, descendente, conversión del valor del cursor).
+# El desempate siempre es por id, en la misma dirección, para que (clave, id) sea único.
+PRODUCT_SORTS = {
+    "price": (models.Producto.precio, False, Decimal),
+    "-price": (models.Producto.precio, True, Decimal),
+    "name": (models.Producto.nombre, False, str),
+    "-name": (models.Producto.nombre, True, str),
+    "newest": (models.Producto.id, True, int),
+    "stock": (models.Producto.total_stock, True, int),
+    "available": (models.Producto.in_stock, True, bool),  # con stock primero; dentro, los más nuevos
+}
+
+# --- Caché de entidades (ver app/core/cache.py) ---
+# Respuestas completas de producto; el stock de las variantes se lee siempre de la BD.
+product_cache = LRUTTLCache("productos")
+# Metadatos de variante que no cambian con ventas ni pedidos
+variant_meta_cache = LRUTTLCache("variantes")
+
+
+@dataclass(frozen=True)
+class VariantMeta:
+    id: int
+    producto_id: int
+    proveedor_id: int
+    producto_nombre: str
+
+
+def invalidate_product_cache(product_id: Optional[int] = None) -> None:
+    """Llamar tras el commit de cualquier cambio de producto o variante. Sin id, vacía todo."""
+    if product_id is None:
+        product_cache.clear()
+        variant_meta_cache.clear()
+        return
+    product_cache.invalidate(product_id)
+    variant_meta_cache.invalidate_where(lambda _, meta: meta.producto_id == product_id)
+
+
+# Cambios de metadatos hechos por otro proceso: no sabemos qué productos, se vacía todo
+catalog_version.on_remote_change(invalidate_product_cache, metadata_only=True)
+
+
+def get_variant_meta(db: Session, variant_ids) -> dict:
+    """Metadatos de las variantes pedidas (id -> VariantMeta); las que no existen no aparecen."""
+    metas, missing = {}, []
+    for variant_id in set(variant_ids):
+        meta = variant_meta_cache.get(variant_id)
+        if meta is None:
+            missing.append(variant_id)
+        else:
+            metas[variant_id] = meta
+    if missing:
+        token = variant_meta_cache.token()
+        rows = db.execute(
+            sa.select(models.VarianteProducto.id, models.VarianteProducto.producto_id,
+                      models.Producto.proveedor_id, models.Producto.nombre)
+            .join(models.VarianteProducto.producto)
+            .where(models.VarianteProducto.id.in_(missing))
+        )
+        for row in rows:
+            meta = VariantMeta(*row)
+            variant_meta_cache.set(meta.id, meta, token)
+            metas[meta.id] = meta
+    return metas
+
+
 class ProductService:
     def __init__(self, db: Session):
         self.db = db
@@ -38,11 +206,7 @@ class ProductService:
     def get_product_by_id(self, producto_id: int) -> Optional[models.Producto]:
         logger.info(f"Buscando producto con ID: {producto_id}")
         product = self.db.query(models.Producto)\
-            .options(
-                joinedload(models.Producto.variantes),
-                joinedload(models.Producto.categorias),
-                joinedload(models.Producto.proveedor)
-            )\
+            .options(*PRODUCT_LOAD_OPTIONS)\
             .filter(models.Producto.id == producto_id)\
             .first()
         if not product:
@@ -50,29 +214,180 @@ class ProductService:
             raise HTTPException(status_code=404, detail="Producto no encontrado") # Lanza la excepción aquí
         return product
 
-    def get_all_products(self) -> List[models.Producto]:
+    def get_product_response(self, product_id: int) -> schemas.ProductResponse:
+        """
+        GET /products/{id} con caché: en un acierto solo se consulta el stock de las
+        variantes. Si las variantes cambiaron (otro proceso), se recarga entero.
+        """
+        cached = product_cache.get(product_id)
+        if cached is not None:
+            stock = dict(self.db.execute(
+                sa.select(models.VarianteProducto.id, models.VarianteProducto.stock)
+                .where(models.VarianteProducto.producto_id == product_id)
+            ).all())
+            if stock.keys() == {variante.id for variante in cached.variantes}:
+                total_stock = sum(stock.values())
+                return cached.model_copy(update={
+                    "variantes": [variante.model_copy(update={"stock": stock[variante.id]}) for variante in cached.variantes],
+                    "total_stock": total_stock,
+                    "in_stock": any(value > 0 for value in stock.values()),
+                })
+            product_cache.invalidate(product_id)
+        token = product_cache.token()
+        response = schemas.ProductResponse.model_validate(self.get_product_by_id(product_id))
+        product_cache.set(product_id, response, token)
+        return response
+
+    def get_all_products(self, options: tuple = PRODUCT_LOAD_OPTIONS) -> List[models.Producto]:
         logger.info("Obteniendo todos los productos.")
         return self.db.query(models.Producto)\
-            .options(
-                joinedload(models.Producto.variantes),
-                joinedload(models.Producto.categorias),
-                joinedload(models.Producto.proveedor)
-            )\
+            .options(*options)\
             .all()
 
     def get_products_by_categories(self, categoria_ids: List[int]) -> List[models.Producto]:
         logger.info(f"Obteniendo productos por categorías: {categoria_ids}")
+        # Subconsulta IN en lugar de JOIN + DISTINCT: cada producto sale una sola vez
         return self.db.query(models.Producto)\
-            .join(models.Producto.categorias)\
-            .filter(categoria_models.Categoria.id.in_(categoria_ids))\
-            .options(
-                joinedload(models.Producto.variantes),
-                joinedload(models.Producto.categorias),
-                joinedload(models.Producto.proveedor)
-            )\
-            .distinct()\
+            .filter(models.Producto.id.in_(
+                sa.select(models.producto_categoria.c.producto_id)
+                .where(models.producto_categoria.c.categoria_id.in_(categoria_ids))
+            ))\
+            .options(*PRODUCT_LOAD_OPTIONS)\
             .all()
 
+    def _id_in(self, ids: List[int]):
+        """
+        `Producto.id IN ids` con un único parámetro: un filtro amplio puede devolver
+        decenas de miles de ids, más que el límite de parámetros de SQLite/asyncpg.
+        PostgreSQL recibe un array (`= ANY`), SQLite un JSON que recorre json_each.
+        """
+        if not ids:
+            return sa.false()
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return models.Producto.id == sa.any_(sa.literal(ids, postgresql.ARRAY(sa.Integer)))
+        if dialect == "sqlite":
+            return models.Producto.id.in_(
+                sa.select(sa.column("value", sa.Integer)).select_from(sa.func.json_each(json.dumps(ids)))
+            )
+        return models.Producto.id.in_(ids)
+
+    def _filter_conditions(self, catalog_filter: Optional[CatalogFilter]) -> list:
+        """Condiciones SQL del filtro: con el índice en memoria, los ids ya resueltos (ver `_id_in`)."""
+        if catalog_filter is None or not catalog_filter.active:
+            return []
+        if settings.CATALOG_INDEX_ENABLED:
+            return [self._id_in(catalog_index.filter(self.db, catalog_filter))]
+        conditions = []
+        if catalog_filter.categoria_ids:
+            links = sa.select(models.producto_categoria.c.producto_id)\
+                .where(models.producto_categoria.c.categoria_id.in_(catalog_filter.categoria_ids))
+            if catalog_filter.match_all:
+                links = links.group_by(models.producto_categoria.c.producto_id).having(
+                    sa.func.count(sa.distinct(models.producto_categoria.c.categoria_id)) == len(set(catalog_filter.categoria_ids))
+                )
+            conditions.append(models.Producto.id.in_(links))
+        if catalog_filter.min_price is not None:
+            conditions.append(models.Producto.precio >= catalog_filter.min_price)
+        if catalog_filter.max_price is not None:
+            conditions.append(models.Producto.precio <= catalog_filter.max_price)
+        if catalog_filter.in_stock:
+            conditions.append(models.Producto.in_stock.is_(True))
+        return conditions
+
+    def get_filtered_products(self, catalog_filter: CatalogFilter, options: tuple = PRODUCT_LOAD_OPTIONS) -> List[models.Producto]:
+        """Productos que cumplen el filtro (categorías AND/OR, precio, stock), por id."""
+        return self.db.query(models.Producto)\
+            .filter(*self._filter_conditions(catalog_filter))\
+            .options(*options)\
+            .order_by(models.Producto.id)\
+            .all()
+
+    def get_catalog_facets(self, catalog_filter: CatalogFilter) -> dict:
+        return catalog_index.facets(self.db, catalog_filter)
+
+    def suggest_products(self, prefix: str, limit: int = 10) -> List[dict]:
+        return suggest_index.suggest(self.db, prefix, limit)
+
+    def list_products(
+        self,
+        catalog_filter: Optional[CatalogFilter] = None,
+        sort: str = "newest",
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        options: tuple = PRODUCT_LOAD_OPTIONS,
+    ) -> Tuple[List[models.Producto], Optional[str], int]:
+        """
+        Página de productos ordenada en el servidor con paginación keyset.
+        Devuelve (productos, cursor de la página siguiente o None, total de resultados).
+        `options` permite cargar solo parte del producto (ver `PRODUCT_FIELDS`).
+        """
+        key, descending, convert = PRODUCT_SORTS[sort]
+        id_col = models.Producto.id
+        filters = self._filter_conditions(catalog_filter)
+        total = self.db.execute(sa.select(sa.func.count()).select_from(models.Producto).where(*filters)).scalar_one()
+
+        single_key = key is id_col
+        stmt = sa.select(models.Producto, key.label("sort_key")).where(*filters).options(*options)
+        if cursor:
+            data = decode_cursor(cursor)
+            if data.get("s") != sort:
+                raise HTTPException(status_code=400, detail="El cursor no corresponde al orden solicitado")
+            try:
+                last_id = int(data["id"])
+                last_key = convert(data["k"])
+            except (KeyError, TypeError, ValueError, ArithmeticError):
+                raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+            if single_key:
+                stmt = stmt.where(id_col < last_id if descending else id_col > last_id)
+            else:
+                position = sa.tuple_(key, id_col)
+                stmt = stmt.where(position < (last_key, last_id) if descending else position > (last_key, last_id))
+        if single_key:
+            stmt = stmt.order_by(id_col.desc() if descending else id_col)
+        else:
+            stmt = stmt.order_by(*((key.desc(), id_col.desc()) if descending else (key, id_col)))
+        if limit is not None:
+            stmt = stmt.limit(limit + 1)
+
+        rows = self.db.execute(stmt).all()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor({"s": sort, "k": last.sort_key, "id": last.Producto.id})
+        return [row.Producto for row in rows], next_cursor, total
+
+    def get_related_products(
+        self, product_id: int, limit: int = 10, options: tuple = PRODUCT_LOAD_OPTIONS
+    ) -> List[models.Producto]:
+        """Los productos que más se compran junto con `product_id` (calculados por product_related_service)."""
+        ids = RelatedProductsService(self.db).get_related_ids(product_id, limit)
+        if not ids:
+            if self.db.get(models.Producto, product_id) is None:
+                raise HTTPException(status_code=404, detail="Producto no encontrado")
+            return []
+        products = self.db.query(models.Producto)\
+            .filter(models.Producto.id.in_(ids))\
+            .options(*options)\
+            .all()
+        by_id = {product.id: product for product in products}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def search_products(
+        self, q: str, limit: int = 20, offset: int = 0, options: tuple = PRODUCT_LOAD_OPTIONS
+    ) -> Tuple[List[models.Producto], int]:
+        """Búsqueda por texto con ranking. Devuelve (productos en orden de relevancia, total)."""
+        ids, total = ProductSearchService(self.db).search_ids(q, limit, offset)
+        if not ids:
+            return [], total
+        products = self.db.query(models.Producto)\
+            .filter(models.Producto.id.in_(ids))\
+            .options(*options)\
+            .all()
+        by_id = {product.id: product for product in products}
+        return [by_id[i] for i in ids if i in by_id], total
+
     # --- MÉTODO create_product (SOLO UNA VEZ, LA PRIMERA DEFINICIÓN) ---
     def create_product(self, product_data: schemas.ProductCreate) -> models.Producto:
         logger.info(f"Creando nuevo producto: {product_data.nombre}")
@@ -116,6 +431,7 @@ class ProductService:
             )
             self.db.add(variant)
 
+        ProductSearchService(self.db).index_product(new_product)
         self.db.commit()
         self.db.refresh(new_product)
         # Refresca las relaciones para que la respuesta contenga todos los datos
@@ -145,12 +461,18 @@ class ProductService:
                 if not proveedor:
                     raise HTTPException(status_code=404, detail="Nuevo proveedor no encontrado")
                 setattr(product, field, value)
+            elif field == "image_url":
+                if value != product.image_url:
+                    product.image_variants = None  # eran de la imagen anterior
+                product.image_url = value
             else:
                 setattr(product, field, value)
 
+        ProductSearchService(self.db).index_product(product)
         self.db.commit()
         self.db.refresh(product)
         self.db.refresh(product, attribute_names=["variantes", "categorias", "proveedor"]) # Asegurar que se refrescan las relaciones
+        invalidate_product_cache(product_id)
         logger.info(f"Producto {product_id} actualizado.")
         return product
 
@@ -158,71 +480,44 @@ class ProductService:
         logger.info(f"Eliminando producto con ID: {product_id}")
         product = self.get_product_by_id(product_id)
         self.db.delete(product)
+        ProductSearchService(self.db).remove_product(product_id)
         self.db.commit()
+        invalidate_product_cache(product_id)
         logger.info(f"Producto {product_id} eliminado.")
 
     # --- Función auxiliar para guardar el archivo físico ---
-    async def _guardar_archivo_imagen(self, file: UploadFile) -> str:
+    # No usa la base de datos: el endpoint la llama antes de asociar la URL al producto.
+    @staticmethod
+    async def guardar_archivo_imagen(file: UploadFile) -> str:
         logger.info(f"Guardando archivo: {file.filename}, Tipo: {file.content_type}")
-        allowed_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-        
-        if file.content_type not in allowed_types:
+        if file.content_type not in IMAGE_EXTENSIONS:
             logger.error(f"Tipo de archivo no soportado: {file.content_type}")
             raise HTTPException(status_code=400, detail="Tipo de archivo no soportado")
+        # Tamaño ya conocido (el cuerpo multipart está completo): rechazar sin copiar nada
+        if file.size is not None and file.size > settings.MAX_UPLOAD_BYTES:
+            raise _upload_too_large()
 
-        # Verificar que el directorio existe y es accesible
-        if not UPLOAD_DIRECTORY.exists():
-            try:
-                UPLOAD_DIRECTORY.mkdir(parents=True, exist_ok=True)
-                logger.info(f"Directorio creado: {UPLOAD_DIRECTORY}")
-            except Exception as e:
-                logger.error(f"Error al crear directorio: {e}")
-                raise HTTPException(
-                    status_code=500,
-                    detail="Error del servidor al preparar el almacenamiento"
-                )
-
-        # Generar nombre único para el archivo
-        file_extension = Path(file.filename).suffix.lower()
-        new_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIRECTORY / new_filename
+        # La copia (lecturas del temporal de Starlette y escrituras a disco) va fuera del event loop
+        return await run_in_threadpool(_store_upload, file.file, IMAGE_EXTENSIONS[file.content_type])
 
-        logger.info(f"Intentando guardar en: {file_path}")
+    def get_image_variants(self, image_url: str) -> Optional[dict]:
+        """Derivados ya generados para esta imagen (otro producto con los mismos bytes), o None."""
+        return self.db.scalar(
+            sa.select(models.Producto.image_variants)
+            .where(models.Producto.image_url == image_url, models.Producto.image_variants.isnot(None))
+            .limit(1)
+        )
 
-        try:
-            # Leer y guardar el archivo
-            contents = await file.read()
-            with open(file_path, "wb") as buffer:
-                buffer.write(contents)
-            
-            # Verificar que el archivo se escribió correctamente
-            if not file_path.exists():
-                logger.error("El archivo no se creó después de la escritura")
-                raise HTTPException(
-                    status_code=500,
-                    detail="Error al verificar el archivo guardado"
-                )
-            
-            logger.info(f"Archivo guardado exitosamente: {file_path}")
-            return f"images/{new_filename}"
-        
-        except Exception as e:
-            logger.error(f"Error al guardar archivo: {e}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error al guardar la imagen: {str(e)}"
-            )
-    # --- Método principal en el servicio para subir y asociar imagen ---
-    async def upload_image_to_product(self, product_id: int, file: UploadFile) -> models.Producto:
-        logger.info(f"Iniciando subida de imagen para producto ID: {product_id}")
+    # --- Asociar la imagen ya guardada al producto ---
+    def set_image_url(self, product_id: int, image_url: str, image_variants: Optional[dict] = None) -> models.Producto:
+        logger.info(f"Asociando imagen {image_url} al producto ID: {product_id}")
         product = self.get_product_by_id(product_id) # Esto ya lanzará 404 si no existe
 
-        # Guardar el archivo físicamente usando el método auxiliar
-        image_url_db = await self._guardar_archivo_imagen(file)
-
         # Actualizar la URL de la imagen en el producto y guardar en DB
-        product.image_url = image_url_db
+        product.image_url = image_url
+        product.image_variants = image_variants
         self.db.commit()
+        invalidate_product_cache(product_id)
         self.db.refresh(product)
         # Asegurarse de que las relaciones se refresquen para la respuesta
         self.db.refresh(product, attribute_names=["variantes", "categorias", "proveedor"])
@@ -243,7 +538,8 @@ class ProductService:
             stock=variant_data.stock
         )
         self.db.add(nueva_variante)
-        self.db.commit()
+        self._commit_variant(variant_data)
+        invalidate_product_cache(product_id)
         self.db.refresh(nueva_variante)
         self.db.refresh(nueva_variante, attribute_names=["producto"])
         logger.info(f"Variante creada con ID: {nueva_variante.id} para producto {product_id}")
@@ -272,15 +568,201 @@ class ProductService:
         variante.color = updated_data.color
         variante.talla = updated_data.talla
         variante.stock = updated_data.stock
-        self.db.commit()
+        self._commit_variant(updated_data)
+        invalidate_product_cache(variante.producto_id)
         self.db.refresh(variante)
         self.db.refresh(variante, attribute_names=["producto"])
         logger.info(f"Variante {variant_id} actualizada.")
         return variante
 
+    def _commit_variant(self, variant_data: schemas.VarianteProductoCreate) -> None:
+        try:
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise DuplicateEntryException(
+                detail=f"El producto ya tiene una variante {variant_data.color}/{variant_data.talla}"
+            )
+
     def delete_variant(self, variant_id: int):
         logger.info(f"Eliminando variante con ID: {variant_id}")
         variante = self.get_variant_by_id(variant_id)
+        product_id = variante.producto_id
         self.db.delete(variante)
         self.db.commit()
-        logger.info(f"Variante {variant_id} eliminada.")
\ No newline at end of file
+        invalidate_product_cache(product_id)
+        logger.info(f"Variante {variant_id} eliminada.")
+
+    # --- STOCK MASIVO (POST /products/variants/bulk) ---
+    def bulk_update_variants(self, request: schemas.VariantBulkRequest) -> dict:
+        """
+        Aplica todas las filas en una sola transacción:
+        - variantes existentes: un UPDATE ... FROM (VALUES ...) por bloque, que no deja
+          stock negativo;
+        - variantes nuevas (si `upsert`): INSERT ... ON CONFLICT (producto_id, color, talla).
+        Varias filas sobre la misma variante se aplican en orden sobre su stock actual,
+        bloqueado hasta el commit (un `stock` fija el valor, cada `delta` se suma): cada
+        fila se valida y se informa con su propio resultado, y una que dejaría el stock
+        negativo falla sin arrastrar a las siguientes. Cada fila recibe su resultado;
+        las que fallan no impiden aplicar las demás.
+        """
+        items = request.items
+        logger.info(f"Actualización masiva de stock: {len(items)} filas")
+        table = models.VarianteProducto.__table__
+
+        # Claves (producto_id, color, talla) -> id, y productos que existen
+        product_ids = {item.producto_id for item in items if item.variant_id is None}
+        existing_products, key_ids = set(), {}
+        for chunk in _chunks(list(product_ids), BULK_CHUNK_SIZE):
+            existing_products.update(self.db.scalars(
+                sa.select(models.Producto.id).where(models.Producto.id.in_(chunk))
+            ))
+            for variant_id, producto_id, color, talla in self.db.execute(
+                sa.select(table.c.id, table.c.producto_id, table.c.color, table.c.talla)
+                .where(table.c.producto_id.in_(chunk))
+            ):
+                key_ids[(producto_id, color, talla)] = variant_id
+
+        # Filas de cada variante, en el orden de la petición
+        results: List[Optional[dict]] = [None] * len(items)
+        targets: dict = {}
+        for fila, item in enumerate(items):
+            if item.variant_id is not None:
+                target = ("id", item.variant_id)
+            else:
+                key = (item.producto_id, item.color, item.talla)
+                if key in key_ids:
+                    target = ("id", key_ids[key])
+                elif item.producto_id not in existing_products:
+                    results[fila] = _bulk_error(fila, f"Producto {item.producto_id} no encontrado")
+                    continue
+                elif not request.upsert:
+                    results[fila] = _bulk_error(fila, "Variante no encontrada")
+                    continue
+                else:
+                    target = ("nueva", key)
+            targets.setdefault(target, []).append(fila)
+
+        # Variantes con varias filas: se parte del stock actual, bloqueado (PostgreSQL)
+        repeated = [target[1] for target, filas in targets.items() if target[0] == "id" and len(filas) > 1]
+        current: dict = {}
+        for chunk in _chunks(repeated, BULK_CHUNK_SIZE):
+            current.update(self.db.execute(
+                sa.select(table.c.id, table.c.stock).where(table.c.id.in_(chunk)).with_for_update()
+            ).all())
+
+        # Una operación por variante: (id, valor, es_delta) para las existentes y la fila
+        # a insertar para las nuevas; `stocks` guarda el resultado propio de cada fila
+        updates, inserts, stocks = [], [], {}
+        for target, filas in targets.items():
+            if target[0] == "id" and len(filas) == 1:
+                item = items[filas[0]]
+                updates.append((target[1], item.delta if item.delta is not None else item.stock, item.delta is not None))
+                continue
+            if target[0] == "id" and target[1] not in current:
+                for fila in filas:
+                    results[fila] = _bulk_error(fila, "Variante no encontrada")
+                continue
+            stock = (current.get(target[1]) or 0) if target[0] == "id" else 0
+            applied = False
+            for fila in filas:
+                item = items[fila]
+                new_stock = stock + item.delta if item.delta is not None else item.stock
+                if new_stock < 0:
+                    stocks[fila] = "Stock insuficiente: quedaría negativo" if target[0] == "id" or applied \
+                        else "Stock insuficiente: la variante no existe y el ajuste es negativo"
+                else:
+                    stock = stocks[fila] = new_stock
+                    applied = True
+            if not applied:
+                continue
+            if target[0] == "id":
+                updates.append((target[1], stock, False))
+            else:
+                producto_id, color, talla = target[1]
+                inserts.append({"producto_id": producto_id, "color": color, "talla": talla, "stock": stock})
+
+        outcome: dict = {}  # destino -> (estado, id, producto_id, stock) o error
+        for chunk in _chunks(updates, BULK_CHUNK_SIZE):
+            cambios = sa.values(
+                sa.column("id", sa.Integer), sa.column("valor", sa.Integer), sa.column("es_delta", sa.Boolean),
+                name="cambios",
+            ).data(chunk).cte("cambios")
+            new_stock = sa.case(
+                (cambios.c.es_delta, sa.func.coalesce(table.c.stock, 0) + cambios.c.valor), else_=cambios.c.valor
+            )
+            rows = self.db.execute(
+                sa.update(table).values(stock=new_stock)
+                .where(table.c.id == cambios.c.id, new_stock >= 0)
+                .returning(table.c.id, table.c.producto_id, table.c.stock)
+            ).all()
+            for variant_id, producto_id, stock in rows:
+                outcome[("id", variant_id)] = ("actualizada", variant_id, producto_id, stock)
+            missing = [variant_id for variant_id, _, _ in chunk if ("id", variant_id) not in outcome]
+            if missing:
+                found = set(self.db.scalars(sa.select(table.c.id).where(table.c.id.in_(missing))))
+                for variant_id in missing:
+                    outcome[("id", variant_id)] = (
+                        "Stock insuficiente: quedaría negativo" if variant_id in found else "Variante no encontrada"
+                    )
+
+        insert = postgresql.insert if self.db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        for chunk in _chunks(inserts, BULK_CHUNK_SIZE):
+            stmt = insert(table).values(chunk)
+            # Otra petición pudo crearla entre la lectura y el INSERT: se fija el valor pedido
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.producto_id, table.c.color, table.c.talla],
+                set_={"stock": stmt.excluded.stock},
+            ).returning(table.c.id, table.c.producto_id, table.c.color, table.c.talla, table.c.stock)
+            for variant_id, producto_id, color, talla, stock in self.db.execute(stmt):
+                outcome[("nueva", (producto_id, color, talla))] = ("creada", variant_id, producto_id, stock)
+
+        touched, created = set(), set()
+        for target, filas in targets.items():
+            result = outcome.get(target)
+            first = True
+            for fila in filas:
+                own = stocks.get(fila)
+                if isinstance(own, str):
+                    results[fila] = _bulk_error(fila, own)
+                elif isinstance(result, str):
+                    results[fila] = _bulk_error(fila, result)
+                elif result is not None:
+                    # Una variante nueva se crea con su primera fila válida; las siguientes la actualizan
+                    estado, variant_id, producto_id, stock = result
+                    results[fila] = {"fila": fila, "estado": estado if first else "actualizada", "id": variant_id,
+                                     "stock": stock if own is None else own}
+                    first = False
+            if result is not None and not isinstance(result, str):
+                touched.add(result[2])
+                if result[0] == "creada":
+                    created.add(result[2])
+
+        catalog_events.mark_dirty(self.db, touched, metadata=bool(created))
+        self.db.commit()
+        for product_id in created:
+            invalidate_product_cache(product_id)
+
+        counts = {"actualizada": 0, "creada": 0, "error": 0}
+        for result in results:
+            counts[result["estado"]] += 1
+        logger.info(f"Stock masivo: {counts['actualizada']} actualizadas, {counts['creada']} creadas, {counts['error']} errores")
+        return {
+            "actualizadas": counts["actualizada"],
+            "creadas": counts["creada"],
+            "errores": counts["error"],
+            "resultados": results,
+        }
+
+
+# Filas por sentencia (VALUES / INSERT múltiple); SQLite admite 32766 parámetros
+BULK_CHUNK_SIZE = 1000
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _bulk_error(fila: int, error: str) -> dict:
+    return {"fila": fila, "estado": "error", "error": error}
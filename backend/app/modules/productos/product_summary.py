@@ -0,0 +1,123 @@
+# app/modules/productos/product_summary.py
+"""
+Resumen de las variantes guardado en `productos`: total_stock, in_stock y
+variant_count. Los listados, las tarjetas (?fields=...,in_stock) y los órdenes
+`stock`/`available` leen estas columnas, indexadas, en vez de agregar
+variantes_producto en cada consulta.
+
+Se recalcula en `before_commit` de cualquier Session para los productos que la
+transacción marcó en app/core/catalog_events.py (cambios por el ORM y
+`mark_dirty` de las escrituras Core): ventas, cancelaciones, pedidos, la
+actualización masiva de variantes y la importación pasan todos por ahí. El
+UPDATE es el mismo para todos los productos del lote y va en la misma
+transacción que el cambio, así que nunca se confirma un resumen desfasado.
+
+Lo que se escriba por fuera (SQL a mano, otro servicio) se corrige con:
+
+    python -m app.modules.productos.product_summary reconcile [--dry-run]
+"""
+import argparse
+import logging
+import sys
+from typing import Iterable, List
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core import catalog_events
+from app.modules.productos.product_model import Producto, VarianteProducto
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+SUMMARY_COLUMNS = ("total_stock", "in_stock", "variant_count")
+
+# Core sobre las tablas: el CLI no necesita configurar el resto de modelos
+_productos = Producto.__table__
+_variantes = VarianteProducto.__table__
+
+_stock = sa.select(sa.func.coalesce(sa.func.sum(_variantes.c.stock), 0))\
+    .where(_variantes.c.producto_id == _productos.c.id)\
+    .scalar_subquery()
+_count = sa.select(sa.func.count())\
+    .where(_variantes.c.producto_id == _productos.c.id)\
+    .scalar_subquery()
+_available = sa.exists().where(_variantes.c.producto_id == _productos.c.id, _variantes.c.stock > 0)
+
+# Valores calculados a partir de las variantes, en el orden de SUMMARY_COLUMNS
+_COMPUTED = (_stock, _available, _count)
+
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+def refresh_summaries(session: Session, ids: Iterable[int]) -> int:
+    """
+    Recalcula el resumen de `ids` dentro de la transacción de `session` y lo
+    copia a los Producto ya cargados en ella. Devuelve los productos actualizados.
+    """
+    updated = 0
+    for chunk in _chunks(sorted(ids)):
+        rows = session.execute(
+            sa.update(_productos)
+            .where(_productos.c.id.in_(chunk))
+            .values(dict(zip(SUMMARY_COLUMNS, _COMPUTED)))
+            .returning(_productos.c.id, *(_productos.c[name] for name in SUMMARY_COLUMNS))
+        ).all()
+        updated += len(rows)
+        for row in rows:
+            producto = session.identity_map.get(sa.inspect(Producto).identity_key_from_primary_key((row.id,)))
+            if producto is not None:
+                for name in SUMMARY_COLUMNS:
+                    set_committed_value(producto, name, getattr(row, name))
+    return updated
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_before_commit(session):
+    # El flush del commit llega después de este evento: se adelanta para que los
+    # cambios pendientes ya estén marcados y en la BD
+    session.flush()
+    ids = catalog_events.dirty_ids(session)
+    if ids:
+        refresh_summaries(session, ids)
+
+
+# --- CLI: conciliar ---
+def reconcile(dry_run: bool = False) -> int:
+    """Corrige los productos cuyo resumen no cuadra con sus variantes. Devuelve cuántos había."""
+    from app.database import SessionLocal
+
+    stale = sa.or_(*(_productos.c[name] != computed for name, computed in zip(SUMMARY_COLUMNS, _COMPUTED)))
+    with SessionLocal() as db:
+        ids = list(db.execute(sa.select(_productos.c.id).where(stale).order_by(_productos.c.id)).scalars())
+        for product_id in ids[:20]:
+            logger.info(f"Resumen desfasado: producto {product_id}")
+        if ids and not dry_run:
+            # El UPDATE lo hace el before_commit; mark_dirty además avisa a las cachés
+            catalog_events.mark_dirty(db, ids, metadata=False)
+            db.commit()
+    logger.info(f"{len(ids)} productos con el resumen desfasado" + (" (sin cambios, --dry-run)" if dry_run and ids else ""))
+    return len(ids)
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(prog="python -m app.modules.productos.product_summary",
+                                     description="Resumen de stock en productos")
+    sub = parser.add_subparsers(dest="command", required=True)
+    reconcile_parser = sub.add_parser("reconcile", help="Recalcula los resúmenes que no cuadran con las variantes")
+    reconcile_parser.add_argument("--dry-run", action="store_true", help="Solo listar los productos afectados")
+    args = parser.parse_args()
+
+    if args.command == "reconcile":
+        reconcile(dry_run=args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+# app/modules/productos/suggest_index.py
+"""
+Autocompletado de nombres de producto en memoria (GET /products/suggest).
+
+Cada nombre se normaliza (minúsculas, sin tildes ni diéresis, "ñ" -> "n") y se
+guarda una entrada por cada palabra en la que empieza, así "roj" encuentra
+"Camisa Roja". Las entradas están en una lista ordenada: un prefijo es un rango
+que se localiza con `bisect`, sin recorrer el catálogo. Dentro del rango se
+eligen los K productos más vendidos (unidades en ventas no canceladas).
+
+Se construye en la primera consulta con la sesión de la petición. Como el índice
+del catálogo (catalog_index.py), los commits que tocan productos o variantes
+(altas, cambios de nombre, bajas y las ventas, que mueven el stock) recargan
+solo esos productos en la siguiente consulta; los cambios de otros procesos
+fuerzan una reconstrucción, y en todo caso se reconstruye cada
+SUGGEST_INDEX_MAX_AGE segundos.
+"""
+import bisect
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core import catalog_events
+from app.core.catalog_version import catalog_version
+from app.modules.productos import product_model as models
+from app.modules.ventas.ventas_model import DetalleVenta, EstadoVenta, Venta
+
+logger = logging.getLogger(__name__)
+
+_MAX_CHAR = chr(0x10FFFF)
+
+
+def fold(text: str) -> str:
+    """Texto comparable: minúsculas, sin marcas diacríticas y con los espacios colapsados."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join("".join(char for char in decomposed if not unicodedata.combining(char)).split())
+
+
+def _word_suffixes(folded: str) -> List[str]:
+    """El nombre desde el inicio de cada palabra: "camisa roja" -> ["camisa roja", "roja"]."""
+    suffixes = [folded] if folded else []
+    position = folded.find(" ")
+    while position != -1:
+        suffixes.append(folded[position + 1:])
+        position = folded.find(" ", position + 1)
+    return suffixes
+
+
+class SuggestIndex:
+    MIN_REBUILD_INTERVAL = 2.0
+    # Los prefijos de 1-2 letras abarcan buena parte del catálogo: su top se memoriza
+    SHORT_PREFIX = 2
+    MAX_LIMIT = 20
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built_at: Optional[float] = None
+        self._stale = False
+        self._pending: set[int] = set()
+        self._entries: List[Tuple[str, int]] = []  # (sufijo normalizado, id), ordenadas
+        self._names: Dict[int, Tuple[str, Tuple[str, ...]]] = {}  # id -> (nombre, sufijos)
+        self._sales: Dict[int, int] = {}  # id -> unidades vendidas
+        self._top: Dict[str, List[int]] = {}
+
+    # --- Mantenimiento ---
+
+    def invalidate(self, ids: Iterable[int]) -> None:
+        with self._lock:
+            self._pending.update(ids)
+
+    def on_catalog_change(self, change: catalog_events.CatalogChange) -> None:
+        self.invalidate(change.ids)
+
+    def mark_stale(self) -> None:
+        with self._lock:
+            self._stale = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._built_at = None
+
+    def _ensure_fresh(self, db: Session) -> None:
+        age = time.monotonic() - self._built_at if self._built_at is not None else None
+        if age is None or age > settings.SUGGEST_INDEX_MAX_AGE or (self._stale and age > self.MIN_REBUILD_INTERVAL):
+            self._rebuild(db)
+        elif self._pending:
+            ids, self._pending = self._pending, set()
+            self._load(db, ids)
+
+    def _rebuild(self, db: Session) -> None:
+        start = time.perf_counter()
+        self._stale = False
+        self._pending = set()
+        self._entries = []
+        self._names = {}
+        self._sales = {}
+        self._load(db, None)
+        self._built_at = time.monotonic()
+        logger.info(f"Índice de autocompletado construido: {len(self._names)} productos en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def _load(self, db: Session, ids: Optional[set]) -> None:
+        """Carga todos los productos (`ids=None`) o recarga solo los indicados."""
+        products = sa.select(models.Producto.id, models.Producto.nombre)
+        sales = sa.select(models.VarianteProducto.producto_id, sa.func.sum(DetalleVenta.cantidad))\
+            .join(DetalleVenta, DetalleVenta.variante_id == models.VarianteProducto.id)\
+            .join(Venta, Venta.id == DetalleVenta.venta_id)\
+            .where(Venta.estado != EstadoVenta.cancelada)\
+            .group_by(models.VarianteProducto.producto_id)
+        if ids is not None:
+            id_list = list(ids)
+            products = products.where(models.Producto.id.in_(id_list))
+            sales = sales.where(models.VarianteProducto.producto_id.in_(id_list))
+            for product_id in id_list:
+                self._remove(product_id)
+
+        self._sales.update((product_id, int(units or 0)) for product_id, units in db.execute(sales))
+        rows = db.execute(products).all()
+        if ids is None:
+            entries = []
+            for product_id, nombre in rows:
+                suffixes = tuple(_word_suffixes(fold(nombre or "")))
+                self._names[product_id] = (nombre, suffixes)
+                entries.extend((suffix, product_id) for suffix in suffixes)
+            entries.sort()
+            self._entries = entries
+        else:
+            for product_id, nombre in rows:
+                suffixes = tuple(_word_suffixes(fold(nombre or "")))
+                self._names[product_id] = (nombre, suffixes)
+                for suffix in suffixes:
+                    bisect.insort(self._entries, (suffix, product_id))
+        self._top = {}
+
+    def _remove(self, product_id: int) -> None:
+        self._sales.pop(product_id, None)
+        entry = self._names.pop(product_id, None)
+        if entry is None:
+            return
+        for suffix in entry[1]:
+            position = bisect.bisect_left(self._entries, (suffix, product_id))
+            if position < len(self._entries) and self._entries[position] == (suffix, product_id):
+                del self._entries[position]
+
+    # --- Consultas ---
+
+    def _rank(self, folded: str, limit: int) -> List[int]:
+        lo = bisect.bisect_left(self._entries, (folded,))
+        hi = bisect.bisect_left(self._entries, (folded + _MAX_CHAR,), lo)
+        matches = {product_id for _, product_id in self._entries[lo:hi]}
+        # Más vendidos primero; a igualdad, por nombre y luego id para un orden estable
+        return heapq.nsmallest(
+            limit, matches, key=lambda product_id: (-self._sales.get(product_id, 0), self._names[product_id][1][0], product_id)
+        )
+
+    def suggest(self, db: Session, prefix: str, limit: int = 10) -> List[dict]:
+        """Hasta `limit` productos (id, nombre) con una palabra que empieza por `prefix`."""
+        folded = fold(prefix)
+        if not folded:
+            return []
+        limit = min(limit, self.MAX_LIMIT)
+        with self._lock:
+            self._ensure_fresh(db)
+            if len(folded) <= self.SHORT_PREFIX:
+                top = self._top.get(folded)
+                if top is None:
+                    top = self._top[folded] = self._rank(folded, self.MAX_LIMIT)
+                ids = top[:limit]
+            else:
+                ids = self._rank(folded, limit)
+            return [{"id": product_id, "nombre": self._names[product_id][0]} for product_id in ids]
+
+
+suggest_index = SuggestIndex()
+
+# Los productos y variantes ya los registra catalog_index (catalog_events.track)
+catalog_events.subscribe(suggest_index.on_catalog_change)
+catalog_version.on_remote_change(suggest_index.mark_stale)
@@ -4,6 +4,9 @@ from typing import List
 from app.modules.proveedores.proveedor_service import ProveedorService
 from app.modules.proveedores import proveedor_schema as schemas
 from app.core.dependencies import get_db
+from app.core.async_service import AsyncServiceAdapter
+from app.core.db_routing import get_async_read_db
+from app.core.http_cache import catalog_cache
 
 router = APIRouter(prefix="/proveedores", tags=["Proveedores"])
 
@@ -11,20 +14,24 @@ router = APIRouter(prefix="/proveedores", tags=["Proveedores"])
 def get_proveedor_service(db: Session = Depends(get_db)) -> ProveedorService:
     return ProveedorService(db)
 
+# Versión para endpoints `async` de solo lectura (réplica si hay)
+def get_proveedor_read_service_async(db = Depends(get_async_read_db)) -> AsyncServiceAdapter:
+    return AsyncServiceAdapter(ProveedorService, db)
+
 
 @router.post("/", response_model=schemas.ProveedorResponse, status_code=status.HTTP_201_CREATED)
 def crear_proveedor(proveedor_data: schemas.ProveedorCreate, service: ProveedorService = Depends(get_proveedor_service)):
     return service.crear_proveedor(proveedor_data)
 
 
-@router.get("/", response_model=List[schemas.ProveedorResponse])
-def listar_proveedores(service: ProveedorService = Depends(get_proveedor_service)):
-    return service.listar_proveedores()
+@router.get("/", response_model=List[schemas.ProveedorResponse], dependencies=[catalog_cache("proveedores")])
+async def listar_proveedores(service: AsyncServiceAdapter = Depends(get_proveedor_read_service_async)):
+    return await service.listar_proveedores()
 
 
-@router.get("/{proveedor_id}", response_model=schemas.ProveedorResponse)
-def obtener_proveedor(proveedor_id: int, service: ProveedorService = Depends(get_proveedor_service)):
-    return service.obtener_proveedor_por_id(proveedor_id)
+@router.get("/{proveedor_id}", response_model=schemas.ProveedorResponse, dependencies=[catalog_cache("proveedores")])
+async def obtener_proveedor(proveedor_id: int, service: AsyncServiceAdapter = Depends(get_proveedor_read_service_async)):
+    return await service.obtener_proveedor_por_id(proveedor_id)
 
 
 @router.put("/{proveedor_id}", response_model=schemas.ProveedorResponse)
@@ -1,6 +1,10 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.modules.proveedores import proveedor_model as models, proveedor_schema as schemas
+from app.modules.productos.product_service import invalidate_product_cache
+from app.core import catalog_events
+
+catalog_events.track(models.Proveedor)
 
 
 class ProveedorService:
@@ -29,9 +33,11 @@ class ProveedorService:
             setattr(proveedor, campo, valor)
         self.db.commit()
         self.db.refresh(proveedor)
+        invalidate_product_cache() # las respuestas de producto incluyen el proveedor
         return proveedor
 
     def eliminar_proveedor(self, proveedor_id: int):
         proveedor = self.obtener_proveedor_por_id(proveedor_id)
         self.db.delete(proveedor)
         self.db.commit()
+        invalidate_product_cache()
@@ -1,4 +1,5 @@
 # app/modules/users/user_service.py
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from typing import Any
@@ -8,18 +9,23 @@ from app.modules.users import user_model as models
 from app.modules.users import user_schema as schemas
 from app.core.exceptions import NotFoundException, DuplicateEntryException
 
+# Sentencias precompiladas: se construyen una vez y SQLAlchemy reutiliza su forma
+# compilada entre peticiones (get_user_by_email se ejecuta en cada petición autenticada)
+_USER_BY_ID = select(models.User).where(models.User.id == bindparam("user_id")).limit(1)
+_USER_BY_EMAIL = select(models.User).where(models.User.email == bindparam("email")).limit(1)
+
 class UserService:
     def __init__(self, db: Session): # Ahora el servicio recibe la sesión de DB directamente
         self.db = db
 
     def get_user(self, user_id: int) -> models.User:
-        user = self.db.query(models.User).filter(models.User.id == user_id).first()
+        user = self.db.execute(_USER_BY_ID, {"user_id": user_id}).scalars().first()
         if not user:
             raise NotFoundException(detail=f"User with ID {user_id} not found")
         return user
 
     def get_user_by_email(self, email: str) -> models.User | None:
-        return self.db.query(models.User).filter(models.User.email == email).first()
+        return self.db.execute(_USER_BY_EMAIL, {"email": email}).scalars().first()
 
     def get_users(self, skip: int = 0, limit: int = 100) -> list[models.User]:
         return self.db.query(models.User).offset(skip).limit(limit).all()
@@ -16,11 +16,11 @@ class Venta(Base):
     __tablename__ = "ventas"
 
     id = Column(Integer, primary_key=True, index=True)
-    cliente_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    cliente_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     total = Column(Float, nullable=False)
-    estado = Column(Enum(EstadoVenta), default=EstadoVenta.pendiente)
+    estado = Column(Enum(EstadoVenta), default=EstadoVenta.pendiente, index=True)
     codigo = Column(String, unique=True, index=True, nullable=False)
-    fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
+    fecha_creacion = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     detalles = relationship("DetalleVenta", back_populates="venta", cascade="all, delete-orphan")
     cliente = relationship("User", back_populates="ventas")
@@ -29,8 +29,8 @@ class DetalleVenta(Base):
     __tablename__ = "detalle_venta" # Cambiado a 'detalle_venta' para coincidir con el nombre del modelo.
 
     id = Column(Integer, primary_key=True, index=True)
-    venta_id = Column(Integer, ForeignKey("ventas.id", ondelete="CASCADE"), nullable=False)
-    variante_id = Column(Integer, ForeignKey("variantes_producto.id", ondelete="RESTRICT"), nullable=False)
+    venta_id = Column(Integer, ForeignKey("ventas.id", ondelete="CASCADE"), nullable=False, index=True)
+    variante_id = Column(Integer, ForeignKey("variantes_producto.id", ondelete="RESTRICT"), nullable=False, index=True)
     cantidad = Column(Integer, nullable=False)
     precio_unitario = Column(Float, nullable=False) # Asegúrate que 'Float' está importado al principio
 
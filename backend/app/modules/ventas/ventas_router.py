@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.modules.ventas import ventas_schema as schemas
-from app.modules.ventas.ventas_service import SaleService
+from app.modules.ventas.ventas_service import SALE_FIELDS, SaleService
 from app.core.dependencies import get_db # Asegúrate de que esta ruta sea correcta
+from app.core.db_routing import get_read_db
 from app.core.exceptions import NotFoundException
+from app.core import fast_json
+from app.core.sparse_fields import FieldSet
 
 router = APIRouter(prefix="/sales", tags=["Sales"])
 
@@ -12,6 +15,10 @@ router = APIRouter(prefix="/sales", tags=["Sales"])
 def get_sale_service(db: Session = Depends(get_db)) -> SaleService:
     return SaleService(db)
 
+# Reportes de ventas (solo lectura): réplica si hay
+def get_sale_read_service(db: Session = Depends(get_read_db)) -> SaleService:
+    return SaleService(db)
+
 @router.post("/", response_model=schemas.VentaOut, status_code=status.HTTP_201_CREATED)
 def create_sale_endpoint(
     sale_data: schemas.VentaCreate,
@@ -30,17 +37,23 @@ def create_sale_endpoint(
 
 @router.get("/", response_model=List[schemas.VentaOut])
 def list_sales_endpoint(
-    sale_service: SaleService = Depends(get_sale_service)
+    response: Response,
+    fieldset: Optional[FieldSet] = Depends(SALE_FIELDS),
+    sale_service: SaleService = Depends(get_sale_read_service)
 ):
     """
     Lista todas las ventas registradas.
+    Con `fields` / `include` cada venta trae solo esos campos y relaciones.
     """
-    return sale_service.get_all_sales()
+    if fieldset:
+        sales = sale_service.get_all_sales(fieldset.load_options())
+        return fast_json.json_response(fieldset.to_dicts(sales), response)
+    return fast_json.list_response(schemas.VentaOut, sale_service.get_all_sales(), response)
 
 @router.get("/{sale_code}", response_model=schemas.VentaOut)
 def get_sale_by_code_endpoint(
     sale_code: str,
-    sale_service: SaleService = Depends(get_sale_service)
+    sale_service: SaleService = Depends(get_sale_read_service)
 ):
     """
     Obtiene los detalles de una venta específica usando su código único.
@@ -86,12 +99,17 @@ def delete_sale_endpoint(
 @router.get("/by-cedula/{cedula}", response_model=List[schemas.VentaOut])
 def get_sales_by_cedula_endpoint(
     cedula: str,
-    sale_service: SaleService = Depends(get_sale_service)
+    response: Response,
+    fieldset: Optional[FieldSet] = Depends(SALE_FIELDS),
+    sale_service: SaleService = Depends(get_sale_read_service)
 ):
     """
     Obtiene todas las ventas asociadas a una cédula de cliente específica.
     """
     try:
-        return sale_service.get_sales_by_cedula(cedula)
+        if fieldset:
+            sales = sale_service.get_sales_by_cedula(cedula, fieldset.load_options())
+            return fast_json.json_response(fieldset.to_dicts(sales), response)
+        return fast_json.list_response(schemas.VentaOut, sale_service.get_sales_by_cedula(cedula), response)
     except NotFoundException as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
\ No newline at end of file
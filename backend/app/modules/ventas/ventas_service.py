@@ -1,14 +1,41 @@
 # app/modules/ventas/ventas_service.py
 
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session, joinedload
 from app.modules.ventas import ventas_model as models
 from app.modules.ventas import ventas_schema as schemas
 from app.modules.productos import product_model as product_models
 from app.modules.users import user_model as user_models
+from app.modules.productos.product_service import get_variant_meta
 from fastapi import HTTPException # Importante: usar la HTTPException de FastAPI
 from typing import List
 import uuid
 from app.core.exceptions import NotFoundException
+from app.core.sparse_fields import FieldSetParams
+
+# Sentencias precompiladas (caché de compilación compartida entre peticiones)
+_CLIENT_BY_CEDULA = select(user_models.User).where(user_models.User.cedula == bindparam("cedula")).limit(1)
+_SALE_CODE_EXISTS = select(models.Venta.id).where(models.Venta.codigo == bindparam("codigo")).limit(1)
+# Todas las variantes de la venta en una sola consulta (IN expandible). El producto
+# padre sale de la caché de metadatos (get_variant_meta); el stock, de esta consulta.
+_VARIANTS_BY_IDS = select(product_models.VarianteProducto)\
+    .where(product_models.VarianteProducto.id.in_(bindparam("ids", expanding=True)))
+
+# Carga completa para VentaOut: cada línea con su variante y el producto de esta
+SALE_LOAD_OPTIONS = (
+    joinedload(models.Venta.detalles).joinedload(models.DetalleVenta.variante).joinedload(product_models.VarianteProducto.producto),
+    joinedload(models.Venta.cliente),
+)
+
+# Campos de ?fields= / ?include= en los listados de ventas (ver app/core/sparse_fields.py)
+SALE_FIELDS = FieldSetParams(
+    models.Venta,
+    columns=("id", "cliente_id", "total", "estado", "codigo", "fecha_creacion"),
+    relations={
+        "cliente": ("id", "email", "cedula", "full_name"),
+        "detalles": ("id", "cantidad", "precio_unitario", "variante_id"),
+    },
+)
 
 class SaleService:
     def __init__(self, db: Session):
@@ -22,7 +49,7 @@ class SaleService:
         Crea una nueva venta, valida el cliente y el stock de variantes,
         calcula el total basándose en el precio del producto padre y disminuye el stock.
         """
-        cliente = self.db.query(user_models.User).filter(user_models.User.cedula == sale_data.cedula_cliente).first()
+        cliente = self.db.execute(_CLIENT_BY_CEDULA, {"cedula": sale_data.cedula_cliente}).scalars().first()
         if not cliente:
             raise HTTPException(
                 status_code=404,
@@ -30,24 +57,26 @@ class SaleService:
             )
 
         sale_code = self._generate_unique_sale_code()
-        while self.db.query(models.Venta).filter_by(codigo=sale_code).first():
+        while self.db.execute(_SALE_CODE_EXISTS, {"codigo": sale_code}).first():
             sale_code = self._generate_unique_sale_code()
 
         total_venta = 0.0
         detalles_venta = []
         variantes_a_actualizar = []
 
+        # Aquí es importante cargar el producto de la variante para el cálculo del precio
+        ids = list({item.variante_id for item in sale_data.detalles})
+        variantes = {v.id: v for v in self.db.execute(_VARIANTS_BY_IDS, {"ids": ids}).scalars()}
+        metas = get_variant_meta(self.db, ids)
+
         for item_data in sale_data.detalles:
-            # Aquí es importante cargar el producto de la variante para el cálculo del precio
-            variante = self.db.query(product_models.VarianteProducto).options(
-                joinedload(product_models.VarianteProducto.producto)
-            ).filter_by(id=item_data.variante_id).first()
+            variante = variantes.get(item_data.variante_id)
 
             if not variante:
                 raise HTTPException(status_code=404, detail=f"Variante de producto con ID {item_data.variante_id} no encontrada.")
             if variante.stock < item_data.cantidad:
                 raise HTTPException(status_code=400, detail=f"Stock insuficiente para la variante ID {item_data.variante_id}. Disponible: {variante.stock}, Solicitado: {item_data.cantidad}.")
-            if not variante.producto:
+            if item_data.variante_id not in metas:
                 raise HTTPException(status_code=500, detail=f"Variante ID {item_data.variante_id} no está asociada a un producto padre.")
 
             precio_unitario_real = float(item_data.precio_unitario)
@@ -133,12 +162,9 @@ class SaleService:
         self.db.refresh(sale)
         return sale
 
-    def get_all_sales(self) -> List[models.Venta]:
-        # Cargamos detalles, variante y producto para la respuesta de salida de la lista
-        return self.db.query(models.Venta).options(
-            joinedload(models.Venta.detalles).joinedload(models.DetalleVenta.variante).joinedload(product_models.VarianteProducto.producto),
-            joinedload(models.Venta.cliente) # Opcional: si quieres el objeto cliente en VentaOut
-        ).all()
+    def get_all_sales(self, options: tuple = SALE_LOAD_OPTIONS) -> List[models.Venta]:
+        # Por defecto cargamos detalles, variante y producto para la respuesta de salida de la lista
+        return self.db.query(models.Venta).options(*options).all()
 
     def delete_sale(self, sale_id: int) -> None:
         sale = self.get_sale_by_id(sale_id)
@@ -146,18 +172,16 @@ class SaleService:
         self.db.commit()
 
     # Agrega este método a la clase SaleService
-    def get_sales_by_cedula(self, cedula: str) -> List[models.Venta]:
+    def get_sales_by_cedula(self, cedula: str, options: tuple = SALE_LOAD_OPTIONS) -> List[models.Venta]:
         """
         Obtiene todas las ventas asociadas a una cédula de cliente específica.
         """
-        cliente = self.db.query(user_models.User).filter(user_models.User.cedula == cedula).first()
+        cliente = self.db.execute(_CLIENT_BY_CEDULA, {"cedula": cedula}).scalars().first()
         if not cliente:
             raise NotFoundException(f"Cliente con cédula '{cedula}' no encontrado.")
         
-        # Cargamos detalles, variante y producto para la respuesta
-        ventas = self.db.query(models.Venta).options(
-            joinedload(models.Venta.detalles).joinedload(models.DetalleVenta.variante).joinedload(product_models.VarianteProducto.producto),
-            joinedload(models.Venta.cliente)
-        ).filter(models.Venta.cliente_id == cliente.id).all()
+        # Por defecto cargamos detalles, variante y producto para la respuesta
+        ventas = self.db.query(models.Venta).options(*options)\
+            .filter(models.Venta.cliente_id == cliente.id).all()
         
         return ventas
\ No newline at end of file
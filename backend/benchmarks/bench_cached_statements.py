@@ -0,0 +1,92 @@
+# backend/benchmarks/bench_cached_statements.py
+"""
+Microbenchmark de las búsquedas por clave con sentencias precompiladas.
+
+Compara, por llamada, la forma anterior (`db.query(...).filter(...).first()`, que
+reconstruye el Query en cada petición) con las sentencias precompiladas de
+`UserService` y `SaleService`. Usa SQLite en memoria para que domine el coste en
+Python y no el de la base de datos.
+
+Uso (desde backend/):
+    python benchmarks/bench_cached_statements.py --calls 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.pool import StaticPool
+
+import app.main  # noqa: F401  (registra todos los modelos)
+from app.database import Base
+from app.modules.productos.product_model import Producto, VarianteProducto
+from app.modules.proveedores.proveedor_model import Proveedor
+from app.modules.users.user_model import User
+from app.modules.users.user_service import UserService
+from app.modules.ventas.ventas_service import _VARIANTS_BY_IDS
+
+ITEMS_PER_SALE = 5
+
+
+def setup() -> Session:
+    engine = sa.create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    db.add_all(User(email=f"u{i}@bench.local", cedula=f"C{i}", hashed_password="x", role="client") for i in range(100))
+    db.add(Proveedor(id=1, nombre="Proveedor"))
+    db.add_all(Producto(id=i, nombre=f"P{i}", descripcion="d", precio=10, proveedor_id=1) for i in range(1, 21))
+    db.add_all(VarianteProducto(id=i, producto_id=(i - 1) // 3 + 1, color="c", talla=f"t{i}", stock=10) for i in range(1, 61))
+    db.commit()
+    return db
+
+
+def bench(label: str, fn, calls: int, db: Session) -> float:
+    for i in range(200):  # calentar la caché de compilación
+        fn(i)
+    db.expunge_all()
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+        db.expunge_all()  # cada petición usa una sesión nueva: sin identity map
+    per_call = (time.perf_counter() - start) / calls * 1e6
+    print(f"{label:<48}{per_call:>9.1f} µs/llamada")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+    db = setup()
+    service = UserService(db)
+
+    print("Usuario por email (get_current_user)")
+    old = bench("  db.query(User).filter(...).first()",
+                lambda i: db.query(User).filter(User.email == f"u{i % 100}@bench.local").first(), args.calls, db)
+    new = bench("  UserService.get_user_by_email (precompilada)",
+                lambda i: service.get_user_by_email(f"u{i % 100}@bench.local"), args.calls, db)
+    print(f"  mejora: {old / new:.2f}x\n")
+
+    print(f"Variantes de una venta de {ITEMS_PER_SALE} líneas (SaleService.create_sale)")
+
+    def per_item(i):
+        for k in range(ITEMS_PER_SALE):
+            db.query(VarianteProducto).options(joinedload(VarianteProducto.producto)).filter_by(
+                id=(i + k) % 60 + 1).first()
+
+    def batched(i):
+        ids = [(i + k) % 60 + 1 for k in range(ITEMS_PER_SALE)]
+        {v.id: v for v in db.execute(_VARIANTS_BY_IDS, {"ids": ids}).scalars()}
+
+    calls = max(args.calls // ITEMS_PER_SALE, 1)
+    old = bench("  una consulta por línea (Query)", per_item, calls, db)
+    new = bench("  una consulta IN precompilada", batched, calls, db)
+    print(f"  mejora: {old / new:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# backend/benchmarks/bench_indexes.py
+"""
+Benchmark de la migración 3 (índices de claves foráneas y filtros).
+
+Crea una base aparte en la versión 2 del esquema, la llena con datos sintéticos
+(por defecto 1.000.000 de ventas), mide las consultas típicas, aplica la migración 3
+y vuelve a medir.
+
+Uso (desde backend/):
+    python benchmarks/bench_indexes.py                       # SQLite temporal
+    python benchmarks/bench_indexes.py --url postgresql://... --sales 1000000
+La base indicada en --url debe estar vacía: el script crea y llena sus tablas.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+
+from app.database import create_db_engine
+from app.migrations import upgrade
+
+BATCH = 20_000
+START = datetime(2023, 1, 1, tzinfo=timezone.utc)
+DAYS = 730
+
+QUERIES = {
+    "productos por categoría": (
+        """
+        SELECT p.id, p.nombre, p.precio
+        FROM productos p JOIN producto_categoria pc ON pc.producto_id = p.id
+        WHERE pc.categoria_id = :categoria_id
+        """,
+        lambda a: {"categoria_id": random.randint(1, a.categories)},
+    ),
+    "ventas por cliente": (
+        """
+        SELECT v.id, v.codigo, v.total, v.fecha_creacion
+        FROM ventas v WHERE v.cliente_id = :cliente_id
+        ORDER BY v.fecha_creacion DESC
+        """,
+        lambda a: {"cliente_id": random.randint(1, a.customers)},
+    ),
+    "ventas por fecha (1 día)": (
+        """
+        SELECT v.id, v.codigo, v.total
+        FROM ventas v WHERE v.fecha_creacion >= :desde AND v.fecha_creacion < :hasta
+        """,
+        lambda a: _day_range(),
+    ),
+    "detalle de ventas de un cliente": (
+        """
+        SELECT d.variante_id, d.cantidad
+        FROM detalle_venta d JOIN ventas v ON v.id = d.venta_id
+        WHERE v.cliente_id = :cliente_id
+        """,
+        lambda a: {"cliente_id": random.randint(1, a.customers)},
+    ),
+}
+
+
+def _day_range():
+    desde = START + timedelta(days=random.randrange(DAYS))
+    return {"desde": desde, "hasta": desde + timedelta(days=1)}
+
+
+def _insert_batches(conn, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+
+
+def seed(engine, args):
+    md = sa.MetaData()
+    md.reflect(engine)
+    t = md.tables
+    random.seed(42)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        _insert_batches(conn, t["users"], (
+            {"id": i, "email": f"cliente{i}@bench.local", "cedula": f"B{i}", "hashed_password": "x",
+             "full_name": f"Cliente {i}", "is_active": True, "role": "client"}
+            for i in range(1, args.customers + 1)
+        ))
+        conn.execute(t["proveedor"].insert(), [{"id": i, "nombre": f"Proveedor {i}"} for i in range(1, 51)])
+        conn.execute(t["categorias"].insert(), [{"id": i, "name": f"Categoría {i}"} for i in range(1, args.categories + 1)])
+        _insert_batches(conn, t["productos"], (
+            {"id": i, "nombre": f"Producto {i}", "descripcion": "bench", "precio": random.randint(5, 200),
+             "proveedor_id": random.randint(1, 50)}
+            for i in range(1, args.products + 1)
+        ))
+        _insert_batches(conn, t["producto_categoria"], (
+            {"producto_id": p, "categoria_id": c}
+            for p in range(1, args.products + 1)
+            for c in random.sample(range(1, args.categories + 1), 2)
+        ))
+        _insert_batches(conn, t["variantes_producto"], (
+            {"id": (p - 1) * 3 + k + 1, "producto_id": p, "color": "negro", "talla": talla, "stock": 100}
+            for p in range(1, args.products + 1)
+            for k, talla in enumerate(("S", "M", "L"))
+        ))
+        variants = args.products * 3
+        _insert_batches(conn, t["ventas"], (
+            {"id": i, "cliente_id": random.randint(1, args.customers), "total": 10.0,
+             "estado": random.choice(("pendiente", "confirmada", "cancelada")), "codigo": f"V{i:08d}",
+             "fecha_creacion": START + timedelta(seconds=random.randrange(DAYS * 86400))}
+            for i in range(1, args.sales + 1)
+        ))
+        _insert_batches(conn, t["detalle_venta"], (
+            {"venta_id": i, "variante_id": random.randint(1, variants), "cantidad": 1, "precio_unitario": 10.0}
+            for i in range(1, args.sales + 1)
+        ))
+        conn.execute(sa.text("ANALYZE"))
+    print(f"Datos generados en {time.perf_counter() - start:.1f}s "
+          f"({args.sales} ventas, {args.customers} clientes, {args.products} productos)")
+
+
+def measure(engine, args) -> dict:
+    results = {}
+    with engine.connect() as conn:
+        for name, (sql, params) in QUERIES.items():
+            stmt = sa.text(sql)
+            conn.execute(stmt, params(args)).fetchall()  # calentar caché
+            timings = []
+            for _ in range(args.repeat):
+                p = params(args)
+                start = time.perf_counter()
+                conn.execute(stmt, p).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(timings)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base vacía para el benchmark (por defecto, SQLite temporal)")
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--customers", type=int, default=20_000)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.url
+    if url is None:
+        tmpdir = tempfile.mkdtemp(prefix="bench_indexes_")
+        url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    engine = create_db_engine(url, name="bench")
+
+    upgrade(engine, target=2)
+    seed(engine, args)
+    before = measure(engine, args)
+
+    start = time.perf_counter()
+    upgrade(engine, target=3)
+    with engine.begin() as conn:
+        conn.execute(sa.text("ANALYZE"))
+    print(f"Migración 3 (índices) aplicada en {time.perf_counter() - start:.1f}s\n")
+    after = measure(engine, args)
+
+    print(f"{'consulta':<34}{'sin índices':>14}{'con índices':>14}{'mejora':>10}")
+    for name in QUERIES:
+        print(f"{name:<34}{before[name]:>11.2f} ms{after[name]:>11.2f} ms{before[name] / after[name]:>9.1f}x")
+
+    engine.dispose()
+    if tmpdir:
+        os.remove(os.path.join(tmpdir, "bench.db"))
+        os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# backend/benchmarks/bench_loader_strategies.py
+"""
+Benchmark de estrategias de carga de relaciones en los listados del catálogo.
+
+Compara la carga anterior (joinedload de variantes + categorías + proveedor en un
+solo JOIN, con DISTINCT al filtrar por categoría) con `PRODUCT_LOAD_OPTIONS`
+(selectinload para las colecciones). Mide filas devueltas por la base de datos,
+pico de memoria (tracemalloc) y latencia.
+
+Uso (desde backend/):
+    python benchmarks/bench_loader_strategies.py --products 5000 --variants 10 --categories 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+
+import app.main  # noqa: F401  (registra todos los modelos)
+from app.database import Base
+from app.modules.categorias.categoria_model import Categoria
+from app.modules.productos.product_model import Producto, producto_categoria
+from app.modules.productos.product_service import PRODUCT_LOAD_OPTIONS
+
+JOINED_OPTIONS = (
+    joinedload(Producto.variantes),
+    joinedload(Producto.categorias),
+    joinedload(Producto.proveedor),
+)
+
+
+def seed(engine, args):
+    md = Base.metadata
+    with engine.begin() as conn:
+        conn.execute(md.tables["proveedor"].insert(), [{"id": i, "nombre": f"Proveedor {i}"} for i in range(1, 21)])
+        conn.execute(md.tables["categorias"].insert(), [{"id": i, "name": f"Categoría {i}"} for i in range(1, 31)])
+        conn.execute(md.tables["productos"].insert(), [
+            {"id": p, "nombre": f"Producto {p}", "descripcion": "x" * 80, "precio": 10, "proveedor_id": p % 20 + 1}
+            for p in range(1, args.products + 1)
+        ])
+        conn.execute(producto_categoria.insert(), [
+            {"producto_id": p, "categoria_id": (p + k * 7) % 30 + 1}
+            for p in range(1, args.products + 1) for k in range(args.categories)
+        ])
+        conn.execute(md.tables["variantes_producto"].insert(), [
+            {"producto_id": p, "color": f"color {k}", "talla": "M", "stock": k}
+            for p in range(1, args.products + 1) for k in range(args.variants)
+        ])
+
+
+def query_all(db, options):
+    return db.query(Producto).options(*options).all()
+
+
+def query_by_category_joined(db, options):
+    return db.query(Producto).join(Producto.categorias).filter(Categoria.id.in_([1, 2, 3]))\
+        .options(*options).distinct().all()
+
+
+def query_by_category_selectin(db, options):
+    return db.query(Producto).filter(Producto.id.in_(
+        sa.select(producto_categoria.c.producto_id).where(producto_categoria.c.categoria_id.in_([1, 2, 3]))
+    )).options(*options).all()
+
+
+def run(engine, label, fn, options, repeat):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    tracemalloc.start()
+    with Session(engine) as db:
+        products = fn(db, options)
+        count = len(products)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    event.remove(engine, "before_cursor_execute", capture)
+
+    # Filas que la base de datos envía realmente (se re-ejecutan las sentencias emitidas)
+    with engine.connect() as conn:
+        rows = sum(len(conn.exec_driver_sql(sql, params).fetchall()) for sql, params in statements)
+
+    timings = []
+    for _ in range(repeat):
+        with Session(engine) as db:
+            start = time.perf_counter()
+            fn(db, options)
+            timings.append(time.perf_counter() - start)
+    print(f"{label:<42}{count:>9}{len(statements):>9}{rows:>10}{peak / 2**20:>10.1f} MB{statistics.median(timings) * 1000:>10.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--variants", type=int, default=10)
+    parser.add_argument("--categories", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_loaders_")
+    path = os.path.join(tmpdir, "bench.db")
+    engine = sa.create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    seed(engine, args)
+    print(f"{args.products} productos × {args.variants} variantes × {args.categories} categorías\n")
+
+    print(f"{'estrategia':<42}{'productos':>9}{'queries':>9}{'filas':>10}{'memoria':>13}{'latencia':>13}")
+    run(engine, "todos: joinedload (anterior)", query_all, JOINED_OPTIONS, args.repeat)
+    run(engine, "todos: selectinload", query_all, PRODUCT_LOAD_OPTIONS, args.repeat)
+    run(engine, "3 categorías: JOIN + DISTINCT (anterior)", query_by_category_joined, JOINED_OPTIONS, args.repeat)
+    run(engine, "3 categorías: IN + selectinload", query_by_category_selectin, PRODUCT_LOAD_OPTIONS, args.repeat)
+
+    engine.dispose()
+    os.remove(path)
+    os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# backend/benchmarks/bench_serialization.py
+"""
+Benchmark de serialización JSON de listados grandes: response_model frente a orjson.
+
+Para GET /products (1k productos) y GET /sales (10k ventas) separa el tiempo de
+la consulta del de serialización y compara:
+  - FastAPI: validar con el `response_model` y generar el JSON (lo que hace el
+    endpoint al devolver objetos ORM),
+  - orjson: `app/core/fast_json.py` (FAST_JSON_ENABLED), sin revalidar.
+Comprueba además que ambas salidas son idénticas byte a byte.
+
+Uso (desde backend/):
+    python benchmarks/bench_serialization.py --products 1000 --sales 10000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+import app.main  # noqa: F401  (registra todos los modelos)
+from app.core import fast_json
+from app.database import Base
+from app.modules.productos import product_schema
+from app.modules.productos.product_model import producto_categoria
+from app.modules.productos.product_service import ProductService
+from app.modules.ventas import ventas_schema
+from app.modules.ventas.ventas_service import SaleService
+
+
+def seed(engine, args):
+    md = Base.metadata
+    start = datetime(2025, 1, 1, 9, 30)
+    variants = args.products * args.variants
+    with engine.begin() as conn:
+        conn.execute(md.tables["proveedor"].insert(), [
+            {"id": i, "nombre": f"Proveedor {i}", "telefono": "0414-5550000", "correo": f"ventas{i}@proveedor.com"}
+            for i in range(1, 21)
+        ])
+        conn.execute(md.tables["categorias"].insert(), [{"id": i, "name": f"Categoría {i}"} for i in range(1, 31)])
+        conn.execute(md.tables["productos"].insert(), [
+            {"id": p, "nombre": f"Camisa algodón {p}", "descripcion": "Tela peinada, corte clásico. " * 3,
+             "precio": Decimal(f"{p % 90 + 9}.{p % 100:02d}"), "proveedor_id": p % 20 + 1,
+             "image_url": f"/static/images/{p}.jpg" if p % 2 else None}
+            for p in range(1, args.products + 1)
+        ])
+        conn.execute(producto_categoria.insert(), [
+            {"producto_id": p, "categoria_id": (p + k * 7) % 30 + 1}
+            for p in range(1, args.products + 1) for k in range(3)
+        ])
+        conn.execute(md.tables["variantes_producto"].insert(), [
+            {"producto_id": p, "color": f"color {k}", "talla": "M", "stock": k}
+            for p in range(1, args.products + 1) for k in range(args.variants)
+        ])
+        conn.execute(md.tables["users"].insert(), [
+            {"id": u, "email": f"cliente{u}@correo.com", "cedula": f"V{u:08d}", "hashed_password": "x",
+             "full_name": f"Cliente Núñez {u}" if u % 3 else None, "role": "client"}
+            for u in range(1, 501)
+        ])
+        conn.execute(md.tables["ventas"].insert(), [
+            {"id": v, "cliente_id": v % 500 + 1, "total": (v % 300) * 12.35, "estado": "confirmada" if v % 4 else "pendiente",
+             "codigo": f"V-{v:08d}", "fecha_creacion": start + timedelta(minutes=v, microseconds=v % 7 * 1000)}
+            for v in range(1, args.sales + 1)
+        ])
+        conn.execute(md.tables["detalle_venta"].insert(), [
+            {"venta_id": v, "variante_id": (v * 7 + k) % variants + 1, "cantidad": k + 1, "precio_unitario": 19.99 + k}
+            for v in range(1, args.sales + 1) for k in range(args.details)
+        ])
+
+
+def median_ms(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, result
+
+
+def run(engine, label, load, model, repeat):
+    adapter = TypeAdapter(List[model])
+
+    def fastapi_path(items):
+        # Igual que FastAPI con response_model: validar desde atributos y volcar a JSON
+        return adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+    with Session(engine) as db:
+        query_ms, items = median_ms(lambda: load(db), repeat)
+        # Las relaciones ya están cargadas: solo se mide la serialización
+        normal_ms, normal = median_ms(lambda: fastapi_path(items), repeat)
+        fast_ms, fast = median_ms(lambda: fast_json.dumps_list(model, items), repeat)
+
+    assert fast == normal, f"{label}: la vía rápida no produce el mismo JSON"
+    for name, ser_ms in (("FastAPI (validar + JSON)", normal_ms), ("orjson (fast_json)", fast_ms)):
+        share = ser_ms / (query_ms + ser_ms) * 100
+        print(f"{label:<16}{name:<26}{len(items):>8}{query_ms:>11.0f} ms{ser_ms:>11.0f} ms{share:>10.0f} %")
+    print(f"{'':<16}{'idéntico byte a byte':<26}{len(fast) / 2**20:>8.1f} MB  (x{normal_ms / fast_ms:.1f} más rápido)\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000)
+    parser.add_argument("--variants", type=int, default=5)
+    parser.add_argument("--sales", type=int, default=10_000)
+    parser.add_argument("--details", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_serialization_")
+    path = os.path.join(tmpdir, "bench.db")
+    engine = sa.create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    seed(engine, args)
+    print(f"{args.products} productos × {args.variants} variantes; {args.sales} ventas × {args.details} detalles\n")
+
+    print(f"{'listado':<16}{'serialización':<26}{'filas':>8}{'consulta':>14}{'serializar':>14}{'% total':>12}")
+    run(engine, "GET /products", lambda db: ProductService(db).get_all_products(), product_schema.ProductResponse, args.repeat)
+    run(engine, "GET /sales", lambda db: SaleService(db).get_all_sales(), ventas_schema.VentaOut, args.repeat)
+
+    engine.dispose()
+    os.remove(path)
+    os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    main()